@@ -3,11 +3,14 @@ adapters/base.py - Clase base para adaptadores de sitios.
 Cada sitio tiene su propio adaptador que sabe como navegar y extraer links.
 """
 
+import time
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 from playwright.sync_api import Page, BrowserContext
 from config import SearchCriteria
-from matcher import LinkOption
+from matcher import LinkOption, LinkMatcher
+from wait_tuner import site_key
+from human_sim import HumanSimProfile, resolve_profile
 
 
 class SiteAdapter(ABC):
@@ -24,19 +27,113 @@ class SiteAdapter(ABC):
         self.timer_interceptor = None
         self.vision_resolver = None
         self.shortener_resolver = None # Nuevo: Manejador de acortadores
+        self.wait_tuner = None  # Esperas adaptativas aprendidas por sitio
+        self.batch_mode = False  # Headless sin usuario: omite simulacion humana innecesaria
+        self.screenshot_handler = None  # Sin handler no se capturan screenshots
+        self.bus = None  # ResolutionBus: link final publicado por cualquier componente
+        self.logger = None  # Logger de la resolucion; sin el, log() imprime
 
     def set_analyzers(self, 
                      network_analyzer=None, 
                      dom_analyzer=None, 
                      timer_interceptor=None, 
                      vision_resolver=None,
-                     shortener_resolver=None):
+                     shortener_resolver=None,
+                     wait_tuner=None,
+                     screenshot_handler=None,
+                     bus=None,
+                     logger=None):
         """Asigna los analizadores para uso en el adaptador."""
         self.network_analyzer = network_analyzer
         self.dom_analyzer = dom_analyzer
         self.timer_interceptor = timer_interceptor
         self.vision_resolver = vision_resolver
         self.shortener_resolver = shortener_resolver
+        self.wait_tuner = wait_tuner
+        self.screenshot_handler = screenshot_handler
+        self.bus = bus
+        self.logger = logger
+
+    def resolved_url(self) -> Optional[str]:
+        """Link final ya publicado en el bus por otro componente (o None)."""
+        return self.bus.result if self.bus else None
+
+    def resolved_option(self) -> Optional[LinkOption]:
+        """LinkOption (parseado y con score) del link final publicado en el bus."""
+        url = self.resolved_url()
+        if not url:
+            return None
+        matcher = LinkMatcher(self.criteria)
+        option = matcher.parse_link(url, f"{self.name()} ({self.bus.source})")
+        option.score = matcher.score_link(option)
+        return option
+
+    def screenshot(self, page: Page, name: str, description: str = "", error: bool = False):
+        """
+        Screenshot segun la politica del ScreenshotHandler ("off", "on-error",
+        "per-step"). Sin handler no cuesta nada.
+        """
+        if self.screenshot_handler:
+            self.screenshot_handler.capture(page, name, description, kind="error" if error else "step")
+
+    def tuned_wait(self, page: Page, step: str, default_ms: int, predicate_js: str, polling="raf",
+                   arg=None) -> bool:
+        """
+        Espera a que `predicate_js` (llamado con `arg`) sea verdadero en la
+        pagina. Con WaitTuner usa el presupuesto aprendido para el sitio; sin
+        el, espera hasta el default.
+        """
+        if self.wait_tuner:
+            return self.wait_tuner.wait_for_function(page, step, default_ms, predicate_js, arg=arg,
+                                                     polling=polling)
+        try:
+            page.wait_for_function(predicate_js, arg=arg, timeout=default_ms, polling=polling)
+            return True
+        except Exception:
+            return False
+
+    def sim_profile(self, url: str, intensity: str = "normal") -> HumanSimProfile:
+        """Perfil de simulacion humana para `url` (omitida en batch si el sitio no la necesita)."""
+        return resolve_profile(url, intensity, batch=self.batch_mode)
+
+    POLL_MS = 100  # Sondeo de tuned_wait_all
+
+    def tuned_wait_all(self, pages: Sequence[Tuple[Page, object]], step: str, default_ms: int,
+                       predicate_js: str) -> bool:
+        """
+        Como tuned_wait, pero para varias pestañas a la vez: sondea
+        `predicate_js` en cada (pagina, arg) por turnos hasta que se cumpla en
+        todas, asi que tarda lo que la mas lenta y no la suma. Con WaitTuner
+        se registra una sola observacion para el grupo.
+        """
+        pending = list(pages)
+
+        def ready(page, arg) -> bool:
+            try:
+                return bool(page.evaluate(predicate_js, arg))
+            except Exception:
+                return False  # Ej: contexto destruido mientras carga
+
+        def wait_fn(timeout_ms: int):
+            deadline = time.monotonic() + timeout_ms / 1000
+            while True:
+                pending[:] = [(page, arg) for page, arg in pending if not ready(page, arg)]
+                if not pending:
+                    return
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"{step}: {len(pending)} page(s) not ready")
+                # Mantener vivo el despacho de eventos de Playwright
+                pending[0][0].wait_for_timeout(self.POLL_MS)
+
+        if not pending:
+            return True
+        if self.wait_tuner:
+            return self.wait_tuner.wait(site_key(pending[0][0].url), step, default_ms, wait_fn)
+        try:
+            wait_fn(default_ms)
+            return True
+        except Exception:
+            return False
 
     @abstractmethod
     def can_handle(self, url: str) -> bool:
@@ -57,7 +154,10 @@ class SiteAdapter(ABC):
 
     def log(self, step: str, msg: str):
         """Helper para logging consistente."""
-        print(f"  [{self.name()}:{step}] {msg}")
+        if self.logger is not None:
+            self.logger.step(step, msg)
+        else:
+            print(f"  [{self.name()}:{step}] {msg}")
 
     @abstractmethod
     def name(self) -> str:
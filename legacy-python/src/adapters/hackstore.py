@@ -3,12 +3,13 @@ adapters/hackstore.py - Adaptador para hackstore.mx
 Navega en hackstore.mx, busca links segun criterios y los rankea.
 """
 
-from typing import List
+from typing import List, Optional
 from playwright.sync_api import Page
 from .base import SiteAdapter
-from matcher import LinkOption, LinkMatcher
+from matcher import LinkOption, StreamingLinkMatcher
 from config import TIMEOUT_NAV, TIMEOUT_ELEMENT
 from human_sim import random_delay, simulate_human_behavior
+from navigation_capture import NavigationCapture, wait_for_captures
 
 
 class HackstoreAdapter(SiteAdapter):
@@ -53,7 +54,7 @@ class HackstoreAdapter(SiteAdapter):
                 self.log("ERROR", f"Navigation timeout: {e}")
                 return []
             
-            random_delay(1.0, 2.0)
+            random_delay(1.0, 2.0, page)
             
             # Obtener el HTML completo
             html_content = page.content()
@@ -151,13 +152,12 @@ class HackstoreAdapter(SiteAdapter):
                         page.wait_for_timeout(1000)
                         continue
                     self.log("ERROR", f"Navigation timeout or failed ({url[:60]}): {e}")
-                    try:
-                        page.screenshot(path="hackstore_nav_error.png")
-                    except:
-                        pass
+                    self.screenshot(page, "hackstore_nav_error", "Error de navegacion", error=True)
                     return None
             
-            random_delay(1.0, 3.0)
+            # Simulación humana con presupuesto de tiempo, solapada con la carga
+            # (termina en cuanto la red queda ociosa; en batch se omite)
+            simulate_human_behavior(page, self.sim_profile(url, "light"))
 
             # NUEVO: Cerrar posible splash screen / disclaimer
             try:
@@ -169,15 +169,14 @@ class HackstoreAdapter(SiteAdapter):
                     page.wait_for_timeout(1000)
             except: pass
 
-            self.log("INIT", "Movie page loaded. Taking screenshot...")
-            try:
-                page.screenshot(path="hackstore_movie_page.png")
-            except Exception as e:
-                self.log("WARNING", f"Failed to take screenshot: {e}")
+            self.log("INIT", "Movie page loaded.")
+            self.screenshot(page, "hackstore_movie_page", "Pagina de la pelicula")
 
-            # Extraer todos los links de descarga disponibles
+            # Extraer los links de descarga; el matcher los rankea a medida
+            # que aparecen (top-k) y corta la expansion ante un match perfecto
+            matcher = self.candidate_matcher()
             try:
-                raw_links = self._extract_download_links(page)
+                raw_links = self._extract_download_links(page, matcher)
                 self.log("EXTRACT", f"Found {len(raw_links)} download links")
             except Exception as e:
                 self.log("ERROR", f"Failed to extract links: {e}")
@@ -185,26 +184,21 @@ class HackstoreAdapter(SiteAdapter):
 
             if not raw_links:
                 self.log("ERROR", "No download links found on page")
-                try:
-                    page.screenshot(path="hackstore_no_links_debug.png")
-                except:
-                    pass
+                self.screenshot(page, "hackstore_no_links", "Sin links de descarga", error=True)
                 return None
 
-            # Usar el matcher para rankear links
-            try:
-                matcher = LinkMatcher(self.criteria)
-                ranked = matcher.parse_and_rank(raw_links)
-            except Exception as e:
-                self.log("ERROR", f"Failed to rank links: {e}")
+            listing_url = page.url
+            best_link = self._follow_ranked(page, matcher)
+            if not best_link and matcher.perfect:
+                # El match perfecto corto la expansion: expandir todo y
+                # reintentar una vez con los candidatos que no se probaron
+                self.log("RANK", "Perfect match could not be resolved. Expanding all sections and retrying...")
+                tried = {cand["id"] for _, cand in matcher.top()}
+                best_link = self._follow_ranked(page, self._rescan_expanded(page, listing_url, tried))
+
+            if not best_link:
+                self.log("ERROR", "None of the ranked links could be resolved")
                 return None
-
-            # Log de los top 5
-            self.log("RANK", "Top 5 links:")
-            for i, link in enumerate(ranked[:5], 1):
-                self.log("RANK", f"  {i}. {link}")
-
-            best_link = ranked[0]
             self.log("RESULT", f"Best link: {best_link.url[:100]}")
 
             # Si el mejor link requiere navegacion adicional (ej: acortador),
@@ -232,42 +226,125 @@ class HackstoreAdapter(SiteAdapter):
                 except Exception as e:
                     self.log("WARNING", f"Error closing page: {e}")
 
-    def _extract_download_links(self, page: Page) -> List[dict]:
+    # Extraccion en pagina: un solo round trip devuelve todos los candidatos
+    # ya clasificados (proveedor y calidad inferidos en el DOM) y los marca con
+    # data-neo-id para poder hacer click despues solo en el elegido.
+    # Es incremental: solo devuelve los elementos aun no marcados. El id es
+    # texto + ordinal en el DOM, asi que es el mismo en otra pestaña o tras
+    # recargar y expandir el listado.
+    EXTRACT_CANDIDATES_JS = """(opts) => {
+        const QUALITY_RE = /(2160p|4k|1080p|720p|480p|dvd-?rip|bluray|web-dl)/i;
+        const PROVIDERS = [
+            ['UTORRENT', 'utorrent'], ['TORRENT', 'utorrent'],
+            ['GDRIVE', 'drive.google'], ['DRIVE', 'drive.google'],
+            ['MEDIAFIRE', 'mediafire'], ['MEDIA-FIRE', 'mediafire'],
+            ['MEGAUP', 'megaup'], ['MEGA', 'mega'],
+            ['1FICHIER', '1fichier'], ['UPTOBOX', 'uptobox'], ['UPSTREAM', 'upstream'],
+            ['RANOZ', 'ranoz'], ['GOFILE', 'gofile'], ['DROPBOX', 'dropbox'],
+        ];
+        const normQuality = (q) => {
+            q = q.toLowerCase();
+            if (q === '4k') return '2160p';
+            return q.replace('dvd-rip', 'dvdrip');
+        };
+        // Calidad: primer texto de calidad hacia atras/arriba (max 25 pasos)
+        const qualityNear = (el) => {
+            let curr = el;
+            for (let i = 0; i < 25 && curr; i++) {
+                const m = (curr.innerText || '').match(QUALITY_RE);
+                if (m) return normQuality(m[0]);
+                curr = curr.previousElementSibling || curr.parentElement;
+            }
+            return '';
+        };
+
+        const results = [];
+        const seen = {};
+        document.querySelectorAll(opts.selector).forEach(el => {
+            const text = (el.innerText || '').trim().toUpperCase();
+            if (!text || text.length >= 50 || text.includes('VER ENLACES')) return;
+            if (!opts.keywords.some(k => text.includes(k))) return;
+            // Solo las "hojas" del DOM que tengan el texto
+            if (opts.leafOnly && !(el.children.length === 0 ||
+                (el.children.length === 1 && el.children[0].tagName === 'IMG'))) return;
+            const rect = el.getBoundingClientRect();
+            if (rect.width === 0 || rect.height === 0) return;
+
+            const key = text.replace(/[^A-Z0-9]+/g, '-');
+            const ordinal = seen[key] || 0;
+            seen[key] = ordinal + 1;
+            if (el.hasAttribute('data-neo-id')) return;
+
+            const match = PROVIDERS.find(([k]) => text.includes(k));
+            const id = key + '-' + ordinal;
+            el.setAttribute('data-neo-id', id);
+            results.push({
+                id: id,
+                text: text,
+                provider: match ? match[1] : 'other',
+                quality: qualityNear(el),
+                href: el.tagName === 'A' ? el.href : null,
+            });
+        });
+        return results;
+    }"""
+
+    # Botones de proveedor visibles: las mismas "hojas" que toma
+    # EXTRACT_CANDIDATES_JS (los que aparecen al expandir "VER ENLACES")
+    PROVIDER_BUTTONS_JS = """(keywords) => {
+        let n = 0;
+        document.querySelectorAll('a, button, div, span, b, strong').forEach(el => {
+            const text = (el.innerText || '').trim().toUpperCase();
+            if (!text || text.length >= 50 || text.includes('VER ENLACES')) return;
+            if (!keywords.some(k => text.includes(k))) return;
+            if (!(el.children.length === 0 ||
+                (el.children.length === 1 && el.children[0].tagName === 'IMG'))) return;
+            const rect = el.getBoundingClientRect();
+            if (rect.width > 0 && rect.height > 0) n++;
+        });
+        return n;
+    }"""
+
+    # Listo cuando hay mas botones de proveedor que antes de expandir (el
+    # texto "MEGA" suele estar en la pagina antes de cualquier expansion)
+    LINKS_EXPANDED_JS = "(arg) => (" + PROVIDER_BUTTONS_JS + ")(arg.keywords) > arg.before"
+
+    LISTING_READY_JS = """() => (document.body && document.body.innerText || '').toUpperCase().includes('VER ENLACES')"""
+
+    RANK_TOP_K = 10              # Candidatos que conserva el matcher
+    CAPTURE_TOP_K = 3            # Candidatos abiertos en paralelo
+    CANDIDATE_SHOWS = ("quality",)  # Lo que muestra el texto de un candidato (ver matcher.TEXT_FIELDS)
+    CAPTURE_TIMEOUT_MS = 10000   # Espera comun para todas las capturas
+
+    PROVIDER_KEYWORDS = ["MEGA", "MEDIAFIRE", "UTORRENT", "1FICHIER", "UPTOBOX", "UPSTREAM",
+                         "DRIVE", "GDRIVE", "MEDIA-FIRE", "DESCARGAR"]
+
+    def _extract_download_links(self, page: Page, matcher: StreamingLinkMatcher) -> List[dict]:
         """
-        Extrae los links de descarga de hackstore de forma interactiva.
+        Extrae los candidatos de descarga de hackstore y los ofrece a `matcher`
+        a medida que aparecen; deja de expandir secciones en cuanto hay un
+        match perfecto.
+
+        Returns:
+            Lista de dicts {id, label, url, text, provider, quality, href}.
+            `id` es el data-neo-id del elemento y `label` su texto; `url` es el
+            href externo si lo hay o "btn_click" si hace falta hacer click.
         """
-        links = []
-        providers_all = [
-            "utorrent.com", "mega.nz", "www.mediafire.com", "megaup.net", 
-            "1fichier.com", "ranoz.gg", "drive.google.com", "dropbox.com", 
-            "gofile.io", "mediafire", "mega", "dropbox", "google drive"
-        ]
-        
         try:
-            from human_sim import simulate_human_behavior
             # Esperar a que los elementos de descarga carguen
             self.log("EXTRACT", "Waiting for visible quality text (1080p, 720p, Bluray)...")
             
-            # Interactuar un poco para despertar el renderizado reactivo
-            simulate_human_behavior(page, intensity="light")
-            
-            # Intentar encontrar texto de calidad VISIBLE (excluyendo scripts)
-            quality_loaded = False
-            for i in range(20): # Aumentar a 20 segundos
-                try:
-                    # Intentar scroll para activar carga perezosa
-                    if i % 5 == 0:
-                        page.mouse.wheel(0, 500)
-                    
-                    body_text = page.inner_text("body").lower()
-                    if any(q in body_text for q in ["1080p", "720p", "bluray", "dvdrip", "calidad"]):
-                        self.log("EXTRACT", f"Quality text detected in visible body after {i}s!")
-                        quality_loaded = True
-                        break
-                except:
-                    pass
-                
-                page.wait_for_timeout(1000)
+            # Intentar encontrar texto de calidad VISIBLE (excluyendo scripts).
+            # El presupuesto (default 20s) se aprende por sitio con WaitTuner
+            quality_loaded = self.tuned_wait(page, "quality_text", 20000, """() => {
+                window.__neoQualityPolls = (window.__neoQualityPolls || 0) + 1;
+                // Scroll cada ~5s para activar carga perezosa
+                if (window.__neoQualityPolls % 5 === 1) window.scrollBy(0, 500);
+                const text = (document.body && document.body.innerText || '').toLowerCase();
+                return ['1080p', '720p', 'bluray', 'dvdrip', 'calidad'].some(q => text.includes(q));
+            }""", polling=1000)
+            if quality_loaded:
+                self.log("EXTRACT", "Quality text detected in visible body!")
 
             if not quality_loaded:
                 # FALLBACK EXTREMO: Si no hay texto visible, buscar en TODO el HTML
@@ -277,473 +354,463 @@ class HackstoreAdapter(SiteAdapter):
                     quality_loaded = True
                 else:
                     self.log("ERROR", "No quality text found anywhere. Page might be restricted.")
-                    page.screenshot(path="logs/hackstore_blocked_debug.png")
+                    self.screenshot(page, "hackstore_blocked", "Pagina restringida", error=True)
                     return []
-            self.log("DEBUG", "Searching for quality elements via JS...")
-            tag_info = page.evaluate("""() => {
-                const results = [];
-                const searchTerms = ['1080p', '720p', 'bluray', 'dvdrip'];
-                document.querySelectorAll('*').forEach(el => {
-                    const text = el.innerText || "";
-                    if (searchTerms.some(q => text.toLowerCase().includes(q)) && el.children.length === 0) {
-                        results.push({ tag: el.tagName, text: text.substring(0, 30), classes: el.className });
+
+            # Buscar cabeceras que contengan calidad (cualquier etiqueta "hoja"
+            # o con texto corto), contadas en la pagina en una sola evaluacion
+            headings = page.evaluate("""() => {
+                const terms = ['1080p', '720p', '4k', 'dvdrip', 'hd', 'web-dl', 'bluray'];
+                const found = [];
+                document.querySelectorAll('h1, h2, h3, h4, h5, h6, b, strong, .font-bold, .text-xl, div:not(:has(*))').forEach(el => {
+                    const text = (el.textContent || '').trim();
+                    if (text.length < 50 && terms.some(q => text.toLowerCase().includes(q))) {
+                        found.push({ tag: el.tagName, text: text.substring(0, 30) });
                     }
                 });
-                return results;
+                return found;
             }""")
-            for info in tag_info:
-                self.log("DEBUG", f"Found quality-like tag: <{info['tag']}> class='{info['classes']}' text='{info['text']}'")
+            for info in headings[:10]:
+                self.log("DEBUG", f"Found quality-like tag: <{info['tag']}> text='{info['text']}'")
 
-            # Buscar cabeceras que contengan calidad
-            # Ampliar aún más la búsqueda a CUALQUIER etiqueta que sea "hoja" (sin hijos) o tenga texto corto
-            headings = page.query_selector_all("h1, h2, h3, h4, h5, h6, b, strong, .font-bold, .text-xl, div:not(:has(*))")
-            self.log("EXTRACT", f"Total potential elements found: {len(headings)}")
-            
-            relevant_headings = []
-            for h in headings:
-                try:
-                    text = h.text_content().strip()
-                    # Filtro de longitud para evitar parrafos gigantes
-                    if len(text) < 50 and any(q in text.lower() for q in ["1080p", "720p", "4k", "dvdrip", "hd", "web-dl", "bluray"]):
-                        relevant_headings.append(h)
-                except:
-                    continue
-            
-            if not relevant_headings:
+            if not headings:
                 self.log("ERROR", "No relevant quality headings found among potential list. Using direct button scan.")
                 # Si fallan los headings, intentamos buscar TODOS los botones de descarga
-                return self._extract_links_direct_scan(page, providers_all)
-
-            self.log("EXTRACT", f"Found {len(relevant_headings)} relevant quality headings.")
-            original_url = page.url
-
-            # Eliminar duplicados de headings por texto para no procesar 2 veces lo mismo
-            unique_headings = []
-            seen_texts = set()
-            for h in relevant_headings:
-                txt = h.text_content().strip().lower()
-                if txt not in seen_texts:
-                    seen_texts.add(txt)
-                    unique_headings.append(h)
-            
-            # NUEVA ESTRATEGIA: Hunter de botones de descarga
-            self.log("EXTRACT", "Searching for all 'Descargar' buttons in page...")
-            
-            # Buscar todos los botones que digan Descargar/Download
-            all_buttons = page.query_selector_all("button, a")
-            download_candidates = []
-            
-            for btn in all_buttons:
-                try:
-                    if not btn.is_visible(): continue
-                    text = btn.inner_text().strip().upper()
-                    if "DESCARGAR" in text or "DOWNLOAD" in text or "VER ENLACES" in text:
-                        download_candidates.append(btn)
-                except: continue
-                
-            self.log("EXTRACT", f"Found {len(download_candidates)} potential download/expand buttons.")
-            
-            # Primero expandir todos los "VER ENLACES"
-            for btn in download_candidates:
-                try:
-                    btn_text = btn.inner_text().upper()
-                    if "VER ENLACES" not in btn_text: continue
-                    
-                    self.log("EXTRACT", f"Clicking expander: {btn_text[:20]}...")
-                    try:
-                        btn.click(timeout=3000)
-                    except Exception as e:
-                        if "intercepts pointer events" in str(e).lower():
-                            self.log("EXTRACT", "Expander intercepted. Clearing overlays...")
-                            page.evaluate("""() => {
-                                document.querySelectorAll('.fixed, .backdrop-blur-sm, [class*="overlay"]').forEach(el => el.remove());
-                            }""")
-                            btn.click(force=True)
-                        else:
-                            btn.click(force=True)
-                    page.wait_for_timeout(500)
-                except: continue
-            
-            # Ahora buscar los botones de descarga REALES (los que aparecen tras expandir)
-            self.log("EXTRACT", "Searching for provider-specific download buttons...")
-            page.wait_for_timeout(5000)
-            
-            body_text = page.inner_text("body")
-            sample_text = body_text[:200].replace("\n", " ")
-            self.log("DEBUG", f"Page body length: {len(body_text)}. Sample: {sample_text}")
-            if "MEGA" in body_text.upper() or "UTORRENT" in body_text.upper():
-                 self.log("DEBUG", "Provider keywords FOUND in body text!")
+                links = self._extract_links_direct_scan(page)
+                self._feed_candidates(page, matcher, links)
+                return links
+
+            self.log("EXTRACT", f"Found {len(headings)} relevant quality headings.")
+
+            links = []
+
+            def scan_and_feed() -> bool:
+                new = self._scan_candidates(page, "a, button, div, span, b, strong",
+                                            self.PROVIDER_KEYWORDS, leaf_only=True)
+                links.extend(new)
+                return self._feed_candidates(page, matcher, new)
+
+            # Expandir los "VER ENLACES" ofreciendo al matcher lo que va apareciendo
+            before = self._count_provider_buttons(page)
+            expanders = 0
+            if not scan_and_feed():
+                expanders = self._expand_link_sections(page, on_expanded=scan_and_feed)
+
+            if matcher.perfect:
+                self.log("RANK", f"Perfect match found: {matcher.best()[0]}. Skipping remaining sections.")
             else:
-                 self.log("WARNING", "Provider keywords NOT found in body text. Expansion might have failed.")
-            
-            # Buscar cualquier cosa que parezca clickeable
-            # Usar JS para encontrar elementos que contengan nombres de proveedores
-            potential_elements_data = page.evaluate("""() => {
-                const results = [];
-                const providers = ["MEGA", "MEDIAFIRE", "UTORRENT", "1FICHIER", "UPTOBOX", "UPSTREAM", "DRIVE", "GDRIVE", "MEDIA-FIRE", "DESCARGAR"];
-                document.querySelectorAll('a, button, div, span, b, strong').forEach(el => {
-                    const text = (el.innerText || "").trim().toUpperCase();
-                    if (text.length > 0 && text.length < 50) {
-                        const hasProvider = providers.some(p => text.includes(p));
-                        if (hasProvider) {
-                            // Solo queremos las "hojas" del DOM que tengan el texto
-                            if (el.children.length === 0 || (el.children.length === 1 && el.children[0].tagName === 'IMG')) {
-                                const rect = el.getBoundingClientRect();
-                                if (rect.width > 0 && rect.height > 0) {
-                                    results.push({
-                                        text: text,
-                                        tagName: el.tagName,
-                                        isLink: el.tagName === 'A',
-                                        href: el.tagName === 'A' ? el.href : null
-                                    });
-                                }
-                            }
-                        }
-                    }
-                });
-                return results;
-            }""")
-            
-            # Re-localizar los elementos en Python para poder clickarlos
-            for item in potential_elements_data:
-                try:
-                    text = item['text']
-                    if "VER ENLACES" in text: continue
-                    
-                    # Buscar el elemento real por texto
-                    selector = f"{item['tagName'].lower()}:has-text('{text}')"
-                    if item['tagName'] == 'A' and item['href']:
-                        el = page.query_selector(f"a[href='{item['href']}']")
-                    else:
-                        # Buscar por texto exacto es más seguro
-                        elements = page.query_selector_all(item['tagName'].lower())
-                        el = None
-                        for candidate in elements:
-                            if candidate.inner_text().strip().upper() == text:
-                                el = candidate
-                                break
-                    
-                    if not el or not el.is_visible(): continue
-                    
-                    provider = self._identify_provider(text, providers_all)
-                    
-                    # Identificar calidad
-                    quality = page.evaluate("""(el) => {
-                        let curr = el;
-                        for (let i = 0; i < 25; i++) {
-                            if (!curr) break;
-                            let text = curr.innerText || "";
-                            let q = text.match(/(1080p|720p|4k|dvdrip|bluray|web-dl|dvd-rip)/i);
-                            if (q) return q[0].toUpperCase();
-                            curr = curr.previousElementSibling || curr.parentElement;
-                        }
-                        return "Unknown";
-                    }""", el)
-
-                    links.append({
-                        "url": "btn_click",
-                        "quality": quality,
-                        "provider": provider,
-                        "handle": el,
-                        "name": f"{provider} ({quality})",
-                        "href": item.get('href')
-                    })
-                except: continue
+                # Ahora buscar los botones de descarga REALES (los que aparecen tras expandir)
+                self.log("EXTRACT", "Searching for provider-specific download buttons...")
+                if expanders and not self._wait_links_expanded(page, "expand_links", before):
+                    self.log("WARNING", "No new provider buttons after expanding. Expansion might have failed.")
+                scan_and_feed()
 
             if not links:
                 self.log("ERROR", "No download buttons identified after expansion.")
                 return []
 
             self.log("EXTRACT", f"Identified {len(links)} interactive download links.")
+            return links
 
-            unique_final_links = []
-            for link in links:
-                btn = link["handle"]
-                item_name = link.get("name", "Unknown Item")
-                
-                self.log("EXTRACT", f"Attempting to resolve {item_name}...")
-                current_url = page.url
-                
-                try:
-                    target_page = None
-                    # Intentar detectar si se abre en la misma pestaña o en una nueva
-                    try:
-                        with page.context.expect_page(timeout=5000) as new_page_info:
-                            btn.scroll_into_view_if_needed()
-                            # Click con clearing de overlays
-                            try:
-                                btn.click(timeout=3000)
-                            except:
-                                page.evaluate("() => document.querySelectorAll('.fixed, .backdrop-blur-sm').forEach(el => el.remove())")
-                                btn.click(force=True)
-                        
-                        target_page = new_page_info.value
-                        self.log("NAV", f"New tab detected: {target_page.url[:60]}")
-                    except:
-                        # No se abrió nueva pestaña. ¿Cambió la URL de la página actual?
-                        page.wait_for_timeout(2000)
-                        if page.url != current_url:
-                            self.log("NAV", f"Same tab navigation detected: {page.url[:60]}")
-                            target_page = page 
-                        else:
-                            # Intentar un segundo click (popunder bypass)
-                            self.log("DEBUG", "No navigation detected. Trying second click...")
-                            try:
-                                with page.context.expect_page(timeout=5000) as new_page_info2:
-                                    btn.click(force=True)
-                                target_page = new_page_info2.value
-                            except:
-                                if page.url != current_url:
-                                    target_page = page
-                    
-                    if not target_page:
-                        self.log("WARNING", f"Could not trigger navigation for {item_name}")
-                        continue
+        except Exception as e:
+            self.log("ERROR", f"Error in _extract_download_links: {e}")
+            return []
 
-                    # Procesar la página de destino (ya sea la nueva o la misma)
-                    # Si es la misma página, NO debemos cerrarla al final!
-                    is_new_tab = target_page != page
-                    
-                    try:
-                        target_page.wait_for_load_state("domcontentloaded", timeout=10000)
-                    except: pass
-                    
-                    final_url = target_page.url
-                    
-                    if self.shortener_resolver and self.shortener_resolver.is_shortener(final_url):
-                        self.log("NAV", f"    Resolving shortener for {item_name}...")
-                        resolved = self.shortener_resolver.resolve(final_url, target_page)
-                        if resolved:
-                            final_url = resolved
-                    
-                    if final_url and "hackstore.mx" not in final_url:
-                        unique_final_links.append({
-                            "url": final_url,
-                            "text": item_name,
-                            "quality": link["quality"],
-                            "provider": link["provider"]
-                        })
-                        self.log("SUCCESS", f"    Resolved: {final_url[:60]}")
-                    
-                    if is_new_tab:
-                        target_page.close()
-                    else:
-                        # Si navegamos en la misma pestaña, tenemos que volver atrás para el siguiente link
-                        page.goto(current_url, wait_until="domcontentloaded")
-                        # Re-expandir los botones (esto es lento pero seguro)
-                        page.evaluate("() => document.querySelectorAll('button').forEach(b => { if(b.innerText.includes('VER ENLACES')) b.click(); })")
-                        page.wait_for_timeout(1000)
+    def _follow_ranked(self, page: Page, matcher: StreamingLinkMatcher) -> Optional[LinkOption]:
+        """
+        Resuelve los candidatos de `matcher` en orden de ranking: abre en
+        paralelo los botones sin href del top-K y hace click solo en el
+        elegido; si no navega, pasa al siguiente.
 
+        Returns:
+            El primer LinkOption con URL final, o None si ninguno resolvio.
+        """
+        ranked = matcher.top()
+
+        # Log de los top 5
+        self.log("RANK", "Top 5 links:")
+        for i, (link, _) in enumerate(ranked[:5], 1):
+            self.log("RANK", f"  {i}. {link}")
+
+        # Los botones sin href del top-K se abren en paralelo para conocer
+        # su destino; el resto se resuelve con click secuencial si hace falta
+        # (con un match perfecto solo hace falta el primero)
+        top = ranked[:1] if matcher.perfect else ranked[:self.CAPTURE_TOP_K]
+        to_capture = [cand for _, cand in top if cand["url"] == "btn_click"]
+        if to_capture:
+            self._capture_candidates(page, to_capture)
+
+        for link, candidate in ranked:
+            if self.resolved_url():
+                # Otro componente ya vio el link final: no seguir clickeando
+                self.log("RESULT", "Final link already observed, stopping")
+                return self.resolved_option()
+            clicked = candidate["url"] == "btn_click"
+            try:
+                final_url = self._follow_candidate(page, candidate)
+            except Exception as e:
+                self.log("WARNING", f"    Failed to process {candidate['text']}: {e}")
+                final_url = None
+            # Una navegacion abortada en el route no cambia la pagina: el
+            # destino del click llega por el bus
+            final_url = final_url or self.resolved_url()
+            if clicked:
+                self._record_click_outcome(candidate, final_url)
+            if final_url:
+                link.url = final_url
+                return link
+        return None
+
+    def _rescan_expanded(self, page: Page, listing_url: str, exclude) -> StreamingLinkMatcher:
+        """
+        Recarga el listado, expande todas las secciones y ofrece a un matcher
+        nuevo los candidatos cuyo id no esta en `exclude`. Recargar deja el
+        listado sin expandir y sin marcas (los ids salen iguales).
+        """
+        page.goto(listing_url, wait_until="domcontentloaded")
+        self.tuned_wait(page, "listing_ready", 20000, self.LISTING_READY_JS)
+        before = self._count_provider_buttons(page)
+        if self._expand_link_sections(page, pause_ms=0) and not self._wait_links_expanded(
+                page, "expand_links", before):
+            self.log("WARNING", "No new provider buttons after expanding. Expansion might have failed.")
+        found = self._scan_candidates(page, "a, button, div, span, b, strong",
+                                      self.PROVIDER_KEYWORDS, leaf_only=True)
+        matcher = self.candidate_matcher()
+        self._feed_candidates(page, matcher, [cand for cand in found if cand["id"] not in exclude])
+        self.log("EXTRACT", f"Retrying with {matcher.seen} untried candidates")
+        return matcher
+
+    def _expand_link_sections(self, page: Page, on_expanded=None, pause_ms: int = 500) -> int:
+        """
+        Hace click en todos los botones "VER ENLACES". Los expansores se
+        localizan y marcan en la pagina; Python solo hace los clicks.
+
+        Args:
+            on_expanded: Callback tras cada expansion; si devuelve True se
+                         dejan de expandir las secciones restantes
+            pause_ms: Pausa tras cada click (0: clicks seguidos, quien llama
+                      espera despues a que aparezcan los botones)
+        """
+        count = page.evaluate("""() => {
+            let n = 0;
+            document.querySelectorAll('button, a').forEach(el => {
+                const rect = el.getBoundingClientRect();
+                if (rect.width > 0 && rect.height > 0 &&
+                    (el.innerText || '').toUpperCase().includes('VER ENLACES')) {
+                    el.setAttribute('data-neo-expander', String(n++));
+                }
+            });
+            return n;
+        }""")
+        self.log("EXTRACT", f"Found {count} expand buttons.")
+
+        for btn in page.query_selector_all("[data-neo-expander]"):
+            try:
+                self.log("EXTRACT", "Clicking expander...")
+                try:
+                    btn.click(timeout=3000)
                 except Exception as e:
-                    self.log("WARNING", f"    Failed to process {item_name}: {e}")
+                    if "intercepts pointer events" in str(e).lower():
+                        self.log("EXTRACT", "Expander intercepted. Clearing overlays...")
+                        page.evaluate("""() => {
+                            document.querySelectorAll('.fixed, .backdrop-blur-sm, [class*="overlay"]').forEach(el => el.remove());
+                        }""")
+                    btn.click(force=True)
+                if pause_ms:
+                    page.wait_for_timeout(pause_ms)
+            except: continue
+            if on_expanded and on_expanded():
+                break
+        return count
+
+    def _count_provider_buttons(self, page: Page) -> int:
+        return page.evaluate(self.PROVIDER_BUTTONS_JS, self.PROVIDER_KEYWORDS)
+
+    def _wait_links_expanded(self, page: Page, step: str, before: int) -> bool:
+        """Espera a que aparezcan botones de proveedor nuevos (mas que `before`)."""
+        return self.tuned_wait(page, step, 5000, self.LINKS_EXPANDED_JS,
+                               arg={"keywords": self.PROVIDER_KEYWORDS, "before": before})
+
+    def candidate_matcher(self) -> StreamingLinkMatcher:
+        """
+        Matcher para los candidatos de _scan_candidates: su texto es
+        "proveedor (calidad)", asi que el match perfecto se mide solo con eso.
+        """
+        return StreamingLinkMatcher(self.criteria, k=self.RANK_TOP_K, shows=self.CANDIDATE_SHOWS)
+
+    def _scan_candidates(self, page: Page, selector: str, keywords: List[str], leaf_only: bool) -> List[dict]:
+        """Ejecuta EXTRACT_CANDIDATES_JS y normaliza los candidatos nuevos."""
+        items = page.evaluate(self.EXTRACT_CANDIDATES_JS, {
+            "selector": selector,
+            "keywords": keywords,
+            "leafOnly": leaf_only,
+        })
+        links = []
+        for item in items:
+            href = item.get("href") or ""
+            external = href.startswith("http") and "hackstore.mx" not in href.lower()
+            quality = item["quality"] or "Unknown"
+            links.append({
+                "id": item["id"],
+                "label": item["text"],
+                "url": href if external else "btn_click",
+                "text": f"{item['provider']} ({quality})",
+                "provider": item["provider"],
+                "quality": item["quality"],
+                "href": item.get("href"),
+            })
+        return links
 
-            return unique_final_links
+    def _feed_candidates(self, page: Page, matcher: StreamingLinkMatcher, candidates: List[dict]) -> bool:
+        """
+        Ofrece candidatos nuevos al matcher. El proveedor inferido en la pagina
+        se usa cuando la URL no lo revela (ej: "btn_click") y, entre scores
+        iguales, gana el elemento que parece mas "real".
 
-        except Exception as e:
-            self.log("ERROR", f"Error in _extract_download_links: {e}")
-            return []
-     
-    def _extract_links_direct_scan(self, page: Page, providers: List[str]) -> List[dict]:
+        Returns:
+            True si ya hay un match perfecto.
         """
-        Escaneo directo de botones de descarga sin depender de headings.
+        self._attach_realness(page, candidates)
+        for cand in candidates:
+            matcher.add(cand["url"], cand["text"], provider=cand["provider"], payload=cand,
+                        tiebreak=cand.get("realness", 0.0))
+        return matcher.perfect
+
+    def _attach_realness(self, page: Page, candidates: List[dict]):
         """
-        self.log("EXTRACT", "Executing direct button scan fallback...")
-        links = []
+        Añade a cada candidato su fila de características y su realness score
+        (una sola evaluacion para todos).
+        """
+        if not self.dom_analyzer or not candidates:
+            return
         try:
-            # Buscar todos los botones o links que digan descargar
-            buttons = page.query_selector_all("button, a")
-            for btn in buttons:
-                try:
-                    text = btn.inner_text().upper()
-                    if "DESCARGAR" in text or "DOWNLOAD" in text:
-                        # Intentar encontrar calidad cerca (padre o abuelo)
-                        parent = page.evaluate_handle("el => el.closest('.flex-1') || el.parentElement.parentElement", btn)
-                        quality = "Unknown"
-                        if parent:
-                            p_text = parent.as_element().inner_text()
-                            for q in ["1080p", "720p", "4k", "dvdrip"]:
-                                if q in p_text.lower():
-                                    quality = q
-                                    break
-                        
-                        links.append({
-                            "url": "direct_scan", # Marcador
-                            "text": f"{quality} Download",
-                            "quality": quality,
-                            "provider": "unknown",
-                            "handle": btn
-                        })
-                except: continue
+            selectors = [f"[data-neo-id='{cand['id']}']" for cand in candidates]
+            rows, meta = self.dom_analyzer.extract_features_batch(page, selectors, key_attr="data-neo-id")
+            scores = self.dom_analyzer.score_matrix(rows, [m["visible"] for m in meta])
+            by_id = {m["key"]: (row, float(score)) for m, row, score in zip(meta, rows, scores)}
+            for cand in candidates:
+                if cand["id"] in by_id:
+                    cand["features"], cand["realness"] = by_id[cand["id"]]
         except Exception as e:
-            self.log("ERROR", f"Error in direct scan: {e}")
-        return links
+            self.log("WARNING", f"Realness scoring failed: {e}")
 
-    def _find_provider_buttons_after_heading(self, page: Page, heading_element) -> List:
+    def _record_click_outcome(self, candidate: dict, final_url: Optional[str]):
+        """
+        Registra en el dataset de DOMAnalyzer si el click en el candidato llevo
+        a una descarga o acortador (positivo) o a un ad / ninguna parte.
         """
-        Encuentra los botones de proveedor que aparecen después de hacer click en un heading.
+        if not self.dom_analyzer or not candidate.get("features") or candidate.get("recorded"):
+            return
+        useful = bool(final_url)
+        if useful and self.network_analyzer:
+            useful = (self.network_analyzer.is_download_url(final_url)
+                      or self.network_analyzer.is_shortener_url(final_url))
+        self.dom_analyzer.record_outcomes([candidate["features"]], [useful], site="hackstore.mx")
+        candidate["recorded"] = True
+
+    def _capture_candidates(self, page: Page, candidates: List[dict]):
         """
+        Abre cada candidato en su propia pestaña del mismo contexto (mismas
+        cookies) y hace click en todos. Las pestañas se preparan a la vez
+        (cada espera dura lo que la mas lenta) y los clicks van seguidos.
+        NavigationCapture registra el primer destino externo y aborta la
+        carga, asi que todos los destinos llegan en el tiempo del click mas
+        lento. Los candidatos capturados pasan a tener `url` = destino.
+        """
+        listing_url = page.url
+        ignore = self.network_analyzer.is_ad_url if self.network_analyzer else None
+        captures = []
         try:
-            # Buscar todos los botones/links dentro de la página
-            buttons = []
-            
-            # Use evaluate to get button elements safely
-            button_elements = page.query_selector_all("a[href], button, [role='button']")
-            
-            if button_elements:
-                buttons.extend(button_elements)
-            
-            # Filtrar botones relevantes (que contengan nombre de proveedor o texto de descarga)
-            relevant_buttons = []
-            for btn in buttons:
+            for cand in candidates:
+                tab = self.context.new_page()
+                if self.network_analyzer:
+                    # El destino de la pestaña (y de sus popups) lo registra
+                    # NavigationCapture: no debe ganar el bus, el elegido se
+                    # decide por ranking y no por orden de llegada
+                    self.network_analyzer.exclude_page(tab)
+                    tab.on("popup", self.network_analyzer.exclude_page)
+                    self.network_analyzer.setup_network_interception(tab, block_ads=True)
+                capture = NavigationCapture(tab, listing_url, ignore=ignore)
+                capture.attach(self.context)
+                # Solo commit: las cargas de todas las pestañas avanzan a la vez
+                tab.goto(listing_url, wait_until="commit", timeout=TIMEOUT_NAV)
+                captures.append((cand, capture))
+
+            self._prepare_tabs([capture.page for _, capture in captures])
+            for cand, capture in captures:
                 try:
-                    text = btn.inner_text().strip().lower()
-                    is_relevant_text = any(word in text for word in ["descargar", "download", "mega", "mediafire", "utorrent", "drive", "dropbox"])
-                    
-                    if not is_relevant_text:
-                        continue
-
-                    # INTEGRACION DOM ANALYZER
-                    if self.dom_analyzer:
-                        features = self.dom_analyzer.get_element_features(btn)
-                        if features:
-                            score = self.dom_analyzer.calculate_realness_score(features)
-                            if score < 0.4:  # Umbral para filtrar falsos
-                                self.log("DOM", f"Filtered weak button (score {score:.2f}): {text[:20]}")
-                                continue
-                            else:
-                                self.log("DOM", f"Kept strong button (score {score:.2f}): {text[:20]}")
-                    
-                    relevant_buttons.append(btn)
+                    self._click_in_tab(capture.page, cand)
                 except Exception as e:
-                    self.log("WARNING", f"Error analyzing button: {e}")
-                    continue
-            
-            return relevant_buttons if relevant_buttons else buttons
-        
+                    self.log("WARNING", f"    Capture click failed for {cand['text']}: {e}")
+
+            captured = wait_for_captures([c for _, c in captures], self.CAPTURE_TIMEOUT_MS, bus=self.bus)
+            self.log("EXTRACT", f"Captured {captured}/{len(captures)} click targets in parallel")
+            for cand, capture in captures:
+                self._record_click_outcome(cand, capture.target)
+                if capture.target:
+                    self.log("NAV", f"    {cand['text']} -> {capture.target[:60]} ({capture.source})")
+                    cand["url"] = capture.target
         except Exception as e:
-            self.log("ERROR", f"Error finding provider buttons: {e}")
-            return []
-    
-    def _identify_provider(self, text: str, providers_list: List[str]) -> str:
+            self.log("WARNING", f"Parallel capture failed: {e}")
+        finally:
+            for _, capture in captures:
+                capture.close()
+
+    def _prepare_tabs(self, tabs: List[Page]):
         """
-        Identifica el nombre del proveedor a partir del texto del botón.
+        Deja el listado de cada pestaña de captura expandido. Cada fase
+        (carga, expansion) espera a todas las pestañas a la vez; los clicks
+        de expansion van seguidos, sin pausa entre ellos.
         """
-        text_lower = text.lower()
-        
-        for provider in providers_list:
-            provider_lower = provider.lower()
-            if provider_lower in text_lower:
-                # Extraer el nombre base
-                short_name = provider.split('.')[0].lower()
-                return short_name
-        
-        # Fallback: si la palabra contiene "descargar", extrae el resto
-        if "descargar" in text_lower:
-            return text.replace("Descargar", "").replace("descargar", "").strip()
-        
-        return text
-    
-    def _capture_redirect_url(self, response, quality: str, provider: str, links: List[dict]):
+        # Pasos propios: las pestañas de captura no cargan como la principal
+        if not self.tuned_wait_all([(tab, None) for tab in tabs], "capture_ready", 20000,
+                                   self.LISTING_READY_JS):
+            self.log("WARNING", "Some capture tabs did not finish loading the listing")
+
+        expanded = []
+        for tab in tabs:
+            try:
+                before = self._count_provider_buttons(tab)
+                if self._expand_link_sections(tab, pause_ms=0):
+                    expanded.append((tab, {"keywords": self.PROVIDER_KEYWORDS, "before": before}))
+            except Exception as e:
+                self.log("WARNING", f"    Capture tab expansion failed: {e}")
+        if expanded:
+            self.tuned_wait_all(expanded, "capture_expand_links", 5000, self.LINKS_EXPANDED_JS)
+
+    def _click_in_tab(self, tab: Page, candidate: dict):
         """
-        Callback para capturar URLs de redirección.
+        Re-escanea el listado (ya preparado) de una pestaña de captura y hace
+        click en el elemento equivalente al candidato sin esperar a la
+        navegacion.
         """
+        self._scan_candidates(tab, "a, button, div, span, b, strong",
+                              self.PROVIDER_KEYWORDS, leaf_only=True)
+        # Mismo listado => mismo data-neo-id (texto + ordinal)
+        btn = tab.query_selector(f"[data-neo-id='{candidate['id']}']")
+        if not btn:
+            raise RuntimeError("candidate not found in capture tab")
+
         try:
-            if response.status == 302 or response.status == 301:
-                redirect_url = response.headers.get("location")
-                if redirect_url and "hackstore.mx" not in redirect_url.lower():
-                    links.append({
-                        "url": redirect_url,
-                        "text": f"{quality} - {provider}"
-                    })
-                    self.log("EXTRACT", f"Captured redirect: {redirect_url[:80]}")
-        except:
-            pass
-    
-    def _extract_links_fallback(self, html_content: str, providers: List[str]) -> List[dict]:
+            btn.click(timeout=3000, no_wait_after=True)
+        except Exception:
+            tab.evaluate("() => document.querySelectorAll('.fixed, .backdrop-blur-sm').forEach(el => el.remove())")
+            btn.click(force=True, no_wait_after=True)
+
+    def _follow_candidate(self, page: Page, candidate: dict) -> Optional[str]:
         """
-        Fallback: extrae links basándose en búsqueda directa en el DOM.
-        Busca cualquier link que parezca ser un acortador o link de descarga.
+        Obtiene la URL final de un candidato. Si tiene href externo (o destino
+        ya capturado en paralelo) se usa directamente; si no, se hace click en
+        su elemento (data-neo-id) y se sigue la pestaña nueva o la navegacion
+        en la misma pestaña.
+
+        Returns:
+            URL fuera de hackstore, o None si no hubo navegacion util.
         """
-        candidates = []
-        
+        if candidate["url"] != "btn_click":
+            return candidate["url"]
+
+        item_name = candidate["text"]
+        btn = page.query_selector(f"[data-neo-id='{candidate['id']}']")
+        if not btn:
+            self.log("WARNING", f"Element for {item_name} is gone")
+            return None
+
+        self.log("EXTRACT", f"Attempting to resolve {item_name}...")
+        current_url = page.url
+        target_page = None
+        # Intentar detectar si se abre en la misma pestaña o en una nueva
         try:
-            # Intentar expandir todo antes de buscar
-            self.log("EXTRACT", "Attempting to expand all 'Ver Enlaces' buttons...")
-            expand_selectors = [
-                "button:has-text('VER ENLACES')", 
-                "button:has-text('Ver Enlaces')",
-                ".btn-enlaces",
-                "#ver-enlaces"
-            ]
-            
-            for selector in expand_selectors:
+            with page.context.expect_page(timeout=5000) as new_page_info:
+                btn.scroll_into_view_if_needed()
+                # Click con clearing de overlays
                 try:
-                    buttons = self.page.query_selector_all(selector)
-                    for btn in buttons:
-                        if btn.is_visible():
-                            btn.click()
-                            random_delay(0.5, 1.0)
+                    btn.click(timeout=3000)
                 except:
-                    continue
-
-            # Buscar todos los links en la página
-            self.log("EXTRACT", "Searching DOM for potential download/shortener links...")
-            links_data = self.page.evaluate("""() => {
-                return Array.from(document.querySelectorAll('a[href]')).map(a => ({
-                    text: a.innerText.trim(),
-                    href: a.href,
-                    parentText: a.parentElement ? a.parentElement.innerText.trim() : ""
-                }));
-            }""")
-            
-            for link in links_data:
-                url = link['href']
-                text = link['text'].lower()
-                parent_text = link['parentText'].lower()
-                
-                # Clasificar link
-                is_valid = False
-                source = "DOM Search"
-                
-                # Heurística: Dominio de descarga directa o acortador conocido
-                if self.network_analyzer:
-                    if self.network_analyzer.is_download_url(url) or self.network_analyzer.is_shortener_url(url):
-                        is_valid = True
-                
-                # Heurística: Patrones de URL de Hackstore para links
-                if "/links/" in url or "/link/" in url or "acortame.site" in url:
-                    is_valid = True
-                
-                if is_valid:
-                    # Intentar inferir calidad del texto circundante
-                    quality = "1080p" # Default
-                    for q in ["2160p", "4k", "1080p", "720p", "480p", "web-dl", "bluray"]:
-                        if q in text or q in parent_text or q in url.lower():
-                            quality = q
-                            break
-                    
-                    # Intentar inferir proveedor
-                    provider = "other"
-                    for p in providers:
-                        p_clean = p.replace(".com", "").replace(".nz", "").lower()
-                        if p_clean in url.lower() or p_clean in text or p_clean in parent_text:
-                            provider = p
-                            break
-                    
-                    candidates.append({
-                        'url': url,
-                        'quality': quality,
-                        'provider': provider,
-                        'format': "WEB-DL",
-                        'score': 50 # Score base medio
-                    })
-            
-            self.log("EXTRACT", f"Fallback found {len(candidates)} potential links")
-        
+                    page.evaluate("() => document.querySelectorAll('.fixed, .backdrop-blur-sm').forEach(el => el.remove())")
+                    btn.click(force=True)
+
+            target_page = new_page_info.value
+            self.log("NAV", f"New tab detected: {target_page.url[:60]}")
+        except:
+            # No se abrió nueva pestaña. ¿Cambió la URL de la página actual?
+            if self.bus:
+                self.bus.sleep(page, 2000)
+            else:
+                page.wait_for_timeout(2000)
+            if self.resolved_url():
+                # La navegacion a un host de descarga se aborto en el route:
+                # page.url no cambia pero la URL llego por el bus
+                self.log("SUCCESS", f"    Resolved (aborted navigation): {self.resolved_url()[:60]}")
+                return self.resolved_url()
+            if page.url != current_url:
+                self.log("NAV", f"Same tab navigation detected: {page.url[:60]}")
+                target_page = page
+            else:
+                # Intentar un segundo click (popunder bypass)
+                self.log("DEBUG", "No navigation detected. Trying second click...")
+                try:
+                    with page.context.expect_page(timeout=5000) as new_page_info2:
+                        btn.click(force=True)
+                    target_page = new_page_info2.value
+                except:
+                    if page.url != current_url:
+                        target_page = page
+
+        if not target_page:
+            if self.resolved_url():
+                return self.resolved_url()
+            self.log("WARNING", f"Could not trigger navigation for {item_name}")
+            return None
+
+        # Si es la misma página, NO debemos cerrarla al final!
+        is_new_tab = target_page != page
+        try:
+            try:
+                target_page.wait_for_load_state("domcontentloaded", timeout=10000)
+            except: pass
+
+            final_url = target_page.url
+            if self.bus and not final_url.startswith("http"):
+                # La navegacion a un host de descarga se aborta en el route
+                # (la pestaña queda en about:blank): la URL llega por el bus
+                self.bus.sleep(target_page, 2000)
+            final_url = self.resolved_url() or final_url
+            if self.shortener_resolver and self._is_shortener(final_url):
+                self.log("NAV", f"    Resolving shortener for {item_name}...")
+                resolved = self.shortener_resolver.resolve(final_url, target_page)
+                if resolved:
+                    final_url = resolved
+        finally:
+            if is_new_tab:
+                target_page.close()
+
+        if final_url and final_url.startswith("http") and "hackstore.mx" not in final_url:
+            self.log("SUCCESS", f"    Resolved: {final_url[:60]}")
+            return final_url
+
+        if not is_new_tab:
+            # Volver al listado para poder probar el siguiente candidato
+            # (los data-neo-id se recalculan iguales: texto + ordinal)
+            page.goto(current_url, wait_until="domcontentloaded")
+            before = self._count_provider_buttons(page)
+            if self._expand_link_sections(page, pause_ms=0):
+                self._wait_links_expanded(page, "expand_links", before)
+            self._scan_candidates(page, "a, button, div, span, b, strong",
+                                  self.PROVIDER_KEYWORDS, leaf_only=True)
+        return None
+
+    def _extract_links_direct_scan(self, page: Page) -> List[dict]:
+        """
+        Escaneo directo de botones de descarga sin depender de headings.
+        """
+        self.log("EXTRACT", "Executing direct button scan fallback...")
+        try:
+            # Buscar todos los botones o links que digan descargar
+            return self._scan_candidates(page, "button, a", ["DESCARGAR", "DOWNLOAD"], leaf_only=False)
         except Exception as e:
-            self.log("ERROR", f"Error in fallback extraction: {e}")
-        
-        return candidates
+            self.log("ERROR", f"Error in direct scan: {e}")
+            return []
 
     def _is_shortener(self, url: str) -> bool:
         """Retorna True si la URL es un acortador de enlaces."""
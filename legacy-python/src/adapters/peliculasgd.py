@@ -4,7 +4,6 @@ Implementa el flujo completo de 7 pasos documentado en PLAN.md
 """
 
 import re
-import time
 from typing import List, Dict, Optional
 from playwright.sync_api import Page
 from .base import SiteAdapter
@@ -12,6 +11,8 @@ from matcher import LinkOption
 from config import TIMEOUT_NAV, TIMEOUT_ELEMENT, AD_WAIT_SECONDS
 from human_sim import random_delay, simulate_human_behavior, human_mouse_move
 from url_parser import extract_metadata_from_url
+from completion_waiter import CompletionWaiter
+from navigation_capture import NavigationCapture, wait_for_captures
 
 
 class PeliculasGDAdapter(SiteAdapter):
@@ -20,6 +21,10 @@ class PeliculasGDAdapter(SiteAdapter):
     Usa el contexto persistente y cookies para resolver el link directamente.
     """
 
+    COMPLETION_TIMEOUT_S = 60  # Deadline duro tras saltar al acortador
+    REVEAL_TIMEOUT_MS = 10000  # Espera del destino tras el click en el botón
+    REDIRECT_HINTS = ("r.php", "l.php", "acortame", "neworld")
+
     def can_handle(self, url: str) -> bool:
         return "peliculasgd.net" in url.lower() or "peliculasgd.co" in url.lower()
 
@@ -32,25 +37,26 @@ class PeliculasGDAdapter(SiteAdapter):
         """
         page = self.context.new_page()
 
-        # Configurar interceptación para capturar links de descarga en el tráfico
-        detected_links = []
-        def handle_request(request):
-            r_url = request.url
-            if any(p in r_url for p in ["drive.google.com", "mega.nz", "mediafire.com", "1fichier.com"]):
-                if "/view" in r_url or "/file" in r_url or "mega.nz/file" in r_url:
-                    detected_links.append(r_url)
-
-        page.on("request", handle_request)
+        # Señales de completitud: link de descarga en el tráfico, navegación a un
+        # dominio de descarga o aparición del botón final
+        waiter = CompletionWaiter(
+            page,
+            is_final_url=self._is_final_link,
+            is_download_url=self.network_analyzer.is_download_url if self.network_analyzer else None,
+            log=self.log,
+            bus=self.bus,
+        )
+        waiter.attach()
 
         try:
             self.log("INIT", f"Accediendo a: {url}")
             page.goto(url, wait_until="domcontentloaded", timeout=TIMEOUT_NAV)
             
-            # PEQUEÑA ESPERA PARA CAPTURAR TRÁFICO INICIAL
-            time.sleep(2)
-            if detected_links:
+            # PEQUEÑA ESPERA PARA CAPTURAR TRÁFICO INICIAL (termina antes si hay señal)
+            final_link = waiter.wait(timeout_s=2)
+            if final_link:
                 self.log("SUCCESS", "Enlace detectado inmediatamente en el tráfico")
-                return self._create_result(detected_links[0], url)
+                return self._create_result(final_link, url)
 
             # Extraer cookies de la sesión actual
             cookies = self.context.cookies()
@@ -97,36 +103,12 @@ class PeliculasGDAdapter(SiteAdapter):
 
                 if btn:
                     href = btn.get_attribute("href")
-                    if href and ("r.php" in href or "acortame" in href or "neworld" in href):
+                    if href and self._is_redirect_link(href):
                         redir_url = href
                     else:
                         # Si no tiene href directo o es javascript:void(0), hay que hacer clic
                         self.log("NAV", "Haciendo clic para revelar acortador...")
-                        try:
-                            # Configurar detección de nueva página (popup)
-                            with self.context.expect_page(timeout=10000) as new_page_info:
-                                btn.click()
-                            new_p = new_page_info.value
-                            
-                            # Esperar a que la URL del popup se estabilice (no sea about:blank o la home)
-                            start_wait = time.time()
-                            while time.time() - start_wait < 5:
-                                current_p_url = new_p.url
-                                if "r.php" in current_p_url or "acortame" in current_p_url or "neworld" in current_p_url:
-                                    redir_url = current_p_url
-                                    break
-                                time.sleep(1)
-                            
-                            if not redir_url:
-                                redir_url = new_p.url
-                                
-                            new_p.close()
-                        except Exception as e:
-                            self.log("WARNING", f"Error al clickear/capturar popup: {e}")
-                            # Fallback: ver si el link apareció en la página actual
-                            new_url = page.url
-                            if new_url != url:
-                                redir_url = new_url
+                        redir_url = self._reveal_redirect(page, btn, url)
 
             if not redir_url:
                 # Ultimo recurso: buscar cualquier link que no sea ad en la zona de descarga
@@ -141,6 +123,10 @@ class PeliculasGDAdapter(SiteAdapter):
             if not redir_url:
                 raise Exception("No se pudo extraer la URL de redirección (acortador)")
 
+            if self.resolved_url():
+                self.log("SUCCESS", "Enlace final ya observado en el tráfico")
+                return self._create_result(self.resolved_url(), url)
+
             # NAVEGACIÓN DIRECTA AL ACORTADOR CON REFERER
             self.log("NAV", f"Saltando al acortador: {redir_url[:60]}...")
             
@@ -150,44 +136,66 @@ class PeliculasGDAdapter(SiteAdapter):
                 if final_link:
                     return self._create_result(final_link, url)
 
-            # Fallback si no hay resolver de acortadores o falló
+            # Fallback si no hay resolver de acortadores o falló.
+            # Timers y observer del botón final se inyectan UNA vez (init scripts)
+            waiter.watch_final_button()
+            if self.timer_interceptor:
+                self.timer_interceptor.accelerate_timers(page)
+                self.timer_interceptor.install_peliculasgd_timer_skip(page)
+
             page.goto(redir_url, referer=url, timeout=TIMEOUT_NAV)
             
-            # Esperar a que el link aparezca en el tráfico o en la página
-            start_wait = time.time()
-            while time.time() - start_wait < 60:
-                if detected_links:
-                    return self._create_result(detected_links[0], url)
-                
-                # Buscar botones de "Obtener Link" o "Ingresa"
-                for btn_text in ["Ingresar", "Ingresa", "Link", "Vínculo", "Continuar", "Enlace"]:
-                    target = page.query_selector(f"a:has-text('{btn_text}'), button:has-text('{btn_text}')")
-                    if target and target.is_visible():
-                        opacity = target.evaluate("el => getComputedStyle(el).opacity")
-                        if float(opacity) > 0.5:
-                            self.log("NAV", f"Botón final detectado: {btn_text}. Clickeando...")
-                            target.click()
-                            time.sleep(3)
-                            break
-                
-                # Acelerar timers si es posible
-                if self.timer_interceptor:
-                    self.timer_interceptor.accelerate_timers(page)
-                    if "neworldtravel" in page.url or "acortame" in page.url:
-                        self.timer_interceptor.skip_peliculasgd_timer(page)
-                
-                time.sleep(2)
+            # Esperar a la primera señal de completitud (con deadline duro)
+            final_link = waiter.wait(timeout_s=self.COMPLETION_TIMEOUT_S)
+            if final_link:
+                self.log("SUCCESS", f"Enlace final detectado ({waiter.source})")
+                return self._create_result(final_link, url)
 
             raise Exception("No se pudo obtener el link final tras la redirección")
 
         except Exception as e:
             self.log("ERROR", f"Fallo en resolución: {e}")
-            page.screenshot(path="logs/peliculasgd_error.png")
+            self.screenshot(page, "peliculasgd_error", "Fallo en resolucion", error=True)
             raise e
         finally:
+            waiter.detach()
             if not page.is_closed():
                 page.close()
 
+    def _is_redirect_link(self, url: str) -> bool:
+        """True si la URL es el acortador/redireccion que revela el botón de descarga."""
+        return any(h in url for h in self.REDIRECT_HINTS)
+
+    def _reveal_redirect(self, page: Page, btn, url: str) -> Optional[str]:
+        """
+        Hace click en el botón y captura el destino (popup o misma pestaña) en el
+        route: la URL se toma de la request y la navegación se aborta antes de
+        renderizar, sin cargar el popup ni consultar su URL.
+        """
+        capture = NavigationCapture(page, url, ignore=lambda u: not self._is_redirect_link(u))
+        capture.attach(self.context)
+        try:
+            btn.click(no_wait_after=True)
+            wait_for_captures([capture], self.REVEAL_TIMEOUT_MS, bus=self.bus)
+            if capture.target:
+                self.log("NAV", f"Destino capturado ({capture.source}): {capture.target[:60]}")
+                return capture.target
+        except Exception as e:
+            self.log("WARNING", f"Error al clickear/capturar destino: {e}")
+        finally:
+            capture.detach()
+
+        # Fallback: ver si el link apareció en la página actual
+        if page.url != url:
+            return page.url
+        return None
+
+    def _is_final_link(self, url: str) -> bool:
+        """True si la URL es un link final de descarga (no recursos estáticos del host)."""
+        if not any(p in url for p in ["drive.google.com", "mega.nz", "mediafire.com", "1fichier.com"]):
+            return False
+        return "/view" in url or "/file" in url or "mega.nz/file" in url
+
     def _create_result(self, final_url: str, original_url: str) -> LinkOption:
         meta = extract_metadata_from_url(original_url)
         provider = "Drive" if "drive.google" in final_url else "Mega" if "mega.nz" in final_url else "1Fichier" if "1fichier" in final_url else "MediaFire"
@@ -200,6 +208,4 @@ class PeliculasGDAdapter(SiteAdapter):
             format=meta.get('format', "")
         )
 
-    def log(self, step: str, msg: str):
-        print(f"  [PeliculasGD:{step}] {msg}")
 
@@ -0,0 +1,154 @@
+"""
+bench_history.py - Microbenchmark del acceso SQLite del historial.
+
+Mide inserts/s (directos y via HistoryWriter) y lecturas/s de HistoryManager
+sobre HistoryStore (WAL, conexiones por hilo) y, como referencia, el patron
+anterior de abrir una conexion por operacion. Tambien mide lecturas
+concurrentes mientras otros hilos escriben (con WAL no deberia haber
+"database is locked").
+
+Usage:
+    python bench_history.py [--rows N] [--reads N] [--readers N] [--writers N]
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from history_manager import HistoryManager
+from history_store import register_functions
+
+
+def _rate(count: int, elapsed: float) -> float:
+    return count / elapsed if elapsed > 0 else float("inf")
+
+
+def bench_inserts(manager: HistoryManager, rows: int) -> float:
+    start = time.perf_counter()
+    for i in range(rows):
+        manager.add_record(f"https://hackstore.mx/peliculas/bench-{i}", f"https://mega.nz/file/{i}",
+                           "1080p", "WEB-DL", "mega", 90.0)
+    return _rate(rows, time.perf_counter() - start)
+
+
+def bench_async_inserts(manager: HistoryManager, rows: int) -> tuple:
+    """Inserts via HistoryWriter: (encolados/s vistos por el productor, escritos/s hasta flush)."""
+    start = time.perf_counter()
+    for i in range(rows):
+        manager.add_record_async(f"https://hackstore.mx/peliculas/async-{i}", f"https://mega.nz/file/{i}",
+                                 "1080p", "WEB-DL", "mega", 90.0)
+    submitted = time.perf_counter() - start
+    manager.flush_pending()
+    return _rate(rows, submitted), _rate(rows, time.perf_counter() - start)
+
+
+def bench_point_reads(manager: HistoryManager, reads: int, max_id: int) -> float:
+    sql = "SELECT * FROM resolution_history WHERE id = ?"
+    start = time.perf_counter()
+    for i in range(reads):
+        manager.store.query_one(sql, (i % max_id + 1,))
+    return _rate(reads, time.perf_counter() - start)
+
+
+def bench_legacy(db_path: Path, rows: int, reads: int) -> tuple:
+    """Patron anterior: sqlite3.connect + commit + close por operacion."""
+    start = time.perf_counter()
+    for i in range(rows):
+        with sqlite3.connect(db_path) as conn:
+            register_functions(conn)  # El INSERT sobre la vista interna las URLs con url_fingerprint()
+            conn.execute("""
+                INSERT INTO resolution_history
+                (original_url, resolved_url, quality, format_type, provider, score, timestamp, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (f"https://hackstore.mx/peliculas/legacy-{i}", "https://mega.nz/file/x",
+                  "1080p", "WEB-DL", "mega", 90.0, f"legacy-{i}", ""))
+            conn.commit()
+        conn.close()
+    inserts = _rate(rows, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(reads):
+        conn = sqlite3.connect(db_path)
+        conn.execute("SELECT * FROM resolution_history WHERE id = ?", (i % rows + 1,)).fetchone()
+        conn.close()
+    return inserts, _rate(reads, time.perf_counter() - start)
+
+
+def bench_concurrent(manager: HistoryManager, readers: int, writers: int, seconds: float) -> dict:
+    """Lectores y escritores a la vez durante `seconds`."""
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def reader():
+        n = 0
+        while not stop.is_set():
+            try:
+                manager.store.query("SELECT * FROM resolution_history ORDER BY id DESC LIMIT 50")
+                n += 1
+            except sqlite3.Error:
+                with lock:
+                    counts["errors"] += 1
+        manager.store.close()
+        with lock:
+            counts["reads"] += n
+
+    def writer(w):
+        n = 0
+        while not stop.is_set():
+            if manager.add_record(f"https://hackstore.mx/peliculas/w{w}-{n}", "https://mega.nz/file/x") is None:
+                with lock:
+                    counts["errors"] += 1
+            n += 1
+        manager.store.close()
+        with lock:
+            counts["writes"] += n
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return {
+        "reads_per_s": _rate(counts["reads"], seconds),
+        "writes_per_s": _rate(counts["writes"], seconds),
+        "errors": counts["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the history SQLite layer")
+    parser.add_argument("--rows", type=int, default=2000, help="Rows to insert. Default: 2000")
+    parser.add_argument("--reads", type=int, default=20000, help="Point reads. Default: 20000")
+    parser.add_argument("--readers", type=int, default=4, help="Concurrent reader threads. Default: 4")
+    parser.add_argument("--writers", type=int, default=2, help="Concurrent writer threads. Default: 2")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Concurrent phase duration. Default: 3")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = HistoryManager(db_path=tmp)
+        inserts = bench_inserts(manager, args.rows)
+        async_submit, async_written = bench_async_inserts(manager, args.rows)
+        reads = bench_point_reads(manager, args.reads, args.rows)
+        legacy_inserts, legacy_reads = bench_legacy(manager.db_path, args.rows, args.reads)
+        concurrent = bench_concurrent(manager, args.readers, args.writers, args.seconds)
+        manager.writer.close()
+        manager.store.close_all()
+
+    print(f"{'':24s} {'store':>12s} {'legacy':>12s}")
+    print(f"{'inserts/s':24s} {inserts:12.0f} {legacy_inserts:12.0f}")
+    print(f"{'async inserts/s':24s} {async_written:12.0f}  (producer: {async_submit:.0f}/s)")
+    print(f"{'point reads/s':24s} {reads:12.0f} {legacy_reads:12.0f}")
+    print(f"Concurrent ({args.readers} readers, {args.writers} writers, {args.seconds:.0f}s): "
+          f"{concurrent['reads_per_s']:.0f} reads/s, {concurrent['writes_per_s']:.0f} writes/s, "
+          f"{concurrent['errors']} errors")
+
+
+if __name__ == "__main__":
+    main()
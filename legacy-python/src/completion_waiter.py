@@ -0,0 +1,217 @@
+"""
+completion_waiter.py - Espera dirigida por señales para el ultimo tramo de una resolucion.
+En lugar de re-consultar botones cada 2s, escucha tres señales de completitud:
+captura de red de un link de descarga, navegacion a un dominio de descarga y
+aparicion del boton final (detectado en la pagina por un MutationObserver).
+La primera señal que llega termina la espera; siempre hay un deadline duro.
+Con un ResolutionBus las señales propias se publican y las de otros
+componentes tambien terminan la espera.
+"""
+
+import json
+import time
+from typing import Callable, List, Optional
+from playwright.sync_api import Page, Request, Frame
+
+
+class CompletionWaiter:
+    """
+    Espera a que una pagina llegue al link final sin polling del DOM.
+
+    Uso tipico:
+        waiter = CompletionWaiter(page, is_final_url=adapter._is_final_link)
+        waiter.attach()
+        page.goto(...)
+        waiter.watch_final_button()
+        final_url = waiter.wait(timeout_s=60)
+    """
+
+    FINAL_BUTTON_TEXTS = ["Ingresar", "Ingresa", "Link", "Vínculo", "Continuar", "Enlace"]
+    BINDING_NAME = "__neoCompletionSignal"
+    TICK_MS = 250  # Solo bombea eventos de Playwright; no consulta la pagina
+
+    def __init__(
+        self,
+        page: Page,
+        is_final_url: Callable[[str], bool],
+        is_download_url: Optional[Callable[[str], bool]] = None,
+        log: Optional[Callable[[str, str], None]] = None,
+        button_texts: Optional[List[str]] = None,
+        bus=None,
+    ):
+        self.page = page
+        self.is_final_url = is_final_url
+        self.is_download_url = is_download_url or is_final_url
+        self.log = log or (lambda step, msg: None)
+        self.button_texts = button_texts or self.FINAL_BUTTON_TEXTS
+        self.bus = bus
+        self.result: Optional[str] = None
+        self.source: Optional[str] = None
+        self.pending_button: Optional[str] = None
+        self._attached = False
+        self._watching_buttons = False
+
+    # ------------------------------------------------------------------
+    # Registro de señales
+    # ------------------------------------------------------------------
+    def attach(self):
+        """Registra los listeners de red y navegacion."""
+        if self._attached:
+            return
+        self.page.on("request", self._on_request)
+        self.page.on("framenavigated", self._on_navigation)
+        self._attached = True
+
+    def detach(self):
+        """Quita los listeners (el observer en pagina muere con la pagina)."""
+        if not self._attached:
+            return
+        try:
+            self.page.remove_listener("request", self._on_request)
+            self.page.remove_listener("framenavigated", self._on_navigation)
+        except Exception:
+            pass
+        self._attached = False
+
+    def watch_final_button(self):
+        """
+        Inyecta UNA vez el observer del boton final. Queda como init script,
+        asi que se re-instala solo en cada navegacion posterior de la pagina.
+        """
+        if self._watching_buttons:
+            return
+        script = self._observer_script()
+        try:
+            self.page.expose_binding(self.BINDING_NAME, self._on_button_signal)
+            self.page.add_init_script(script)
+        except Exception as e:
+            self.log("WARNING", f"No se pudo instalar el observer del boton final: {e}")
+            return
+        try:
+            # Pagina actual (si ya hay documento cargado)
+            self.page.evaluate(script)
+        except Exception:
+            pass
+        self._watching_buttons = True
+
+    def _set_result(self, url: str, source: str):
+        if self.result is None:
+            self.result = url
+            self.source = source
+            if self.bus:
+                self.bus.publish(url, f"completion: {source}")
+
+    def _on_request(self, request: Request):
+        if self.is_final_url(request.url):
+            self._set_result(request.url, "network")
+
+    def _on_navigation(self, frame: Frame):
+        try:
+            if frame != self.page.main_frame:
+                return
+        except Exception:
+            return
+        if self.is_download_url(frame.url):
+            self._set_result(frame.url, "navigation")
+
+    def _on_button_signal(self, source, text: str):
+        self.pending_button = text
+
+    # ------------------------------------------------------------------
+    # Espera
+    # ------------------------------------------------------------------
+    def wait(self, timeout_s: float) -> Optional[str]:
+        """
+        Espera hasta que llegue una señal de link final o venza el deadline.
+        Si la señal es el boton final, lo clickea y sigue esperando.
+
+        Returns:
+            URL final detectada, o None si vencio el deadline.
+        """
+        deadline = time.monotonic() + timeout_s
+        while self.result is None:
+            if self.bus and self.bus.done:
+                # Otro componente llego primero
+                self.result = self.bus.result
+                self.source = self.bus.source
+                break
+            if self.pending_button:
+                self._click_pending_button()
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            try:
+                if self.page.is_closed():
+                    break
+                self.page.wait_for_timeout(min(self.TICK_MS, remaining_ms))
+            except Exception:
+                break
+        return self.result
+
+    def _click_pending_button(self):
+        text = self.pending_button
+        self.pending_button = None
+        try:
+            target = self.page.query_selector("[data-neo-final='pending']")
+            if not target:
+                return
+            self.log("NAV", f"Botón final detectado: {text}. Clickeando...")
+            target.evaluate("el => { el.dataset.neoFinal = 'clicked'; }")
+            target.click(timeout=3000)
+        except Exception as e:
+            self.log("WARNING", f"Error clickeando el botón final: {e}")
+
+    def _observer_script(self) -> str:
+        texts = json.dumps([t.lower() for t in self.button_texts], ensure_ascii=False)
+        return f"""
+        (() => {{
+            if (window.__neoCompletionObserver) return;
+            window.__neoCompletionObserver = true;
+            const texts = {texts};
+            const binding = '{self.BINDING_NAME}';
+
+            const isReady = (el) => {{
+                const rect = el.getBoundingClientRect();
+                if (!rect.width || !rect.height) return false;
+                const style = getComputedStyle(el);
+                return style.display !== 'none' && style.visibility !== 'hidden'
+                    && parseFloat(style.opacity) > 0.5;
+            }};
+
+            const scan = () => {{
+                if (!document.body || document.querySelector("[data-neo-final='pending']")) return;
+                const candidates = Array.from(document.querySelectorAll('a, button'))
+                    .filter(el => !el.dataset.neoFinal);
+                for (const t of texts) {{
+                    const el = candidates.find(c => (c.innerText || '').toLowerCase().includes(t) && isReady(c));
+                    if (el) {{
+                        el.dataset.neoFinal = 'pending';
+                        if (typeof window[binding] === 'function') window[binding](t);
+                        return;
+                    }}
+                }}
+            }};
+
+            let scheduled = false;
+            const schedule = () => {{
+                if (scheduled) return;
+                scheduled = true;
+                requestAnimationFrame(() => {{ scheduled = false; scan(); }});
+            }};
+
+            const start = () => {{
+                new MutationObserver(schedule).observe(document.documentElement, {{
+                    childList: true, subtree: true, attributes: true,
+                    attributeFilter: ['style', 'class', 'disabled', 'hidden']
+                }});
+                // Transiciones de opacidad por CSS no generan mutaciones
+                setInterval(scan, 1000);
+                scan();
+            }};
+            if (document.readyState === 'loading') {{
+                document.addEventListener('DOMContentLoaded', start);
+            }} else {{
+                start();
+            }}
+        }})();
+        """
@@ -102,3 +102,11 @@ class SearchCriteria:
 TIMEOUT_NAV = 60_000       # 60s para navegaciones
 TIMEOUT_ELEMENT = 15_000   # 15s para esperar elementos
 AD_WAIT_SECONDS = 45       # Espera despues de click en anuncio
+
+# Sitios que no necesitan simulacion humana: en modo batch se omite por completo.
+# Solo tiene efecto en los adaptadores que la ejecutan (SiteAdapter.sim_profile).
+# En hackstore el render reactivo lo despierta igual el scroll del primer
+# sondeo de la espera de calidades.
+HUMAN_SIM_NOT_REQUIRED = [
+    "hackstore.mx",
+]
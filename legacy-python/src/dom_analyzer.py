@@ -1,19 +1,184 @@
 """
 dom_analyzer.py - Heurísticas de botones reales vs falsos basadas en el DOM.
+
+Las características de todos los candidatos se extraen en una sola evaluación
+en la página (una fila numérica por elemento) y se puntúan de forma vectorizada
+con NumPy: puntuar miles de elementos cuesta un round trip y microsegundos de
+cálculo. Sin NumPy se usa el mismo modelo en Python puro.
+
+Las filas de características y el resultado de cada click (descarga/acortador
+vs ad o nada) se registran en data/realness_dataset.jsonl; realness_trainer.py
+entrena con ellas una regresión logística cuyos pesos (data/realness_weights.json)
+se cargan al iniciar en lugar del modelo ajustado a mano.
 """
 
-from typing import List, Dict, Optional
+import json
+import math
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Sequence, Tuple
 from playwright.sync_api import Page, ElementHandle
 from logger import get_logger
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# Columnas de la matriz de características (indicadores 0/1)
+FEATURE_NAMES = [
+    "area_huge",        # Banners gigantes (> ~400x300)
+    "area_tiny",        # Tracking pixels (< ~20x20)
+    "floating_overlay", # fixed/absolute con z-index alto
+    "suspicious_meta",  # Clases/id de ad, banner, popup...
+    "transparent",      # Botones "fantasma" (opacity < 0.2)
+    "good_text",        # Texto de descarga
+    "standard_size",    # Tamaño de botón típico de UI
+    "pointer",          # Cursor de link
+    "download_href",    # Dominio de descarga conocido en el href
+]
+
+# Modelo por defecto (ajustado a mano): score = clip(BIAS + x·WEIGHTS, 0, 1)
+DEFAULT_WEIGHTS = [-0.3, -0.2, -0.4, -0.4, -0.5, 0.3, 0.2, 0.1, 0.3]
+DEFAULT_BIAS = 0.5
+
+SUSPICIOUS_KEYWORDS = ['ad', 'banner', 'sponsor', 'promo', 'popup', 'overlay', 'fake']
+GOOD_KEYWORDS = ['descargar', 'download', 'ver enlace', 'get link', 'haz clic', 'clic aquí']
+DOWNLOAD_DOMAINS = ['mega', 'drive', 'google', 'mediafire', '1fichier']
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DATASET_FILE = DATA_DIR / "realness_dataset.jsonl"
+WEIGHTS_FILE = DATA_DIR / "realness_weights.json"
+
+DEFAULT_SELECTORS = ['a[href]', 'button', '[role="button"]', '.btn', '.button']
+
+# Extracción por lotes: marca cada elemento con data-neo-el (orden del DOM) y
+# devuelve las filas de características ya calculadas en la página
+BATCH_FEATURES_JS = """(opts) => {
+    document.querySelectorAll('[data-neo-el]').forEach(el => el.removeAttribute('data-neo-el'));
+    const rows = [];
+    const meta = [];
+    document.querySelectorAll(opts.selector).forEach((el, i) => {
+        el.setAttribute('data-neo-el', String(i));
+        const style = window.getComputedStyle(el);
+        const rect = el.getBoundingClientRect();
+        const area = rect.width * rect.height;
+        const zIndex = parseInt(style.zIndex) || 0;
+        const opacity = parseFloat(style.opacity);
+        const text = (el.innerText || '').trim();
+        const href = el.href || '';
+        const metaText = (String(el.className || '') + (el.id || '')).toLowerCase();
+        const textLower = text.toLowerCase();
+        const hrefLower = String(href).toLowerCase();
+        const has = (list, s) => list.some(k => s.includes(k)) ? 1 : 0;
+        rows.push([
+            area > 120000 ? 1 : 0,
+            area < 400 ? 1 : 0,
+            (['fixed', 'absolute'].includes(style.position) && zIndex > 100) ? 1 : 0,
+            has(opts.suspicious, metaText),
+            (isNaN(opacity) ? 1 : opacity) < 0.2 ? 1 : 0,
+            has(opts.good, textLower),
+            (area > 2000 && area < 60000) ? 1 : 0,
+            style.cursor === 'pointer' ? 1 : 0,
+            has(opts.downloadDomains, hrefLower),
+        ]);
+        meta.push({
+            index: i,
+            key: opts.keyAttr ? el.getAttribute(opts.keyAttr) : null,
+            text: text.substring(0, 100),
+            href: String(href),
+            tagName: el.tagName,
+            visible: style.display !== 'none' && style.visibility !== 'hidden',
+        });
+    });
+    return { rows: rows, meta: meta };
+}"""
+
+
+def feature_vector(features: Dict) -> List[float]:
+    """
+    Convierte el dict de get_element_features en una fila de la matriz
+    (mismas columnas que BATCH_FEATURES_JS).
+    """
+    area = features['area']
+    combined_meta = (str(features.get('classes', '')) + str(features.get('id', ''))).lower()
+    text_lower = features.get('text', '').lower()
+    href_lower = str(features.get('href', '')).lower()
+    return [
+        1.0 if area > 120000 else 0.0,
+        1.0 if area < 400 else 0.0,
+        1.0 if features['position'] in ['fixed', 'absolute'] and features['zIndex'] > 100 else 0.0,
+        1.0 if any(kw in combined_meta for kw in SUSPICIOUS_KEYWORDS) else 0.0,
+        1.0 if features['opacity'] < 0.2 else 0.0,
+        1.0 if any(kw in text_lower for kw in GOOD_KEYWORDS) else 0.0,
+        1.0 if 2000 < area < 60000 else 0.0,
+        1.0 if features.get('cursor') == 'pointer' else 0.0,
+        1.0 if any(d in href_lower for d in DOWNLOAD_DOMAINS) else 0.0,
+    ]
+
+
 class DOMAnalyzer:
     """
     Analiza el DOM para distinguir botones reales de falsos.
     Basado en heurísticas de HTML/CSS (posición, tamaño, z-index, etc).
     """
-    
-    def __init__(self):
-        self.logger = get_logger()
+
+    def __init__(self, weights_file: Optional[str] = None, dataset_file: Optional[str] = None, logger=None):
+        """
+        Args:
+            weights_file: Pesos entrenados (default: data/realness_weights.json).
+                          Si no existe se usa el modelo ajustado a mano.
+            dataset_file: Dataset de resultados (default: data/realness_dataset.jsonl)
+            logger: Logger de la resolucion (default: el global)
+        """
+        self.logger = logger or get_logger()
+        self.weights = list(DEFAULT_WEIGHTS)
+        self.bias = DEFAULT_BIAS
+        self.model = "linear"  # "linear" (a mano, clip) | "logistic" (entrenado)
+        self.dataset_file = Path(dataset_file) if dataset_file else DATASET_FILE
+        self.load_weights(weights_file or WEIGHTS_FILE)
+
+    def load_weights(self, weights_file) -> bool:
+        """Carga pesos entrenados si existen y coinciden con FEATURE_NAMES."""
+        path = Path(weights_file)
+        if not path.exists():
+            return False
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("features") != FEATURE_NAMES:
+                self.logger.warning("Realness weights ignored: feature set changed")
+                return False
+            self.weights = [float(w) for w in data["weights"]]
+            self.bias = float(data["bias"])
+            self.model = data.get("model", "logistic")
+            self.logger.info(f"Loaded realness model ({self.model}, {data.get('samples', '?')} samples)")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Failed to load realness weights: {e}")
+            return False
+
+    def record_outcomes(self, rows: Sequence[Sequence[float]], labels: Sequence[bool], site: str = ""):
+        """
+        Registra filas de características con el resultado de su click
+        (True = llevó a descarga o acortador, False = ad o nada).
+        """
+        if not rows:
+            return
+        try:
+            self.dataset_file.parent.mkdir(parents=True, exist_ok=True)
+            timestamp = datetime.now().isoformat()
+            with open(self.dataset_file, "a", encoding="utf-8") as f:
+                for row, label in zip(rows, labels):
+                    f.write(json.dumps({
+                        "features": [float(x) for x in row],
+                        "label": int(bool(label)),
+                        "site": site,
+                        "timestamp": timestamp,
+                    }) + "\n")
+        except Exception as e:
+            self.logger.warning(f"Failed to record realness outcomes: {e}")
 
     def get_element_features(self, element: ElementHandle) -> Optional[Dict]:
         """Extrae características visuales y estructurales de un elemento."""
@@ -46,87 +211,90 @@ class DOMAnalyzer:
             self.logger.info(f"Failed to get features for element: {e}")
             return None
 
+    def extract_features_batch(self, page: Page, selectors: List[str] = None,
+                               key_attr: Optional[str] = None) -> Tuple[List[List[float]], List[Dict]]:
+        """
+        Extrae las filas de características de todos los elementos que
+        coinciden con los selectores en una sola llamada a la página.
+        Cada elemento queda marcado con data-neo-el=<index> (orden del DOM).
+
+        Args:
+            key_attr: Atributo cuyo valor se devuelve como meta[i]["key"]
+                      (para relacionar filas con elementos ya identificados)
+
+        Returns:
+            (filas, meta) con meta[i] = {index, key, text, href, tagName, visible}
+        """
+        result = page.evaluate(BATCH_FEATURES_JS, {
+            "selector": ", ".join(selectors or DEFAULT_SELECTORS),
+            "suspicious": SUSPICIOUS_KEYWORDS,
+            "good": GOOD_KEYWORDS,
+            "downloadDomains": DOWNLOAD_DOMAINS,
+            "keyAttr": key_attr,
+        })
+        return result["rows"], result["meta"]
+
+    def score_matrix(self, rows: Sequence[Sequence[float]], visible: Sequence[bool] = None):
+        """
+        Puntúa una matriz de características (n x len(FEATURE_NAMES)).
+        Los elementos no visibles puntúan 0.
+
+        Returns:
+            Scores en [0, 1] (ndarray con NumPy, lista sin él)
+        """
+        if NUMPY_AVAILABLE:
+            X = np.asarray(rows, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+            z = X @ np.asarray(self.weights) + self.bias
+            if self.model == "logistic":
+                scores = 1.0 / (1.0 + np.exp(-z))
+            else:
+                scores = np.clip(z, 0.0, 1.0)
+            if visible is not None:
+                scores = np.where(np.asarray(visible, dtype=bool), scores, 0.0)
+            return scores
+
+        scores = []
+        for i, row in enumerate(rows):
+            z = self.bias + sum(w * x for w, x in zip(self.weights, row))
+            if self.model == "logistic":
+                s = 1.0 / (1.0 + math.exp(-max(-500.0, min(500.0, z))))
+            else:
+                s = max(0.0, min(1.0, z))
+            if visible is not None and not visible[i]:
+                s = 0.0
+            scores.append(s)
+        return scores
+
+    def score_elements(self, page: Page, selectors: List[str] = None) -> Tuple[List[float], List[Dict]]:
+        """Extrae y puntúa todos los candidatos: un round trip en total."""
+        rows, meta = self.extract_features_batch(page, selectors)
+        if not rows:
+            return [], []
+        scores = self.score_matrix(rows, [m["visible"] for m in meta])
+        return [float(s) for s in scores], meta
+
     def calculate_realness_score(self, features: Dict) -> float:
         """
         Calcula un score de 0.0 a 1.0 sobre qué tan "real" es un botón.
         """
         if not features or features['display'] == 'none' or features['visibility'] == 'hidden':
             return 0.0
-            
-        score = 0.5  # Base neutral
-        
-        # --- PENALIZACIONES (Señales de Ad/Fake) ---
-        
-        # 1. Tamaño anormal (banners son gigantes, tracking pixels son minúsculos)
-        if features['area'] > 120000:  # ~400x300
-            score -= 0.3
-        if features['area'] < 400:     # ~20x20
-            score -= 0.2
-            
-        # 2. Posición flotante con z-index alto (overlays)
-        if features['position'] in ['fixed', 'absolute']:
-            if features['zIndex'] > 100:
-                score -= 0.4
-        
-        # 3. Clases sospechosas
-        suspicious_keywords = ['ad', 'banner', 'sponsor', 'promo', 'popup', 'overlay', 'fake']
-        combined_meta = (features['classes'] + features['id']).lower()
-        if any(kw in combined_meta for kw in suspicious_keywords):
-            score -= 0.4
-            
-        # 4. Transparencia (botones "fantasma" que cubren links reales)
-        if features['opacity'] < 0.2:
-            score -= 0.5
-
-        # --- BONIFICACIONES (Señales de Real) ---
-        
-        # 1. Texto relevante
-        text_lower = features['text'].lower()
-        good_keywords = ['descargar', 'download', 'ver enlace', 'get link', 'haz clic', 'clic aquí']
-        if any(kw in text_lower for kw in good_keywords):
-            score += 0.3
-            
-        # 2. Tamaño de botón estándar (botón típico de UI)
-        if 2000 < features['area'] < 60000:
-            score += 0.2
-            
-        # 3. Cursor de link (señal visual humana)
-        if features['cursor'] == 'pointer':
-            score += 0.1
-            
-        # 4. Dominio de descarga conocido en el href
-        download_domains = ['mega', 'drive', 'google', 'mediafire', '1fichier']
-        if any(d in features['href'].lower() for d in download_domains):
-            score += 0.3
-
-        # Clamp entre 0 y 1
-        return max(0.0, min(1.0, score))
+        return float(self.score_matrix([feature_vector(features)])[0])
 
     def find_best_button(self, page: Page, selectors: List[str] = None) -> Optional[ElementHandle]:
         """
         Busca entre una lista de selectores (o los detectados automáticamente)
         y retorna el que tenga mayor realness score.
         """
-        if not selectors:
-            selectors = ['a[href]', 'button', '[role="button"]', '.btn', '.button']
-            
-        best_element = None
-        max_score = -1.0
-        
-        for selector in selectors:
-            try:
-                elements = page.query_selector_all(selector)
-                for el in elements:
-                    features = self.get_element_features(el)
-                    if features:
-                        score = self.calculate_realness_score(features)
-                        if score > max_score and score > 0.5:
-                            max_score = score
-                            best_element = el
-            except Exception:
-                continue
-                
-        if best_element:
-            self.logger.info(f"Selected best button with score {max_score:.2f}")
-            
-        return best_element
+        try:
+            scores, meta = self.score_elements(page, selectors)
+        except Exception as e:
+            self.logger.info(f"Batch feature extraction failed: {e}")
+            return None
+
+        best = max(range(len(scores)), key=lambda i: scores[i], default=None)
+        if best is None or scores[best] <= 0.5:
+            return None
+
+        self.logger.info(f"Selected best button with score {scores[best]:.2f}")
+        return page.query_selector(f"[data-neo-el='{meta[best]['index']}']")
@@ -6,6 +6,7 @@ Ejecutar:
 
 Abre un navegador con la interfaz en http://localhost:8081
 """
+import base64
 import sys
 import os
 import asyncio
@@ -25,6 +26,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 print("Importando dependencias...")
 from nicegui import ui, app
 import asyncio
+from datetime import datetime, timedelta
 from typing import Optional, List, Dict
 print("Importando resolver...")
 from resolver import LinkResolver
@@ -60,8 +62,8 @@ state = AppState()
 # =============================================================================
 # Funciones auxiliares para historial y exportacion
 # =============================================================================
-def render_history_table(records: List[ResolutionRecord], history_area):
-    """Renderiza la tabla de historial"""
+def render_history_table(records: List[ResolutionRecord], history_area, next_cursor=None):
+    """Renderiza la tabla de historial (primera pagina; el resto se carga a pedido)"""
     history_area.clear()
     
     if not records:
@@ -81,69 +83,96 @@ def render_history_table(records: List[ResolutionRecord], history_area):
         
         # Registros
         for record in records:
-            with ui.row().classes('w-full gap-1 p-2 border-b hover:bg-grey-10 items-center text-xs'):
-                # Favorito
-                def make_toggle_fav(rec_id):
-                    def toggle():
-                        state.history_manager.toggle_favorite(rec_id)
-                        refresh_history_display(history_area)
-                    return toggle
-                
-                ui.button(
-                    '⭐' if record.is_favorite else '☆',
-                    on_click=make_toggle_fav(record.id)
-                ).props('flat dense').classes('w-8')
-                
-                # URL (truncada)
-                url_short = record.original_url[:40] + "..." if len(record.original_url) > 40 else record.original_url
-                ui.label(url_short).classes('flex-grow truncate').tooltip(record.original_url)
-                
-                # Proveedor
-                ui.label(record.provider or '-').classes('w-24')
-                
-                # Calidad
-                ui.label(record.quality or '-').classes('w-16')
-                
-                # Score
-                score_color = 'positive' if record.score >= 70 else 'warning' if record.score >= 40 else 'negative'
-                ui.label(f'{record.score:.0f}').classes(f'w-12 text-{score_color}')
-                
-                # Acciones
-                with ui.row().classes('w-32 gap-1'):
-                    # Copiar link
-                    def make_copy(url):
-                        def copy():
-                            ui.run_javascript(f'navigator.clipboard.writeText("{url}")')
-                            ui.notify('Link copiado!', type='positive')
-                        return copy
-                    
-                    ui.button(
-                        icon='content_copy',
-                        on_click=make_copy(record.resolved_url)
-                    ).props('flat dense size=sm').tooltip('Copiar')
-                    
-                    # Eliminar
-                    def make_delete(rec_id):
-                        def delete():
-                            state.history_manager.delete_record(rec_id)
-                            refresh_history_display(history_area)
-                            ui.notify('Registro eliminado', type='positive')
-                        return delete
-                    
-                    ui.button(
-                        icon='delete',
-                        on_click=make_delete(record.id)
-                    ).props('flat dense size=sm').tooltip('Eliminar')
+            render_history_row(record, history_area)
+
+    render_load_more(history_area, next_cursor)
+
+
+def render_history_row(record: ResolutionRecord, history_area):
+    """Renderiza una fila del historial dentro del contexto actual"""
+    with ui.row().classes('w-full gap-1 p-2 border-b hover:bg-grey-10 items-center text-xs'):
+        # Favorito
+        def make_toggle_fav(rec_id):
+            def toggle():
+                state.history_manager.toggle_favorite(rec_id)
+                refresh_history_display(history_area)
+            return toggle
+
+        ui.button(
+            '⭐' if record.is_favorite else '☆',
+            on_click=make_toggle_fav(record.id)
+        ).props('flat dense').classes('w-8')
+
+        # URL (truncada)
+        url_short = record.original_url[:40] + "..." if len(record.original_url) > 40 else record.original_url
+        ui.label(url_short).classes('flex-grow truncate').tooltip(record.original_url)
+
+        # Proveedor
+        ui.label(record.provider or '-').classes('w-24')
+
+        # Calidad
+        ui.label(record.quality or '-').classes('w-16')
+
+        # Score
+        score_color = 'positive' if record.score >= 70 else 'warning' if record.score >= 40 else 'negative'
+        ui.label(f'{record.score:.0f}').classes(f'w-12 text-{score_color}')
+
+        # Acciones
+        with ui.row().classes('w-32 gap-1'):
+            # Copiar link
+            def make_copy(url):
+                def copy():
+                    ui.run_javascript(f'navigator.clipboard.writeText("{url}")')
+                    ui.notify('Link copiado!', type='positive')
+                return copy
+
+            ui.button(
+                icon='content_copy',
+                on_click=make_copy(record.resolved_url)
+            ).props('flat dense size=sm').tooltip('Copiar')
+
+            # Eliminar
+            def make_delete(rec_id):
+                def delete():
+                    state.history_manager.delete_record(rec_id)
+                    refresh_history_display(history_area)
+                    ui.notify('Registro eliminado', type='positive')
+                return delete
+
+            ui.button(
+                icon='delete',
+                on_click=make_delete(record.id)
+            ).props('flat dense size=sm').tooltip('Eliminar')
+
+
+def render_load_more(history_area, next_cursor):
+    """Boton para cargar la siguiente pagina del historial (paginacion por clave)"""
+    if next_cursor is None:
+        return
+
+    def load_more():
+        more_btn.delete()
+        records, cursor = state.history_manager.reads.records_page(
+            after=next_cursor, favorites_only=state.current_filter == "favorites"
+        )
+        with history_area:
+            for record in records:
+                render_history_row(record, history_area)
+        render_load_more(history_area, cursor)
+
+    with history_area:
+        more_btn = ui.button('Cargar más', on_click=load_more).props('flat size=sm').classes('w-full')
 
 
 def refresh_history_display(history_area):
-    """Recarga la tabla de historial con el filtro actual"""
-    if state.current_filter == "favorites":
-        records = state.history_manager.get_favorites()
-    else:
-        records = state.history_manager.get_all_records()
-    
-    render_history_table(records, history_area)
+    """
+    Recarga la tabla de historial con el filtro actual. Lee de la cache: tras
+    marcar un favorito o borrar un registro no se vuelve a consultar SQLite.
+    """
+    records, next_cursor = state.history_manager.reads.records_page(
+        favorites_only=state.current_filter == "favorites"
+    )
+    render_history_table(records, history_area, next_cursor)
 
 
 # =============================================================================
@@ -181,8 +210,9 @@ async def resolve_link(
     screenshot_list = []
 
     # Callback para screenshots
-    def screenshot_callback(filepath: str, name: str, description: str, url: str):
-        """Recibe notificaciones de nuevos screenshots."""
+    def screenshot_callback(filepath: str, name: str, description: str, url: str,
+                            data: Optional[bytes] = None, mime_type: str = "image/jpeg"):
+        """Recibe notificaciones de nuevos screenshots (la imagen llega en `data`)."""
         screenshot_list.append({
             "filepath": filepath,
             "name": name,
@@ -199,7 +229,9 @@ async def resolve_link(
             
             try:
                 # Mostrar imagen
-                ui.image(filepath).classes('w-full max-h-96 object-contain rounded-lg border border-grey-5')
+                # El archivo se escribe en segundo plano: mostrar los bytes recibidos
+                source = f"data:{mime_type};base64,{base64.b64encode(data).decode()}" if data else filepath
+                ui.image(source).classes('w-full max-h-96 object-contain rounded-lg border border-grey-5')
                 ui.label(description).classes('text-xs text-grey-7 mt-2')
                 ui.label(url[:80] + "...").classes('text-xs font-mono text-grey-7')
             except Exception as e:
@@ -225,9 +257,9 @@ async def resolve_link(
         with log_area:
             ui.label(message).classes(f'text-{color} text-xs font-mono')
 
-    # Registrar callbacks
-    logger = get_logger()
-    logger.clear()
+    # Logger de esta resolucion: log_callback solo recibe sus mensajes (aunque
+    # haya otras resoluciones en curso) y se quita al terminar
+    logger = get_logger().bind()
     logger.register_callback(log_callback)
 
     # Ejecutar resolucion en thread separado usando el resolver sin crono
@@ -235,7 +267,7 @@ async def resolve_link(
     def run_resolver():
         try:
             logger.log("INFO", "Initializing resolver...")
-            resolver = LinkResolver(headless=False, screenshot_callback=screenshot_callback)
+            resolver = LinkResolver(headless=False, screenshot_callback=screenshot_callback, logger=logger)
             logger.log("INFO", "Resolver created successfully")
             
             # Aplicar configuraciones de interceptación
@@ -267,6 +299,10 @@ async def resolve_link(
         import traceback
         logger.log("ERROR", traceback.format_exc())
         result = None
+    finally:
+        # Que lleguen los ultimos mensajes al panel antes de soltar el callback
+        await asyncio.get_event_loop().run_in_executor(None, logger.flush, 2.0)
+        logger.close()
 
     # Actualizar resultado
     state.result = result
@@ -696,15 +732,15 @@ def build_history_tab():
                     ui.label('Exportar:').classes('text-bold')
                     
                     def export_to_format(format_type: str):
-                        records = state.history_manager.get_all_records()
-                        if not records:
+                        if not state.history_manager.has_records():
                             ui.notify('No hay registros para exportar', type='warning')
                             return
                         
+                        # Sin lista de registros: se exporta en streaming desde la BD
                         if format_type == "json":
-                            success, result = state.history_manager.export_to_json(records)
+                            success, result = state.history_manager.export_to_json()
                         else:
-                            success, result = state.history_manager.export_to_csv(records)
+                            success, result = state.history_manager.export_to_csv()
                         
                         if success:
                             ui.notify(f'✅ Exportado a {format_type.upper()}: {result}', type='positive')
@@ -718,7 +754,8 @@ def build_history_tab():
                 
                 # Estadísticas
                 def show_stats():
-                    stats = state.history_manager.get_statistics()
+                    stats = state.history_manager.reads.statistics()
+                    week = state.history_manager.get_statistics(since=datetime.now() - timedelta(days=7))
                     message = f"""
                     📊 Estadísticas del Historial:
                     
@@ -728,6 +765,7 @@ def build_history_tab():
                     Proveedor más usado: {stats.get('most_used_provider', 'N/A')}
                     Calidad más usada: {stats.get('most_used_quality', 'N/A')}
                     Score promedio: {stats.get('average_score', 0):.1f}
+                    Últimos 7 días: {week.get('total_records', 0)} registros
                     """
                     ui.notify(message, type='info')
                 
@@ -81,14 +81,15 @@ def log_callback(level, message):
     # Streamlit no soporta actualizaciones parciales en medio de la ejecución fácilmente,
     # pero podemos usar contenedores vacíos. Ver abajo.
 
-def screenshot_callback(filepath, name, description, url):
-    """Callback para screenshots"""
+def screenshot_callback(filepath, name, description, url, data=None, mime_type=None):
+    """Callback para screenshots (la imagen llega en `data`; el archivo se escribe despues)"""
     # Guardamos en session state para mostrar al final o durante si es posible
     if "screenshots" not in st.session_state:
         st.session_state.screenshots = []
     
     st.session_state.screenshots.append({
         "path": filepath,
+        "data": data,
         "name": name,
         "desc": description
     })
@@ -96,18 +97,28 @@ def screenshot_callback(filepath, name, description, url):
 # =============================================================================
 # Helper Functions
 # =============================================================================
-def get_history_df():
-    hm = HistoryManager()
-    records = hm.get_all_records()
-    if not records:
-        return pd.DataFrame()
-    
-    data = [r.to_dict() for r in records]
-    df = pd.DataFrame(data)
-    # Reordenar columnas
-    cols = ['timestamp', 'original_url', 'quality', 'provider', 'score', 'is_favorite', 'resolved_url']
-    existing_cols = [c for c in cols if c in df.columns]
-    return df[existing_cols]
+HISTORY_PAGE_SIZE = 200
+
+def get_history_df(after=None):
+    """
+    Una pagina del historial (paginacion por clave) y el cursor de la siguiente.
+    Sale de la cache de lecturas: en cada rerun solo se consulta SQLite (y se
+    rearma el DataFrame) si el historial cambio.
+    """
+    reads = HistoryManager().reads
+
+    def build():
+        records, next_cursor = reads.records_page(after=after, limit=HISTORY_PAGE_SIZE)
+        if not records:
+            return pd.DataFrame(), None
+        df = pd.DataFrame([r.to_dict() for r in records])
+        # Reordenar columnas
+        cols = ['timestamp', 'original_url', 'quality', 'provider', 'score', 'is_favorite', 'resolved_url']
+        existing_cols = [c for c in cols if c in df.columns]
+        return df[existing_cols], next_cursor
+
+    df, next_cursor = reads.memo(("history_df", after, HISTORY_PAGE_SIZE), build)
+    return df.copy(), next_cursor
 
 # =============================================================================
 # Interfaz Principal
@@ -126,11 +137,10 @@ with st.sidebar:
     st.divider()
     
     st.subheader("📚 Historial Reciente")
-    hm_sidebar = HistoryManager()
-    favs = hm_sidebar.get_favorites()
+    favs, _ = HistoryManager().reads.records_page(favorites_only=True, limit=5)
     if favs:
         st.write("⭐ Favoritos:")
-        for f in favs[:5]:
+        for f in favs:
             if st.button(f"{f.provider} - {f.quality}", key=f"fav_{f.id}"):
                 st.code(f.resolved_url)
     else:
@@ -210,9 +220,9 @@ with tab_resolver:
                 st.session_state.logs = [] # Limpiar logs anteriores
                 st.session_state.screenshots = [] # Limpiar screenshots
                 
-                # Configurar Logger para escribir en Streamlit
-                logger = get_logger()
-                logger.clear()
+                # Logger de esta resolucion: el callback solo recibe sus
+                # mensajes y se quita al terminar (no se acumulan entre reruns)
+                logger = get_logger().bind()
                 
                 # Custom handler que actualiza un placeholder de streamlit
                 # NOTA: Streamlit no es async-friendly para updates en tiempo real desde threads background facilmente.
@@ -226,26 +236,26 @@ with tab_resolver:
                         st.write(f"`[{level}]` {msg}")
                         st.session_state.logs.append(f"[{level}] {msg}")
                     
-                    logger.register_callback(st_log_callback)
-                    
                     # Encontrar datos seleccionados
                     selected_q_data = next(q for q in st.session_state.detected_qualities if q["display"] == selected_display)
                     
                     # Instanciar Resolver
                     resolver = LinkResolver(
                         headless=False, # Verlo ayuda a debuggear, o headless=True
-                        screenshot_callback=screenshot_callback
+                        screenshot_callback=screenshot_callback,
+                        logger=logger
                     )
                     resolver.use_network_interception = block_ads
                     resolver.accelerate_timers = speed_up_timers
                     
-                    # Ejecutar (bloqueante)
-                    result = resolver.resolve(
-                        url=url_input,
-                        quality=selected_q_data.get("quality", "1080p"),
-                        format_type=selected_q_data.get("format", "WEB-DL"),
-                        providers=selected_providers
-                    )
+                    # Ejecutar (bloqueante); sync: st.write solo funciona en el hilo del script
+                    with logger.subscribe(st_log_callback, sync=True):
+                        result = resolver.resolve(
+                            url=url_input,
+                            quality=selected_q_data.get("quality", "1080p"),
+                            format_type=selected_q_data.get("format", "WEB-DL"),
+                            providers=selected_providers
+                        )
                     
                     st.session_state.resolver_result = result
                     
@@ -281,13 +291,29 @@ with tab_resolver:
             cols = st.columns(3)
             for i, shot in enumerate(st.session_state.screenshots):
                 with cols[i % 3]:
-                    st.image(shot["path"], caption=f"{shot['name']} - {shot['desc']}")
+                    st.image(shot.get("data") or shot["path"], caption=f"{shot['name']} - {shot['desc']}")
 
 with tab_history:
     st.header("Historial de Resoluciones")
-    df = get_history_df()
+    # Pila de cursores: el ultimo es el inicio de la pagina actual
+    if "history_cursors" not in st.session_state:
+        st.session_state.history_cursors = [None]
+    df, next_cursor = get_history_df(after=st.session_state.history_cursors[-1])
     
     if not df.empty:
+        page = len(st.session_state.history_cursors)
+        p1, p2, p3 = st.columns([1, 2, 1])
+        with p1:
+            if page > 1 and st.button("← Más recientes"):
+                st.session_state.history_cursors.pop()
+                st.rerun()
+        with p2:
+            st.caption(f"Página {page} ({len(df)} registros)")
+        with p3:
+            if next_cursor and st.button("Más antiguos →"):
+                st.session_state.history_cursors.append(next_cursor)
+                st.rerun()
+
         st.dataframe(
             df,
             column_config={
@@ -304,7 +330,7 @@ with tab_history:
         with c1:
             csv = df.to_csv(index=False).encode('utf-8')
             st.download_button(
-                "📥 Descargar CSV",
+                "📥 Descargar CSV (página)",
                 csv,
                 "history.csv",
                 "text/csv",
@@ -313,7 +339,7 @@ with tab_history:
         with c2:
             json_str = df.to_json(orient="records")
             st.download_button(
-                "📥 Descargar JSON",
+                "📥 Descargar JSON (página)",
                 json_str,
                 "history.json",
                 "application/json",
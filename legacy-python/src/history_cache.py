@@ -0,0 +1,205 @@
+"""
+history_cache.py - Modelo de lectura del historial compartido por las GUIs.
+
+Un HistoryReadModel por BD y proceso guarda el resultado de las consultas
+(paginas, favoritos, estadisticas y valores derivados como un DataFrame) y
+solo vuelve a SQLite cuando los datos cambiaron:
+
+    - Cambios de otras conexiones (HistoryWriter, otros hilos, otros
+      procesos, history_maintenance): se detectan con PRAGMA data_version en
+      una conexion propia del modelo, que cambia cuando otra conexion hace
+      commit. Un cambio invalida todo lo cacheado.
+    - Favorito, borrado y notas hechos desde HistoryManager: se escriben por
+      esa misma conexion (sus commits no mueven data_version) y se aplican
+      como delta de una fila sobre lo cacheado, sin releer.
+
+    reads = HistoryManager().reads
+    records, cursor = reads.records_page(limit=200)   # SQLite solo si hubo cambios
+    manager.toggle_favorite(records[0].id)            # delta: la pagina sigue cacheada
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class HistoryReadModel:
+    """
+    Cache de lecturas del historial, invalidada por data_version.
+
+    Las entradas son inmutables para quien las recibe: cada lectura devuelve
+    listas nuevas y los deltas reemplazan el ResolutionRecord en lugar de
+    modificarlo.
+    """
+
+    MAX_ENTRIES = 64  # Entradas cacheadas (LRU): paginas, favoritos, stats, derivados
+
+    _models: Dict[int, "HistoryReadModel"] = {}
+    _models_lock = threading.Lock()
+
+    @classmethod
+    def for_manager(cls, manager) -> "HistoryReadModel":
+        """Modelo compartido de la BD de `manager` (uno por store en todo el proceso)."""
+        key = id(manager.store)
+        with cls._models_lock:
+            model = cls._models.get(key)
+            if model is None or model.store is not manager.store:
+                model = cls(manager)
+                cls._models[key] = model
+            return model
+
+    def __init__(self, manager, max_entries: int = MAX_ENTRIES):
+        self.manager = manager
+        self.store = manager.store
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._version: Optional[int] = None
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.deltas = 0
+
+    # ------------------------------------------------------------------
+    # Version e invalidacion
+    # ------------------------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = self.store.open_connection()
+        return self._conn
+
+    def _sync(self):
+        """Descarta todo si otra conexion hizo commit desde la ultima lectura."""
+        version = self._connection().execute("PRAGMA data_version").fetchone()[0]
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def invalidate(self):
+        """Descarta todo lo cacheado (la proxima lectura va a SQLite)."""
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def close(self):
+        with self._lock:
+            self.invalidate()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Lecturas
+    # ------------------------------------------------------------------
+    def _get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._sync()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            value = load()
+            self._entries[key] = value
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+
+    def records_page(self, after: Optional[Tuple[str, int]] = None, limit: Optional[int] = None,
+                     favorites_only: bool = False, provider: Optional[str] = None):
+        """Igual que HistoryManager.get_records_page(), desde la cache."""
+        limit = limit or self.manager.PAGE_SIZE
+        key = ("page", after, limit, favorites_only, provider)
+        records, cursor = self._get(key, lambda: self.manager.get_records_page(after, limit, favorites_only, provider))
+        return list(records), cursor
+
+    def favorites(self) -> List:
+        """Igual que HistoryManager.get_favorites(), desde la cache."""
+        return list(self._get(("favorites",), self.manager.get_favorites))
+
+    def statistics(self) -> Dict:
+        """Igual que HistoryManager.get_statistics() (sin ventana), desde la cache."""
+        return dict(self._get(("stats",), self.manager.get_statistics))
+
+    def memo(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """
+        Valor derivado de otras lecturas (ej: el DataFrame de una pagina).
+        Se descarta con cualquier cambio, incluidos los deltas; `build` suele
+        leer de la cache, asi que reconstruirlo no toca SQLite.
+        """
+        return self._get(("memo", key), build)
+
+    # ------------------------------------------------------------------
+    # Escrituras con delta
+    # ------------------------------------------------------------------
+    def toggle_favorite(self, record_id: int) -> bool:
+        def write(conn):
+            if conn.execute(self.manager.SQL_TOGGLE_FAVORITE, (record_id,)).rowcount == 0:
+                return None
+            row = conn.execute("SELECT is_favorite FROM resolutions WHERE id = ?", (record_id,)).fetchone()
+            return {"is_favorite": bool(row[0])}
+        return self._write(record_id, write)
+
+    def delete_record(self, record_id: int) -> bool:
+        def write(conn):
+            conn.execute(self.manager.SQL_DELETE, (record_id,))
+            return {}
+        return self._write(record_id, write, delete=True)
+
+    def update_notes(self, record_id: int, notes: str) -> bool:
+        def write(conn):
+            conn.execute(self.manager.SQL_UPDATE_NOTES, (notes, record_id))
+            return {"notes": notes}
+        return self._write(record_id, write)
+
+    def _write(self, record_id: int, write: Callable[[sqlite3.Connection], Optional[Dict]],
+               delete: bool = False) -> bool:
+        """
+        Ejecuta `write` en la conexion del modelo y aplica su resultado
+        (campos cambiados, o None si no cambio nada) a lo cacheado.
+        """
+        with self._lock:
+            # Antes de escribir: lo cacheado tiene que estar al dia para que el delta valga
+            self._sync()
+            conn = self._connection()
+            with conn:
+                changes = write(conn)
+            if changes is None:
+                return False
+            self._apply(record_id, None if delete else changes)
+            return True
+
+    def _apply(self, record_id: int, changes: Optional[Dict]):
+        """Aplica el delta de una fila (changes=None: borrada) a cada entrada."""
+        self.deltas += 1
+        for key in list(self._entries):
+            kind = key[0]
+            if kind == "page":
+                favorites_only = key[3]
+                if favorites_only and changes and "is_favorite" in changes and changes["is_favorite"]:
+                    # La fila entra al filtro: no se sabe en que pagina cae
+                    del self._entries[key]
+                    continue
+                records, cursor = self._entries[key]
+                drop = changes is None or (favorites_only and changes.get("is_favorite") is False)
+                self._entries[key] = (self._patch(records, record_id, changes, drop), cursor)
+            elif kind == "favorites":
+                if changes and changes.get("is_favorite"):
+                    del self._entries[key]
+                    continue
+                drop = changes is None or changes.get("is_favorite") is False
+                self._entries[key] = self._patch(self._entries[key], record_id, changes, drop)
+            else:
+                # Estadisticas y derivados: se recalculan en la proxima lectura
+                del self._entries[key]
+
+    @staticmethod
+    def _patch(records: List, record_id: int, changes: Optional[Dict], drop: bool) -> List:
+        if drop:
+            return [r for r in records if r.id != record_id]
+        return [replace(r, **changes) if r.id == record_id else r for r in records]
@@ -0,0 +1,244 @@
+"""
+history_columnar.py - Exportacion columnar del historial para analisis offline.
+
+Escribe resolution_history con columnas tipadas (score float64, timestamp,
+is_favorite bool, proveedor/calidad/formato como texto y una columna
+timing_<paso>_ms por cada paso registrado en `timings`) por grupos de filas,
+leyendo de SQLite con fetchmany: cada bloque del cursor es un row group.
+
+    - Parquet (.parquet) o Arrow IPC (.arrow/.feather) si pyarrow esta instalado
+    - NumPy .npz como alternativa: cada columna se guarda por grupos
+      ("score/00000", "score/00001", ...); load_npz() los concatena
+
+    pandas.read_parquet("history.parquet")                  # con pyarrow
+    columns = load_npz("history.npz"); columns["score"].mean()  # sin pyarrow
+"""
+
+import argparse
+import json
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+ROW_GROUP_SIZE = 65536
+FORMATS = ("parquet", "arrow", "npz")
+EXTENSIONS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow", ".npz": "npz"}
+
+# (columna, tipo) en el orden de exportacion; timings se agrega aparte
+COLUMNS = (
+    ("id", "int"),
+    ("original_url", "str"),
+    ("resolved_url", "str"),
+    ("provider", "str"),
+    ("quality", "str"),
+    ("format_type", "str"),
+    ("score", "float"),
+    ("is_favorite", "bool"),
+    ("timestamp", "datetime"),
+)
+SQL_ROWS = ("SELECT " + ", ".join(name for name, _ in COLUMNS) + ", timings "
+            "FROM resolution_history ORDER BY id")
+SQL_TIMING_KEYS = """
+    SELECT DISTINCT j.key FROM resolutions, json_each(resolutions.timings) AS j
+    WHERE resolutions.timings IS NOT NULL
+    ORDER BY j.key
+"""
+
+
+def timing_column(step: str) -> str:
+    """Nombre de la columna de un paso de timings ("resolve_ms" -> "timing_resolve_ms")."""
+    return f"timing_{step}" if step.endswith("_ms") else f"timing_{step}_ms"
+
+
+def timing_keys(store) -> List[str]:
+    """Pasos presentes en la columna timings (definen las columnas timing_*)."""
+    return [row[0] for row in store.query(SQL_TIMING_KEYS)]
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def iter_row_groups(store, row_group_size: int = ROW_GROUP_SIZE,
+                    steps: Optional[List[str]] = None) -> Iterator[Dict[str, list]]:
+    """
+    Recorre el historial por bloques y devuelve cada bloque por columnas:
+    {columna: lista de valores}. Timestamps como datetime, timings como
+    float (None si el paso no se registro en esa resolucion).
+    """
+    steps = timing_keys(store) if steps is None else steps
+    cursor = store.connection().execute(SQL_ROWS)
+    try:
+        while True:
+            rows = cursor.fetchmany(row_group_size)
+            if not rows:
+                return
+            values = list(zip(*rows))
+            group = {}
+            for (name, kind), column in zip(COLUMNS, values):
+                if kind == "str":
+                    column = [v or "" for v in column]
+                elif kind == "bool":
+                    column = [bool(v) for v in column]
+                elif kind == "datetime":
+                    column = [_parse_timestamp(v) for v in column]
+                group[name] = list(column)
+            parsed = [json.loads(t) if t else {} for t in values[-1]]
+            for step in steps:
+                group[timing_column(step)] = [t.get(step) for t in parsed]
+            yield group
+    finally:
+        cursor.close()
+
+
+# ----------------------------------------------------------------------
+# Arrow / Parquet
+# ----------------------------------------------------------------------
+def arrow_schema(steps: List[str]):
+    types = {"int": pa.int64(), "str": pa.string(), "float": pa.float64(),
+             "bool": pa.bool_(), "datetime": pa.timestamp("us")}
+    fields = [pa.field(name, types[kind]) for name, kind in COLUMNS]
+    fields += [pa.field(timing_column(step), pa.float64()) for step in steps]
+    return pa.schema(fields)
+
+
+def _arrow_batch(group: Dict[str, list], schema):
+    return pa.record_batch([pa.array(group[field.name], type=field.type) for field in schema], schema=schema)
+
+
+def write_parquet(store, path, row_group_size: int = ROW_GROUP_SIZE) -> int:
+    """Parquet (zstd), un row group por bloque del cursor."""
+    steps = timing_keys(store)
+    schema = arrow_schema(steps)
+    count = 0
+    with pq.ParquetWriter(str(path), schema, compression="zstd") as writer:
+        for group in iter_row_groups(store, row_group_size, steps):
+            batch = _arrow_batch(group, schema)
+            writer.write_table(pa.Table.from_batches([batch]), row_group_size=batch.num_rows)
+            count += batch.num_rows
+    return count
+
+
+def write_arrow(store, path, row_group_size: int = ROW_GROUP_SIZE) -> int:
+    """Arrow IPC (formato archivo / Feather v2), un record batch por bloque."""
+    steps = timing_keys(store)
+    schema = arrow_schema(steps)
+    count = 0
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        for group in iter_row_groups(store, row_group_size, steps):
+            batch = _arrow_batch(group, schema)
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
+
+
+# ----------------------------------------------------------------------
+# NumPy .npz
+# ----------------------------------------------------------------------
+def _numpy_column(kind: str, values: list):
+    if kind == "int":
+        return np.array(values, dtype=np.int64)
+    if kind == "float":
+        # None -> NaN
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    if kind == "bool":
+        return np.array(values, dtype=np.bool_)
+    if kind == "datetime":
+        return np.array([np.datetime64(v, "us") if v else np.datetime64("NaT") for v in values],
+                        dtype="datetime64[us]")
+    return np.array(values, dtype=np.str_)
+
+
+def write_npz(store, path, row_group_size: int = ROW_GROUP_SIZE) -> int:
+    """
+    .npz (zip de .npy sin comprimir, como np.savez) escrito grupo a grupo:
+    no hace falta tener toda la tabla en memoria para guardarla.
+    """
+    steps = timing_keys(store)
+    kinds = dict(COLUMNS, **{timing_column(step): "float" for step in steps})
+    count = 0
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for index, group in enumerate(iter_row_groups(store, row_group_size, steps)):
+            for name, values in group.items():
+                with archive.open(f"{name}/{index:05d}.npy", "w", force_zip64=True) as f:
+                    np.lib.format.write_array(f, _numpy_column(kinds[name], values), allow_pickle=False)
+            count += len(group["id"])
+    return count
+
+
+def load_npz(path) -> Dict[str, "np.ndarray"]:
+    """Carga un .npz de write_npz concatenando los grupos de cada columna."""
+    groups: Dict[str, list] = {}
+    with np.load(path, allow_pickle=False) as data:
+        for key in sorted(data.files):
+            name = key.rsplit("/", 1)[0]
+            groups.setdefault(name, []).append(data[key])
+    return {name: np.concatenate(parts) for name, parts in groups.items()}
+
+
+WRITERS = {"parquet": write_parquet, "arrow": write_arrow, "npz": write_npz}
+
+
+def export_columnar(store, path, fmt: Optional[str] = None,
+                    row_group_size: int = ROW_GROUP_SIZE) -> Tuple[int, Path]:
+    """
+    Exporta el historial en formato columnar.
+
+    Args:
+        path: Archivo destino; el formato se deduce de la extension si no se indica
+        fmt: "parquet", "arrow" o "npz". Sin pyarrow, parquet/arrow se
+             escriben como .npz (mismo nombre con extension .npz)
+
+    Returns:
+        Tupla (registros exportados, ruta escrita)
+    """
+    path = Path(path)
+    fmt = fmt or EXTENSIONS.get(path.suffix.lower(), "parquet")
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown columnar format: {fmt}")
+    if fmt != "npz" and not PYARROW_AVAILABLE:
+        print(f"pyarrow not installed: writing NumPy .npz instead of {fmt}")
+        fmt, path = "npz", path.with_suffix(".npz")
+    if fmt == "npz" and not NUMPY_AVAILABLE:
+        raise RuntimeError("Columnar export needs pyarrow or numpy")
+    return WRITERS[fmt](store, path, row_group_size), path
+
+
+def main():
+    from history_manager import HistoryManager
+
+    parser = argparse.ArgumentParser(description="Export the resolution history as typed columns")
+    parser.add_argument("output", help="Output file (.parquet, .arrow/.feather or .npz)")
+    parser.add_argument("--format", choices=FORMATS, default=None,
+                        help="Output format. Default: from the extension")
+    parser.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE,
+                        help=f"Rows per row group. Default: {ROW_GROUP_SIZE}")
+    parser.add_argument("--db-dir", default=None, help="Directory of the history database. Default: data/")
+    args = parser.parse_args()
+
+    manager = HistoryManager(db_path=args.db_dir)
+    count, path = export_columnar(manager.store, args.output, args.format, args.row_group_size)
+    print(f"Exported {count} records to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+history_export.py - Exportacion del historial en streaming.
+
+Recorre resolution_history con un cursor de SQLite (fetchmany por bloques) y
+escribe cada bloque en cuanto llega, asi que la memoria no depende del tamano
+de la tabla. Formatos: NDJSON (un registro por linea), CSV y JSON (el mismo
+objeto que export_to_json: export_date, records, total_records). Con
+compresion gzip o xz opcional; la salida "-" es stdout, para usarlo en pipes:
+
+    python history_export.py --format ndjson --compress gzip -o - | zcat | jq .provider
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import lzma
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+
+
+EXPORT_FIELDS = ['original_url', 'resolved_url', 'quality', 'format_type', 'provider',
+                 'score', 'is_favorite', 'timestamp', 'notes']
+FORMATS = ("ndjson", "csv", "json")
+COMPRESSIONS = {".gz": "gzip", ".xz": "xz"}
+CHUNK_SIZE = 1000  # Filas por fetchmany
+
+SQL_EXPORT = ("SELECT " + ", ".join(EXPORT_FIELDS) + " FROM resolution_history{where} "
+              "ORDER BY timestamp DESC, id DESC")
+
+
+def iter_export_rows(store, favorites_only: bool = False, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    Registros del historial como dicts (campos EXPORT_FIELDS), leidos por
+    bloques de `chunk_size` con un solo cursor: toda la exportacion ve la
+    misma foto de la BD aunque otros hilos sigan escribiendo.
+    """
+    sql = SQL_EXPORT.format(where=" WHERE is_favorite = 1" if favorites_only else "")
+    cursor = store.connection().execute(sql)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for row in rows:
+                record = dict(zip(EXPORT_FIELDS, row))
+                record['is_favorite'] = bool(record['is_favorite'])
+                yield record
+    finally:
+        cursor.close()
+
+
+def compression_for(path, compression: Optional[str] = None) -> Optional[str]:
+    """Compresion explicita o deducida de la extension (.gz, .xz)."""
+    if compression:
+        return compression
+    if path in (None, "-"):
+        return None
+    return COMPRESSIONS.get(Path(path).suffix.lower())
+
+
+@contextmanager
+def open_output(path, compression: Optional[str] = None) -> Iterator[TextIO]:
+    """
+    Abre la salida de texto (utf-8) de la exportacion.
+
+    Args:
+        path: Archivo destino, o "-"/None para stdout
+        compression: None, "gzip" o "xz"
+    """
+    if compression not in (None, "gzip", "xz"):
+        raise ValueError(f"Unknown compression: {compression}")
+    to_stdout = path in (None, "-")
+    raw = sys.stdout.buffer if to_stdout else open(path, "wb")
+    if compression == "gzip":
+        binary = gzip.GzipFile(fileobj=raw, mode="wb")
+    elif compression == "xz":
+        binary = lzma.LZMAFile(raw, mode="wb")
+    else:
+        binary = raw
+    out = io.TextIOWrapper(binary, encoding="utf-8", newline="")
+    try:
+        yield out
+    finally:
+        out.flush()
+        out.detach()          # Sin cerrar la capa binaria (stdout debe quedar abierto)
+        if binary is not raw:
+            binary.close()    # Escribe el final del stream comprimido; no cierra raw
+        if to_stdout:
+            raw.flush()
+        else:
+            raw.close()
+
+
+def write_ndjson(records: Iterable[Dict], out: TextIO) -> int:
+    """Un objeto JSON por linea. Devuelve la cantidad de registros escritos."""
+    count = 0
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def write_csv(records: Iterable[Dict], out: TextIO) -> int:
+    """CSV con cabecera EXPORT_FIELDS (is_favorite como Yes/No, como export_to_csv)."""
+    writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for record in records:
+        row = dict(record)
+        row['is_favorite'] = 'Yes' if row.get('is_favorite') else 'No'
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_json(records: Iterable[Dict], out: TextIO) -> int:
+    """
+    Objeto JSON con el array de registros escrito elemento a elemento.
+    total_records va al final porque no se conoce hasta terminar.
+    """
+    out.write('{\n  "export_date": %s,\n  "records": [' % json.dumps(datetime.now().isoformat()))
+    count = 0
+    for record in records:
+        out.write(",\n    " if count else "\n    ")
+        out.write(json.dumps(record, ensure_ascii=False))
+        count += 1
+    out.write("\n  ]," if count else "],")
+    out.write('\n  "total_records": %d\n}\n' % count)
+    return count
+
+
+WRITERS = {"ndjson": write_ndjson, "csv": write_csv, "json": write_json}
+
+
+def export_records(records: Iterable[Dict], path, fmt: str = "ndjson",
+                   compression: Optional[str] = None) -> int:
+    """
+    Escribe `records` (dicts con EXPORT_FIELDS) en `path` con el formato dado.
+
+    Returns:
+        Cantidad de registros exportados
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    with open_output(path, compression_for(path, compression)) as out:
+        return WRITERS[fmt](records, out)
+
+
+def export_history(store, path, fmt: str = "ndjson", compression: Optional[str] = None,
+                   favorites_only: bool = False, chunk_size: int = CHUNK_SIZE) -> int:
+    """Exporta el historial completo (o solo favoritos) en streaming desde la BD."""
+    records = iter_export_rows(store, favorites_only=favorites_only, chunk_size=chunk_size)
+    return export_records(records, path, fmt, compression)
+
+
+def main():
+    from history_manager import HistoryManager
+
+    parser = argparse.ArgumentParser(description="Stream the resolution history to a file or stdout")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson", help="Output format. Default: ndjson")
+    parser.add_argument("-o", "--output", default="-", help="Output file, or - for stdout. Default: -")
+    parser.add_argument("--compress", choices=("gzip", "xz"), default=None,
+                        help="Compress the output (default: from the .gz/.xz extension)")
+    parser.add_argument("--favorites", action="store_true", help="Export favorites only")
+    parser.add_argument("--db-dir", default=None, help="Directory of the history database. Default: data/")
+    args = parser.parse_args()
+
+    manager = HistoryManager(db_path=args.db_dir)
+    count = export_history(manager.store, args.output, args.format, args.compress, args.favorites)
+    if args.output != "-":
+        print(f"Exported {count} records to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+history_maintenance.py - Retencion, archivo y compactacion de la BD del historial.
+
+Politica configurable (RetentionPolicy):
+    - Los favoritos se conservan siempre (salvo include_favorites)
+    - Las filas con mas de `keep_days` dias se resumen en history_daily
+      (por dia, proveedor y calidad) y se mueven a un archivo NDJSON
+      comprimido en data/archive/
+    - Las observaciones de WaitTuner se recortan a las ultimas
+      `wait_observations` por (sitio, paso)
+    - Despues: URLs huerfanas fuera, PRAGMA incremental_vacuum, ANALYZE y
+      checkpoint del WAL
+
+Se puede correr con resolvers escribiendo: trabaja por lotes de transacciones
+cortas (los writers esperan a lo sumo un lote gracias a busy_timeout) y cada
+lote se escribe en el archivo antes de borrarse de la BD. Si el proceso se
+corta entre las dos cosas, el lote queda en la BD y en el archivo; la
+siguiente corrida lo vuelve a archivar (filas con el mismo id) pero el
+resumen diario se calcula con lo que se borra, asi que no cuenta doble.
+
+get_statistics() cuenta solo las filas que siguen en la BD; lo archivado
+queda resumido en history_daily (daily_rollups).
+
+Usage:
+    python history_maintenance.py [--keep-days N] [--every MINUTES] [--dry-run]
+"""
+
+import argparse
+import json
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import history_export
+import history_schema
+import wait_tuner
+
+
+@dataclass
+class RetentionPolicy:
+    """Que conservar y como compactar en cada corrida."""
+    keep_days: int = 90              # Filas mas nuevas que esto no se tocan
+    include_favorites: bool = False  # True: los favoritos viejos tambien se archivan
+    archive: bool = True             # False: solo resumen diario, sin archivo de filas
+    archive_dir: Optional[str] = None  # Default: data/archive junto a la BD
+    compression: str = "gzip"        # "gzip" o "xz"
+    batch_size: int = 500            # Filas por transaccion
+    vacuum_pages: int = 0            # Paginas a liberar por corrida (0 = todas las libres)
+    analyze: bool = True
+    wait_observations: int = wait_tuner.WaitTuner.WINDOW  # Por (sitio, paso); 0 = no recortar
+
+
+SQL_CANDIDATES = """
+    SELECT * FROM resolution_history
+    WHERE timestamp < ? {favorites}
+    ORDER BY timestamp, id
+    LIMIT ?
+"""
+# Resumen de las filas del lote que siguen en la BD (dentro de la misma
+# transaccion que las borra: un lote ya borrado por otra corrida suma 0)
+SQL_ROLLUP = """
+    INSERT INTO history_daily (day, provider, quality, n, successful, favorites, score_sum)
+    SELECT substr(timestamp, 1, 10), COALESCE(provider, ''), COALESCE(quality, ''), COUNT(*),
+           SUM(COALESCE(resolved_url, '') NOT IN ('', 'LINK_NOT_RESOLVED')), SUM(is_favorite = 1), TOTAL(score)
+    FROM resolution_history
+    WHERE id IN (SELECT value FROM json_each(?))
+    GROUP BY 1, 2, 3
+    ON CONFLICT (day, provider, quality) DO UPDATE SET
+        n = n + excluded.n,
+        successful = successful + excluded.successful,
+        favorites = favorites + excluded.favorites,
+        score_sum = score_sum + excluded.score_sum
+"""
+SQL_DELETE_BATCH = "DELETE FROM resolutions WHERE id IN (SELECT value FROM json_each(?))"
+SQL_ORPHAN_URLS = """
+    DELETE FROM urls WHERE id IN (
+        SELECT u.id FROM urls u
+        WHERE NOT EXISTS (SELECT 1 FROM resolutions WHERE original_id = u.id)
+          AND NOT EXISTS (SELECT 1 FROM resolutions WHERE resolved_id = u.id)
+        LIMIT ?
+    )
+"""
+
+
+def archive_path(archive_dir: Path, now: datetime, compression: str = "gzip") -> Path:
+    suffix = {"gzip": ".gz", "xz": ".xz"}[compression]
+    return archive_dir / f"history-{now:%Y%m%d-%H%M%S}.ndjson{suffix}"
+
+
+def run_maintenance(manager, policy: Optional[RetentionPolicy] = None, now: Optional[datetime] = None,
+                    dry_run: bool = False, log: Callable[[str], None] = print) -> Dict:
+    """
+    Aplica la politica de retencion a la BD de `manager` (HistoryManager).
+
+    Returns:
+        Resumen de la corrida: filas archivadas, archivo, URLs, observaciones
+        de espera y paginas liberadas
+    """
+    policy = policy or RetentionPolicy()
+    now = now or datetime.now()
+    store = manager.store
+    cutoff = (now - timedelta(days=policy.keep_days)).isoformat()
+    favorites = "" if policy.include_favorites else "AND is_favorite = 0"
+    sql = SQL_CANDIDATES.format(favorites=favorites)
+    summary = {"cutoff": cutoff, "archived": 0, "archive_file": None, "orphan_urls": 0, "wait_observations": 0,
+               "freed_pages": 0}
+
+    if dry_run:
+        count_sql = f"SELECT COUNT(*) FROM resolutions WHERE timestamp < ? {favorites}"
+        summary["archived"] = store.query_one(count_sql, (cutoff,))[0]
+        log(f"[dry-run] {summary['archived']} records older than {cutoff} would be archived")
+        return summary
+
+    with ExitStack() as stack:
+        out = None
+        while True:
+            rows = store.query(sql, (cutoff, policy.batch_size))
+            if not rows:
+                break
+            if policy.archive:
+                if out is None:
+                    archive_dir = Path(policy.archive_dir or Path(manager.db_path).parent / "archive")
+                    archive_dir.mkdir(parents=True, exist_ok=True)
+                    path = archive_path(archive_dir, now, policy.compression)
+                    out = stack.enter_context(history_export.open_output(path, policy.compression))
+                    summary["archive_file"] = str(path)
+                history_export.write_ndjson((dict(row) for row in rows), out)
+                # En disco antes de borrar de la BD
+                out.flush()
+                out.buffer.flush()
+            ids = json.dumps([row["id"] for row in rows])
+            with store.transaction() as conn:
+                conn.execute(SQL_ROLLUP, (ids,))
+                summary["archived"] += conn.execute(SQL_DELETE_BATCH, (ids,)).rowcount
+
+    while True:
+        deleted = store.execute(SQL_ORPHAN_URLS, (policy.batch_size,)).rowcount
+        summary["orphan_urls"] += deleted
+        if deleted < policy.batch_size:
+            break
+
+    if policy.wait_observations > 0:
+        summary["wait_observations"] = wait_tuner.prune_observations(
+            store, policy.wait_observations, policy.batch_size)
+
+    summary["freed_pages"] = compact(store, policy.vacuum_pages, policy.analyze)
+    log(f"Archived {summary['archived']} records older than {cutoff[:10]}"
+        + (f" to {summary['archive_file']}" if summary["archive_file"] else "")
+        + f"; removed {summary['orphan_urls']} unused URLs and {summary['wait_observations']} wait"
+        + f" observations, freed {summary['freed_pages']} pages")
+    return summary
+
+
+def compact(store, pages: int = 0, analyze: bool = True) -> int:
+    """
+    Devuelve paginas libres al sistema (incremental_vacuum, sin reescribir la
+    BD ni bloquear a los lectores), actualiza estadisticas del planner y hace
+    checkpoint del WAL.
+
+    Returns:
+        Paginas liberadas
+    """
+    conn = store.connection()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # BD creada antes de auto_vacuum=INCREMENTAL: hace falta un VACUUM
+        # completo una vez para activarlo (full_vacuum / --full-vacuum)
+        return 0
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    # executescript recorre la sentencia hasta el final; execute() de sqlite3
+    # da un solo paso en sentencias sin columnas (libera una sola pagina)
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    freed = before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if analyze:
+        conn.execute("PRAGMA analysis_limit = 1000")  # ANALYZE acotado: no recorre tablas enteras
+        conn.execute("ANALYZE")
+        conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+    return freed
+
+
+def full_vacuum(store):
+    """VACUUM completo (reescribe la BD y activa auto_vacuum=INCREMENTAL). Bloquea a los writers mientras dura."""
+    conn = store.connection()
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+
+
+def daily_rollups(store, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+    """Resumen diario de lo archivado: [{day, provider, quality, n, successful, favorites, score_sum}]."""
+    rows = store.query(
+        "SELECT * FROM history_daily WHERE day >= ? AND day < ? ORDER BY day, provider, quality",
+        (since or history_schema.MIN_TIMESTAMP, until or history_schema.MAX_TIMESTAMP),
+    )
+    return [dict(row) for row in rows]
+
+
+def main():
+    from history_manager import HistoryManager
+
+    parser = argparse.ArgumentParser(description="Archive and compact the resolution history database")
+    parser.add_argument("--keep-days", type=int, default=RetentionPolicy.keep_days,
+                        help=f"Keep records newer than this. Default: {RetentionPolicy.keep_days}")
+    parser.add_argument("--include-favorites", action="store_true", help="Archive old favorites too")
+    parser.add_argument("--no-archive", action="store_true", help="Only keep daily rollups of old records")
+    parser.add_argument("--archive-dir", default=None, help="Archive directory. Default: data/archive")
+    parser.add_argument("--compress", choices=("gzip", "xz"), default="gzip", help="Archive compression")
+    parser.add_argument("--batch-size", type=int, default=RetentionPolicy.batch_size,
+                        help=f"Records per transaction. Default: {RetentionPolicy.batch_size}")
+    parser.add_argument("--full-vacuum", action="store_true",
+                        help="Run a full VACUUM first (one-off, enables incremental vacuum on old databases)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be archived")
+    parser.add_argument("--every", type=float, default=None, metavar="MINUTES",
+                        help="Keep running, once every MINUTES")
+    parser.add_argument("--db-dir", default=None, help="Directory of the history database. Default: data/")
+    args = parser.parse_args()
+
+    manager = HistoryManager(db_path=args.db_dir)
+    policy = RetentionPolicy(
+        keep_days=args.keep_days,
+        include_favorites=args.include_favorites,
+        archive=not args.no_archive,
+        archive_dir=args.archive_dir,
+        compression=args.compress,
+        batch_size=args.batch_size,
+    )
+    if args.full_vacuum and not args.dry_run:
+        full_vacuum(manager.store)
+
+    while True:
+        try:
+            run_maintenance(manager, policy, dry_run=args.dry_run)
+        except Exception as e:
+            print(f"Error running history maintenance: {e}")
+        if args.every is None:
+            break
+        try:
+            time.sleep(args.every * 60)
+        except KeyboardInterrupt:
+            break
+
+
+if __name__ == "__main__":
+    main()
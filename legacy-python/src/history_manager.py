@@ -4,17 +4,27 @@ history_manager.py - Gestor de historial, favoritos y exportacion de links resue
 Maneja:
 - Guardado de links resueltos en BD SQLite
 - Sistema de favoritos (marcar/desmarcar)
-- Exportacion a JSON y CSV
+- URLs internadas por fingerprint (esquema versionado, ver history_schema)
+- Busqueda de texto completo (FTS5, con LIKE como respaldo)
+- Estadisticas agregadas en SQL (contadores mantenidos por triggers)
+- Cache de lecturas compartida por las GUIs (ver history_cache)
+- Exportacion a JSON, CSV y NDJSON (en streaming, ver history_export)
 """
 
 import sqlite3
 import json
-import csv
 import os
+import re
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
 from dataclasses import dataclass, asdict
+import history_export
+import history_schema
+from history_cache import HistoryReadModel
+from history_store import HistoryStore, url_fingerprint
+from history_writer import HistoryWriter
+from url_parser import extract_title_from_url
 
 
 @dataclass
@@ -40,13 +50,97 @@ class ResolutionRecord:
         return data
 
 
+def _row_to_record(row) -> ResolutionRecord:
+    """Convierte una fila de resolution_history en ResolutionRecord."""
+    return ResolutionRecord(
+        id=row['id'],
+        original_url=row['original_url'],
+        resolved_url=row['resolved_url'],
+        quality=row['quality'],
+        format_type=row['format_type'],
+        provider=row['provider'],
+        score=row['score'],
+        is_favorite=bool(row['is_favorite']),
+        timestamp=row['timestamp'],
+        notes=row['notes']
+    )
+
+
+def _stats_from_counters(rows) -> Dict:
+    """Arma el dict de get_statistics() desde filas (kind, key, n, score_sum)."""
+    totals = {"all": (0, 0.0), "favorite": (0, 0.0), "success": (0, 0.0)}
+    groups = {"provider": {}, "quality": {}}
+    for kind, key, n, score_sum in rows:
+        if kind in totals:
+            totals[kind] = (n or 0, score_sum or 0.0)
+        elif key and n:
+            groups[kind][key] = n
+
+    total, score_sum = totals["all"]
+    # Mas usado: mayor cuenta; en empate, orden alfabetico (estable entre llamadas)
+    most_used = {kind: min(counts, key=lambda k: (-counts[k], k)) if counts else None
+                 for kind, counts in groups.items()}
+    return {
+        "total_records": total,
+        "total_favorites": totals["favorite"][0],
+        "success_rate": (totals["success"][0] / total * 100) if total > 0 else 0.0,
+        "most_used_provider": most_used["provider"],
+        "most_used_quality": most_used["quality"],
+        "average_score": score_sum / total if total > 0 else 0.0,
+        "providers": groups["provider"],
+        "qualities": groups["quality"],
+    }
+
+
 class HistoryManager:
     """
     Gestor de historial, favoritos y exportacion.
-    Usa SQLite para persistencia.
+    Usa SQLite para persistencia a traves de un HistoryStore compartido
+    (conexiones por hilo en modo WAL), asi que instanciarlo es barato.
     """
     
     DB_FILENAME = "neo_link_resolver.db"
+
+    # Sentencias fijas: sqlite3 las prepara una vez por conexion (cache)
+    SQL_INSERT = """
+        INSERT INTO resolution_history
+        (original_url, resolved_url, quality, format_type, provider, score, timestamp, notes, title, timings)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    SQL_ALL = "SELECT * FROM resolution_history ORDER BY timestamp DESC, id DESC"
+    SQL_FAVORITES = "SELECT * FROM resolution_history WHERE is_favorite = 1 ORDER BY timestamp DESC, id DESC"
+    SQL_SEARCH = """
+        SELECT * FROM resolution_history
+        WHERE original_url LIKE ? OR resolved_url LIKE ? OR notes LIKE ? OR title LIKE ?
+        ORDER BY timestamp DESC
+        LIMIT ?
+    """
+    # Pesos bm25 por columna de history_fts: el titulo y las notas pesan mas que las URLs
+    SQL_SEARCH_FTS = """
+        SELECT h.* FROM history_fts
+        JOIN resolution_history h ON h.id = history_fts.rowid
+        WHERE history_fts MATCH ?
+        ORDER BY bm25(history_fts, 1.0, 0.5, 2.0, 4.0), h.timestamp DESC
+        LIMIT ?
+    """
+    # resolution_history es una vista (URLs internadas en urls): los cambios van a resolutions
+    SQL_TOGGLE_FAVORITE = "UPDATE resolutions SET is_favorite = 1 - is_favorite WHERE id = ?"
+    SQL_DELETE = "DELETE FROM resolutions WHERE id = ?"
+    SQL_UPDATE_NOTES = "UPDATE resolutions SET notes = ? WHERE id = ?"
+    SQL_LAST_ID = "SELECT MAX(id) FROM resolutions"
+    SQL_ANY = "SELECT 1 FROM resolution_history LIMIT 1"
+    # Probe por fingerprint (indice de urls) y por original_id (indice del UNIQUE)
+    SQL_HAS_RESOLVED = """
+        SELECT 1 FROM urls u JOIN resolutions r ON r.original_id = u.id
+        WHERE u.fingerprint = ? AND u.url = ? AND r.resolved_id IS NOT NULL
+        LIMIT 1
+    """
+
+    SQL_COUNTERS = "SELECT kind, key, n, score_sum FROM history_counters"
+    # Mismas filas que history_counters, calculadas sobre una ventana de tiempo
+    SQL_WINDOW_STATS = history_schema.SQL_COUNTER_ROWS
+
+    PAGE_SIZE = 100  # Filas por pagina en las vistas de historial
     
     def __init__(self, db_path: Optional[str] = None):
         """
@@ -65,37 +159,17 @@ class HistoryManager:
             db_path = Path(db_path) / self.DB_FILENAME
         
         self.db_path = db_path
+        self.store = HistoryStore.for_path(db_path)
+        self._fts_available: Optional[bool] = None
         self._init_db()
     
     def _init_db(self):
-        """Inicializa la BD y crea tablas si no existen"""
-        print(f"Inicializando base de datos en: {self.db_path}")
+        """Crea o migra el esquema (una sola vez por proceso y BD, ver history_schema)"""
         try:
-            with sqlite3.connect(self.db_path, timeout=5) as conn:
-                cursor = conn.cursor()
-                
-                # Crear tabla de historial
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS resolution_history (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        original_url TEXT NOT NULL,
-                        resolved_url TEXT,
-                        quality TEXT,
-                        format_type TEXT,
-                        provider TEXT,
-                        score REAL,
-                        is_favorite BOOLEAN DEFAULT 0,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        notes TEXT,
-                        UNIQUE(original_url, timestamp)
-                    )
-                """)
-                
-                conn.commit()
-            print("Base de datos inicializada correctamente.")
+            self.store.ensure_schema(history_schema.migrate, name="history")
         except Exception as e:
-            print(f"Error initializing database: {e}")
-    
+            print(f"Error initializing database {self.db_path}: {e}")
+
     def add_record(
         self,
         original_url: str,
@@ -104,58 +178,78 @@ class HistoryManager:
         format_type: str = "",
         provider: str = "",
         score: float = 0.0,
-        notes: str = ""
+        notes: str = "",
+        timings: Optional[Dict[str, float]] = None
     ) -> Optional[int]:
         """
         Agrega un registro al historial.
+
+        Args:
+            timings: Duracion de cada paso de la resolucion en ms (ej: {"resolve_ms": 8200})
         
         Returns:
             ID del registro insertado, o None si hubo error
         """
         try:
-            timestamp = datetime.now().isoformat()
-            
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO resolution_history 
-                    (original_url, resolved_url, quality, format_type, provider, score, timestamp, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (original_url, resolved_url, quality, format_type, provider, score, timestamp, notes))
-                
-                conn.commit()
-                return cursor.lastrowid
+            row = self._insert_row(original_url, resolved_url, quality, format_type, provider, score, notes,
+                                   timings)
+            with self.store.transaction() as conn:
+                conn.execute(self.SQL_INSERT, row)
+                # El INSERT pasa por el trigger de la vista (lastrowid no aplica);
+                # dentro de la transaccion el ultimo id es el nuestro
+                return conn.execute(self.SQL_LAST_ID).fetchone()[0]
         except Exception as e:
             print(f"Error adding record: {e}")
             return None
     
+    def add_record_async(
+        self,
+        original_url: str,
+        resolved_url: str,
+        quality: str = "",
+        format_type: str = "",
+        provider: str = "",
+        score: float = 0.0,
+        notes: str = "",
+        timings: Optional[Dict[str, float]] = None
+    ) -> bool:
+        """
+        Encola un registro para el HistoryWriter (escritura por lotes en
+        segundo plano). No bloquea ni toca el disco.
+
+        Returns:
+            True si quedo encolado, False si la cola estaba llena
+        """
+        return self.writer.submit(
+            self._insert_row(original_url, resolved_url, quality, format_type, provider, score, notes, timings)
+        )
+
+    @staticmethod
+    def _insert_row(original_url, resolved_url, quality, format_type, provider, score, notes,
+                    timings=None) -> tuple:
+        """Parametros de SQL_INSERT: agrega timestamp, el titulo derivado del slug y timings en JSON."""
+        timestamp = datetime.now().isoformat()
+        return (original_url, resolved_url, quality, format_type, provider, score, timestamp, notes,
+                extract_title_from_url(original_url), json.dumps(timings) if timings else None)
+
+    @property
+    def writer(self) -> HistoryWriter:
+        """HistoryWriter compartido de esta BD (se crea al primer uso)."""
+        return HistoryWriter.for_store(self.store, self.SQL_INSERT)
+
+    @property
+    def reads(self) -> HistoryReadModel:
+        """Cache de lecturas compartida de esta BD (una por proceso)."""
+        return HistoryReadModel.for_manager(self)
+
+    def flush_pending(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que los registros encolados con add_record_async esten en disco."""
+        return self.writer.flush(timeout)
+
     def get_all_records(self) -> List[ResolutionRecord]:
         """Obtiene todos los registros del historial"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT * FROM resolution_history ORDER BY timestamp DESC
-                """)
-                
-                records = []
-                for row in cursor.fetchall():
-                    record = ResolutionRecord(
-                        id=row['id'],
-                        original_url=row['original_url'],
-                        resolved_url=row['resolved_url'],
-                        quality=row['quality'],
-                        format_type=row['format_type'],
-                        provider=row['provider'],
-                        score=row['score'],
-                        is_favorite=bool(row['is_favorite']),
-                        timestamp=row['timestamp'],
-                        notes=row['notes']
-                    )
-                    records.append(record)
-                
-                return records
+            return [_row_to_record(row) for row in self.store.query(self.SQL_ALL)]
         except Exception as e:
             print(f"Error getting records: {e}")
             return []
@@ -163,36 +257,69 @@ class HistoryManager:
     def get_favorites(self) -> List[ResolutionRecord]:
         """Obtiene solo los registros marcados como favoritos"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT * FROM resolution_history 
-                    WHERE is_favorite = 1 
-                    ORDER BY timestamp DESC
-                """)
-                
-                records = []
-                for row in cursor.fetchall():
-                    record = ResolutionRecord(
-                        id=row['id'],
-                        original_url=row['original_url'],
-                        resolved_url=row['resolved_url'],
-                        quality=row['quality'],
-                        format_type=row['format_type'],
-                        provider=row['provider'],
-                        score=row['score'],
-                        is_favorite=bool(row['is_favorite']),
-                        timestamp=row['timestamp'],
-                        notes=row['notes']
-                    )
-                    records.append(record)
-                
-                return records
+            return [_row_to_record(row) for row in self.store.query(self.SQL_FAVORITES)]
         except Exception as e:
             print(f"Error getting favorites: {e}")
             return []
     
+    def get_records_page(
+        self,
+        after: Optional[Tuple[str, int]] = None,
+        limit: int = PAGE_SIZE,
+        favorites_only: bool = False,
+        provider: Optional[str] = None
+    ) -> Tuple[List[ResolutionRecord], Optional[Tuple[str, int]]]:
+        """
+        Pagina del historial (mas recientes primero) con paginacion por clave:
+        cada pagina arranca despues del cursor de la anterior, sin OFFSET, asi
+        que cuesta lo mismo la primera pagina que la ultima.
+
+        Args:
+            after: Cursor devuelto por la pagina anterior (None = primera pagina)
+            limit: Registros por pagina
+            favorites_only: Solo favoritos
+            provider: Solo registros de este proveedor
+
+        Returns:
+            Tupla (registros, cursor de la siguiente pagina o None si no hay mas)
+        """
+        where, params = [], []
+        if favorites_only:
+            where.append("is_favorite = 1")
+        if provider:
+            where.append("provider = ?")
+            params.append(provider)
+        if after is not None:
+            where.append("(timestamp, id) < (?, ?)")
+            params.extend(after)
+        sql = "SELECT * FROM resolution_history"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        try:
+            records = [_row_to_record(row) for row in self.store.query(sql, params)]
+        except Exception as e:
+            print(f"Error getting records page: {e}")
+            return [], None
+        next_cursor = (records[-1].timestamp, records[-1].id) if records and len(records) == limit else None
+        return records, next_cursor
+
+    def iter_records(
+        self,
+        favorites_only: bool = False,
+        provider: Optional[str] = None,
+        page_size: int = 500
+    ) -> Iterator[ResolutionRecord]:
+        """Recorre el historial de forma perezosa, pagina a pagina (mas recientes primero)."""
+        cursor = None
+        while True:
+            records, cursor = self.get_records_page(cursor, page_size, favorites_only, provider)
+            yield from records
+            if cursor is None:
+                return
+
     def toggle_favorite(self, record_id: int) -> bool:
         """
         Marca/desmarca un registro como favorito.
@@ -201,26 +328,7 @@ class HistoryManager:
             True si se actualizo correctamente, False si hubo error
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Obtener estado actual
-                cursor.execute("SELECT is_favorite FROM resolution_history WHERE id = ?", (record_id,))
-                row = cursor.fetchone()
-                
-                if not row:
-                    return False
-                
-                current_state = row[0]
-                new_state = 1 - current_state  # Toggle
-                
-                cursor.execute(
-                    "UPDATE resolution_history SET is_favorite = ? WHERE id = ?",
-                    (new_state, record_id)
-                )
-                
-                conn.commit()
-                return True
+            return self.reads.toggle_favorite(record_id)
         except Exception as e:
             print(f"Error toggling favorite: {e}")
             return False
@@ -233,11 +341,8 @@ class HistoryManager:
             True si se elimino correctamente, False si hubo error
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM resolution_history WHERE id = ?", (record_id,))
-                conn.commit()
-                return True
+            self.reads.delete_record(record_id)
+            return True
         except Exception as e:
             print(f"Error deleting record: {e}")
             return False
@@ -250,191 +355,176 @@ class HistoryManager:
             True si se actualizo correctamente, False si hubo error
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "UPDATE resolution_history SET notes = ? WHERE id = ?",
-                    (notes, record_id)
-                )
-                conn.commit()
-                return True
+            self.reads.update_notes(record_id, notes)
+            return True
         except Exception as e:
             print(f"Error updating notes: {e}")
             return False
     
-    def search_records(self, query: str) -> List[ResolutionRecord]:
+    def has_resolved(self, url: str) -> bool:
+        """True si `url` ya se resolvio antes (consulta indexada por fingerprint, sin escanear)."""
+        try:
+            return self.store.query_one(self.SQL_HAS_RESOLVED, (url_fingerprint(url), url)) is not None
+        except Exception as e:
+            print(f"Error checking history for {url}: {e}")
+            return False
+
+    def search_records(self, query: str, limit: Optional[int] = None) -> List[ResolutionRecord]:
         """
-        Busca registros por URL o notas.
-        
+        Busca registros por URL, notas o titulo.
+
+        Con FTS5 cada palabra de `query` se busca como prefijo ("inter 2014"
+        encuentra "interstellar-2014-...") y los resultados vienen ordenados
+        por relevancia (bm25). Sin FTS5 se usa LIKE '%query%', mas recientes
+        primero.
+
         Args:
             query: Termino a buscar
+            limit: Maximo de resultados (None = todos)
             
         Returns:
             Lista de registros que coinciden
         """
+        limit = -1 if limit is None else limit
+        match = self._fts_query(query)
+        if match and self.fts_available:
+            try:
+                rows = self.store.query(self.SQL_SEARCH_FTS, (match, limit))
+                return [_row_to_record(row) for row in rows]
+            except sqlite3.OperationalError as e:
+                print(f"FTS search failed, falling back to LIKE: {e}")
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                search_pattern = f"%{query}%"
-                cursor.execute("""
-                    SELECT * FROM resolution_history 
-                    WHERE original_url LIKE ? OR resolved_url LIKE ? OR notes LIKE ?
-                    ORDER BY timestamp DESC
-                """, (search_pattern, search_pattern, search_pattern))
-                
-                records = []
-                for row in cursor.fetchall():
-                    record = ResolutionRecord(
-                        id=row['id'],
-                        original_url=row['original_url'],
-                        resolved_url=row['resolved_url'],
-                        quality=row['quality'],
-                        format_type=row['format_type'],
-                        provider=row['provider'],
-                        score=row['score'],
-                        is_favorite=bool(row['is_favorite']),
-                        timestamp=row['timestamp'],
-                        notes=row['notes']
-                    )
-                    records.append(record)
-                
-                return records
+            search_pattern = f"%{query}%"
+            rows = self.store.query(self.SQL_SEARCH, (search_pattern,) * 4 + (limit,))
+            return [_row_to_record(row) for row in rows]
         except Exception as e:
             print(f"Error searching records: {e}")
             return []
+
+    @property
+    def fts_available(self) -> bool:
+        """True si la BD tiene el indice history_fts (SQLite compilado con FTS5)."""
+        if self._fts_available is None:
+            try:
+                self._fts_available = self.store.query_one(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history_fts'"
+                ) is not None
+            except sqlite3.Error:
+                self._fts_available = False
+        return self._fts_available
+
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """
+        Convierte el texto del usuario en una consulta FTS5: cada palabra entre
+        comillas (sin operadores ni sintaxis FTS) y con * para buscar prefijos.
+        """
+        return " ".join(f'"{word}"*' for word in re.findall(r"\w+", (query or "").lower()))
     
     def export_to_json(self, records: Optional[List[ResolutionRecord]] = None, filepath: Optional[str] = None) -> Tuple[bool, str]:
         """
         Exporta registros a JSON.
         
         Args:
-            records: Lista de registros a exportar (default: todos)
-            filepath: Ruta donde guardar el archivo (default: directorio actual)
+            records: Lista de registros a exportar (default: todos, leidos en streaming)
+            filepath: Ruta donde guardar el archivo (default: directorio data/)
             
         Returns:
             Tupla (exito, ruta_archivo)
         """
-        try:
-            if records is None:
-                records = self.get_all_records()
-            
-            if filepath is None:
-                filename = f"neo_link_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                data_dir = Path(__file__).parent.parent / "data"
-                data_dir.mkdir(exist_ok=True)
-                filepath = data_dir / filename
-            else:
-                filepath = Path(filepath)
-            
-            # Convertir registros a dicts
-            data = {
-                "export_date": datetime.now().isoformat(),
-                "total_records": len(records),
-                "records": [record.to_dict() for record in records]
-            }
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            
-            return True, str(filepath)
-        except Exception as e:
-            print(f"Error exporting to JSON: {e}")
-            return False, str(e)
+        return self._export("json", records, filepath)
     
     def export_to_csv(self, records: Optional[List[ResolutionRecord]] = None, filepath: Optional[str] = None) -> Tuple[bool, str]:
         """
         Exporta registros a CSV.
         
         Args:
-            records: Lista de registros a exportar (default: todos)
-            filepath: Ruta donde guardar el archivo (default: directorio actual)
+            records: Lista de registros a exportar (default: todos, leidos en streaming)
+            filepath: Ruta donde guardar el archivo (default: directorio data/)
             
         Returns:
             Tupla (exito, ruta_archivo)
         """
+        if records is None:
+            if not self.has_records():
+                return False, "No records to export"
+        elif not records:
+            return False, "No records to export"
+        return self._export("csv", records, filepath)
+
+    def has_records(self) -> bool:
+        """True si el historial tiene al menos un registro (sin contarlos)."""
+        try:
+            return self.store.query_one(self.SQL_ANY) is not None
+        except Exception as e:
+            print(f"Error checking history: {e}")
+            return False
+
+    def export_stream(self, filepath, fmt: str = "ndjson", compression: Optional[str] = None,
+                      favorites_only: bool = False) -> int:
+        """
+        Exporta todo el historial sin cargarlo en memoria (ver history_export).
+
+        Args:
+            filepath: Archivo destino, o "-" para stdout
+            fmt: "ndjson", "csv" o "json"
+            compression: None, "gzip" o "xz" (default: segun la extension)
+            favorites_only: Solo favoritos
+
+        Returns:
+            Cantidad de registros exportados
+        """
+        return history_export.export_history(self.store, filepath, fmt, compression, favorites_only)
+
+    def _export(self, fmt: str, records: Optional[List[ResolutionRecord]], filepath) -> Tuple[bool, str]:
         try:
-            if records is None:
-                records = self.get_all_records()
-            
             if filepath is None:
-                filename = f"neo_link_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                filename = f"neo_link_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
                 data_dir = Path(__file__).parent.parent / "data"
                 data_dir.mkdir(exist_ok=True)
                 filepath = data_dir / filename
             else:
                 filepath = Path(filepath)
-            
-            if not records:
-                return False, "No records to export"
-            
-            # Obtener headers del primer registro
-            fieldnames = ['original_url', 'resolved_url', 'quality', 'format_type', 'provider', 'score', 'is_favorite', 'timestamp', 'notes']
-            
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                for record in records:
-                    row = record.to_dict()
-                    row['is_favorite'] = 'Yes' if row.get('is_favorite') else 'No'
-                    writer.writerow(row)
-            
+
+            if records is None:
+                self.export_stream(filepath, fmt)
+            else:
+                # Mismos campos que la exportacion en streaming (sin id)
+                rows = ({field: getattr(r, field) for field in history_export.EXPORT_FIELDS} for r in records)
+                history_export.export_records(rows, filepath, fmt)
             return True, str(filepath)
         except Exception as e:
-            print(f"Error exporting to CSV: {e}")
+            print(f"Error exporting to {fmt.upper()}: {e}")
             return False, str(e)
     
-    def get_statistics(self) -> Dict:
+    def get_statistics(self, since=None, until=None) -> Dict:
         """
         Obtiene estadisticas del historial.
-        
+
+        Sin ventana lee los contadores materializados (history_counters), asi
+        que cuesta lo mismo con 100 o con 1M de registros. Con `since`/`until`
+        calcula los agregados en SQL sobre ese rango en una sola consulta.
+
+        Args:
+            since: Desde (datetime o ISO, inclusive). None = desde el principio
+            until: Hasta (datetime o ISO, exclusivo). None = hasta ahora
+
         Returns:
-            Diccionario con estadisticas
+            Diccionario con estadisticas (incluye conteos por proveedor y calidad)
         """
         try:
-            records = self.get_all_records()
-            
-            if not records:
-                return {
-                    "total_records": 0,
-                    "total_favorites": 0,
-                    "success_rate": 0.0,
-                    "most_used_provider": None,
-                    "most_used_quality": None
-                }
-            
-            # Contar
-            total = len(records)
-            favorites = len(self.get_favorites())
-            successful = len([r for r in records if r.resolved_url and r.resolved_url != "LINK_NOT_RESOLVED"])
-            
-            # Estadisticas
-            providers = {}
-            qualities = {}
-            
-            for record in records:
-                if record.provider:
-                    providers[record.provider] = providers.get(record.provider, 0) + 1
-                if record.quality:
-                    qualities[record.quality] = qualities.get(record.quality, 0) + 1
-            
-            most_used_provider = max(providers.items(), key=lambda x: x[1])[0] if providers else None
-            most_used_quality = max(qualities.items(), key=lambda x: x[1])[0] if qualities else None
-            
-            return {
-                "total_records": total,
-                "total_favorites": favorites,
-                "success_rate": (successful / total * 100) if total > 0 else 0,
-                "most_used_provider": most_used_provider,
-                "most_used_quality": most_used_quality,
-                "average_score": sum(r.score for r in records) / total if total > 0 else 0
-            }
+            if since is None and until is None:
+                rows = self.store.query(self.SQL_COUNTERS)
+            else:
+                window = tuple(v.isoformat() if isinstance(v, datetime) else v
+                               for v in (since or history_schema.MIN_TIMESTAMP,
+                                         until or history_schema.MAX_TIMESTAMP))
+                rows = self.store.query(self.SQL_WINDOW_STATS, window)
+            return _stats_from_counters(rows)
         except Exception as e:
             print(f"Error getting statistics: {e}")
             return {}
-    
+
     def clear_history(self) -> bool:
         """
         Borra todo el historial (sin confirmar - usar con cuidado).
@@ -443,11 +533,8 @@ class HistoryManager:
             True si se borro correctamente, False si hubo error
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM resolution_history")
-                conn.commit()
-                return True
+            self.store.execute("DELETE FROM resolutions")
+            return True
         except Exception as e:
             print(f"Error clearing history: {e}")
             return False
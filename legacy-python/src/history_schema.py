@@ -0,0 +1,357 @@
+"""
+history_schema.py - Esquema versionado de la BD del historial.
+
+La version del esquema vive en PRAGMA user_version. Cada migracion corre en
+su propia transaccion (BEGIN IMMEDIATE: si otro proceso migra a la vez,
+espera y despues ve la version ya aplicada) junto con el cambio de version,
+asi que una BD nunca queda a medio migrar. En WAL los lectores siguen viendo
+la version anterior hasta el commit.
+
+Versiones:
+    1. resolution_history como tabla con las URLs en texto (esquema original,
+       mas las columnas title y timings)
+    2. URLs internadas: tabla urls (id, fingerprint de 64 bits, url) y
+       resoluciones en `resolutions` con referencias enteras a urls.
+       resolution_history pasa a ser una vista con las mismas columnas que
+       la tabla anterior (las lecturas no cambian); los INSERT sobre la vista
+       internan las URLs con un trigger
+    3. Mantenimiento: history_daily (resumen diario de las filas archivadas,
+       ver history_maintenance) e indice por resolved_id para encontrar URLs
+       huerfanas
+
+Las BDs nuevas se crean con auto_vacuum = INCREMENTAL (HistoryStore), para
+que el mantenimiento pueda devolver paginas libres sin reescribir el archivo.
+
+Despues de migrar se asegura el indice FTS5 (si SQLite lo trae).
+"""
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+from url_parser import extract_title_from_url
+
+
+# Contadores materializados en history_counters: (kind, key, n, score_sum)
+# por cada fila {r} (new/old) de resolutions. Los triggers suman la fila
+# nueva y restan la vieja; get_statistics() sin ventana solo los lee.
+_COUNTERS = (
+    ("'all'", "''", "1", "COALESCE({r}.score, 0)"),
+    ("'favorite'", "''", "{r}.is_favorite = 1", "0"),
+    ("'success'", "''",
+     "COALESCE((SELECT url FROM urls WHERE id = {r}.resolved_id), '') NOT IN ('', 'LINK_NOT_RESOLVED')", "0"),
+    ("'provider'", "COALESCE({r}.provider, '')", "1", "0"),
+    ("'quality'", "COALESCE({r}.quality, '')", "1", "0"),
+)
+
+# Mismas filas que history_counters, calculadas sobre una ventana de tiempo
+# de resolution_history (rango sobre idx_history_timestamp) en una consulta
+SQL_COUNTER_ROWS = """
+    WITH w AS (
+        SELECT * FROM resolution_history WHERE timestamp >= ? AND timestamp < ?
+    )
+    SELECT 'all', '', COUNT(*), TOTAL(score) FROM w
+    UNION ALL SELECT 'favorite', '', COUNT(*), 0 FROM w WHERE is_favorite = 1
+    UNION ALL SELECT 'success', '', COUNT(*), 0 FROM w
+        WHERE COALESCE(resolved_url, '') NOT IN ('', 'LINK_NOT_RESOLVED')
+    UNION ALL SELECT 'provider', provider, COUNT(*), 0 FROM w WHERE provider <> '' GROUP BY provider
+    UNION ALL SELECT 'quality', quality, COUNT(*), 0 FROM w WHERE quality <> '' GROUP BY quality
+"""
+
+# Limites de ventana abierta (timestamp es texto ISO)
+MIN_TIMESTAMP = ""
+MAX_TIMESTAMP = "\uffff"
+
+# id de la URL `{u}` en urls: probe por fingerprint (indice) y comparacion del
+# texto, asi una colision de fingerprints no mezcla URLs distintas
+_URL_ID = "(SELECT id FROM urls WHERE fingerprint = url_fingerprint({u}) AND url = {u})"
+
+
+def _intern(url_expr: str, where: str = "") -> str:
+    """INSERT que agrega `url_expr` a urls si todavia no esta."""
+    condition = f"{where} AND " if where else ""
+    return (f"INSERT INTO urls (fingerprint, url) SELECT url_fingerprint({url_expr}), {url_expr} "
+            f"WHERE {condition}NOT EXISTS (SELECT 1 FROM urls WHERE fingerprint = url_fingerprint({url_expr}) "
+            f"AND url = {url_expr})")
+
+
+def _table_exists(conn: sqlite3.Connection, name: str, kind: str = "table") -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?", (kind, name)
+    ).fetchone() is not None
+
+
+# ----------------------------------------------------------------------
+# Migraciones
+# ----------------------------------------------------------------------
+def _v1_text_table(conn: sqlite3.Connection):
+    """Tabla original con URLs en texto (BDs nuevas o anteriores a user_version)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resolution_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            original_url TEXT NOT NULL,
+            resolved_url TEXT,
+            quality TEXT,
+            format_type TEXT,
+            provider TEXT,
+            score REAL,
+            is_favorite BOOLEAN DEFAULT 0,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            notes TEXT,
+            title TEXT,
+            timings TEXT,
+            UNIQUE(original_url, timestamp)
+        )
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(resolution_history)")}
+    if "title" not in columns:
+        # BD anterior a la busqueda por titulo: agregar la columna y rellenarla
+        conn.execute("ALTER TABLE resolution_history ADD COLUMN title TEXT")
+        rows = conn.execute("SELECT id, original_url FROM resolution_history").fetchall()
+        conn.executemany("UPDATE resolution_history SET title = ? WHERE id = ?",
+                         [(extract_title_from_url(url), row_id) for row_id, url in rows])
+    if "timings" not in columns:
+        # JSON {paso: ms} de cada resolucion; NULL en los registros anteriores
+        conn.execute("ALTER TABLE resolution_history ADD COLUMN timings TEXT")
+
+
+def _v2_interned_urls(conn: sqlite3.Connection):
+    """URLs internadas por fingerprint y resoluciones con referencias enteras."""
+    conn.execute("""
+        CREATE TABLE urls (
+            id INTEGER PRIMARY KEY,
+            fingerprint INTEGER NOT NULL,
+            url TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX idx_urls_fingerprint ON urls (fingerprint)")
+    conn.execute("""
+        INSERT INTO urls (fingerprint, url)
+        SELECT url_fingerprint(url), url FROM (
+            SELECT original_url AS url FROM resolution_history
+            UNION SELECT resolved_url FROM resolution_history WHERE resolved_url <> ''
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE resolutions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            original_id INTEGER NOT NULL REFERENCES urls (id),
+            resolved_id INTEGER REFERENCES urls (id),
+            quality TEXT,
+            format_type TEXT,
+            provider TEXT,
+            score REAL,
+            is_favorite BOOLEAN DEFAULT 0,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            notes TEXT,
+            title TEXT,
+            timings TEXT,
+            UNIQUE (original_id, timestamp)
+        )
+    """)
+    conn.execute("""
+        INSERT INTO resolutions (id, original_id, resolved_id, quality, format_type, provider, score,
+                                 is_favorite, timestamp, notes, title, timings)
+        SELECT h.id, o.id, d.id, h.quality, h.format_type, h.provider, h.score,
+               h.is_favorite, h.timestamp, h.notes, h.title, h.timings
+        FROM resolution_history h
+        JOIN urls o ON o.fingerprint = url_fingerprint(h.original_url) AND o.url = h.original_url
+        LEFT JOIN urls d ON d.fingerprint = url_fingerprint(h.resolved_url) AND d.url = h.resolved_url
+    """)
+    # Conservar el contador de AUTOINCREMENT: los ids borrados no se reutilizan
+    seq = conn.execute("SELECT MAX(seq) FROM sqlite_sequence "
+                       "WHERE name IN ('resolution_history', 'resolutions')").fetchone()[0]
+    if seq is not None:
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'resolutions'")
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('resolutions', ?)", (seq,))
+    # Con la tabla se van sus indices y los triggers de FTS/contadores
+    conn.execute("DROP TABLE resolution_history")
+
+    conn.execute("""
+        CREATE VIEW resolution_history AS
+        SELECT r.id, o.url AS original_url, COALESCE(d.url, '') AS resolved_url,
+               r.quality, r.format_type, r.provider, r.score, r.is_favorite, r.timestamp,
+               r.notes, r.title, r.timings
+        FROM resolutions r
+        JOIN urls o ON o.id = r.original_id
+        LEFT JOIN urls d ON d.id = r.resolved_id
+    """)
+    # INSERT sobre la vista (SQL_INSERT, HistoryWriter): interna las URLs y
+    # guarda la fila con referencias. En una vista no aplican los DEFAULT
+    conn.execute(f"""
+        CREATE TRIGGER resolution_history_insert INSTEAD OF INSERT ON resolution_history BEGIN
+            {_intern("new.original_url")};
+            {_intern("new.resolved_url", where="COALESCE(new.resolved_url, '') <> ''")};
+            INSERT INTO resolutions (original_id, resolved_id, quality, format_type, provider, score,
+                                     is_favorite, timestamp, notes, title, timings)
+            VALUES ({_URL_ID.format(u="new.original_url")}, {_URL_ID.format(u="new.resolved_url")},
+                    new.quality, new.format_type, new.provider, new.score, COALESCE(new.is_favorite, 0),
+                    COALESCE(new.timestamp, CURRENT_TIMESTAMP), new.notes, new.title, new.timings);
+        END
+    """)
+
+    # Orden de las vistas: (timestamp, id) DESC. Los indices secundarios
+    # incluyen el rowid (id) al final, asi que sirven para paginar por
+    # (timestamp, id) sin ordenar. original_id ya esta indexada por UNIQUE.
+    conn.execute("CREATE INDEX idx_history_timestamp ON resolutions (timestamp)")
+    conn.execute("CREATE INDEX idx_history_favorite ON resolutions (is_favorite, timestamp)")
+    conn.execute("CREATE INDEX idx_history_provider ON resolutions (provider, timestamp)")
+
+    _create_counters(conn)
+    if _table_exists(conn, "history_fts"):
+        # Los triggers viejos se fueron con la tabla: recrearlos sobre resolutions
+        _create_fts_triggers(conn)
+        conn.execute("INSERT INTO history_fts (history_fts) VALUES ('rebuild')")
+
+
+def _v3_maintenance(conn: sqlite3.Connection):
+    """Resumen diario de las filas movidas al archivo e indice para limpiar urls."""
+    conn.execute("""
+        CREATE TABLE history_daily (
+            day TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            quality TEXT NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+            successful INTEGER NOT NULL DEFAULT 0,
+            favorites INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, provider, quality)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX idx_resolutions_resolved ON resolutions (resolved_id)")
+
+
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _v1_text_table),
+    (2, _v2_interned_urls),
+    (3, _v3_maintenance),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection):
+    """
+    Aplica las migraciones pendientes, cada una en su transaccion, y asegura
+    el indice FTS. La conexion debe tener registrada url_fingerprint()
+    (HistoryStore lo hace al abrirla).
+    """
+    for version, step in MIGRATIONS:
+        if schema_version(conn) >= version:
+            continue
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Releer: otro proceso pudo migrar mientras esperabamos el lock
+            if schema_version(conn) < version:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    _create_fts(conn)
+
+
+# ----------------------------------------------------------------------
+# Contadores y FTS
+# ----------------------------------------------------------------------
+def _counter_updates(ref: str, sign: str) -> str:
+    """Sentencias de trigger que suman (sign='+') o restan (sign='-') la fila `ref`."""
+    return "\n".join(
+        f"INSERT INTO history_counters (kind, key, n, score_sum) "
+        f"VALUES ({kind}, {key.format(r=ref)}, {sign}({n.format(r=ref)}), {sign}({score.format(r=ref)})) "
+        f"ON CONFLICT (kind, key) DO UPDATE SET n = n + excluded.n, score_sum = score_sum + excluded.score_sum;"
+        for kind, key, n, score in _COUNTERS
+    )
+
+
+def _create_counters(conn: sqlite3.Connection):
+    """Tabla de contadores para get_statistics(), mantenida por triggers y recalculada aca."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS history_counters (
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (kind, key)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("DELETE FROM history_counters")
+    conn.execute("INSERT INTO history_counters (kind, key, n, score_sum) " + SQL_COUNTER_ROWS,
+                 (MIN_TIMESTAMP, MAX_TIMESTAMP))
+    conn.execute(f"""
+        CREATE TRIGGER history_counters_insert AFTER INSERT ON resolutions BEGIN
+            {_counter_updates("new", "+")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER history_counters_delete AFTER DELETE ON resolutions BEGIN
+            {_counter_updates("old", "-")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER history_counters_update
+        AFTER UPDATE OF is_favorite, resolved_id, provider, quality, score ON resolutions BEGIN
+            {_counter_updates("old", "-")}
+            {_counter_updates("new", "+")}
+        END
+    """)
+
+
+def _fts_values(ref: str) -> str:
+    return (f"{ref}.id, (SELECT url FROM urls WHERE id = {ref}.original_id), "
+            f"(SELECT url FROM urls WHERE id = {ref}.resolved_id), {ref}.notes, {ref}.title")
+
+
+def _create_fts_triggers(conn: sqlite3.Connection):
+    columns = "rowid, original_url, resolved_url, notes, title"
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON resolutions BEGIN
+            INSERT INTO history_fts ({columns}) VALUES ({_fts_values("new")});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON resolutions BEGIN
+            INSERT INTO history_fts (history_fts, {columns}) VALUES ('delete', {_fts_values("old")});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS history_fts_update
+        AFTER UPDATE OF original_id, resolved_id, notes, title ON resolutions BEGIN
+            INSERT INTO history_fts (history_fts, {columns}) VALUES ('delete', {_fts_values("old")});
+            INSERT INTO history_fts ({columns}) VALUES ({_fts_values("new")});
+        END
+    """)
+
+
+def _create_fts(conn: sqlite3.Connection):
+    """
+    Indice FTS5 (contenido externo: lee el texto de la vista resolution_history,
+    no lo duplica) sobre URLs, notas y titulo, sincronizado por triggers. Si
+    SQLite no trae FTS5 no se crea y search_records usa LIKE.
+    """
+    if _table_exists(conn, "history_fts"):
+        return
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not _table_exists(conn, "history_fts"):
+            conn.execute("""
+                CREATE VIRTUAL TABLE history_fts USING fts5(
+                    original_url, resolved_url, notes, title,
+                    content='resolution_history', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+            _create_fts_triggers(conn)
+            # Indexar las filas que ya estaban en la BD
+            conn.execute("INSERT INTO history_fts (history_fts) VALUES ('rebuild')")
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        conn.rollback()
+        print(f"FTS5 not available, history search will use LIKE: {e}")
@@ -0,0 +1,201 @@
+"""
+history_store.py - Capa de acceso SQLite compartida por el historial.
+
+En lugar de abrir una conexion por operacion, cada hilo mantiene su propia
+conexion de larga vida a la BD (modo WAL, busy_timeout, cache de sentencias
+preparadas de sqlite3). En WAL los lectores no bloquean al escritor ni al
+reves, asi que la GUI puede leer mientras un pool de workers escribe. Hay un
+solo store por archivo de BD y el esquema se inicializa una vez por proceso,
+aunque las GUIs instancien HistoryManager muchas veces.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+
+BUSY_TIMEOUT_MS = 5000    # Espera ante un lock antes de "database is locked"
+CACHED_STATEMENTS = 256   # Sentencias preparadas por conexion (cache de sqlite3)
+
+
+def url_fingerprint(url: Optional[str]) -> Optional[int]:
+    """Fingerprint de 64 bits (blake2b, entero con signo como los INTEGER de SQLite)."""
+    if url is None:
+        return None
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def register_functions(conn: sqlite3.Connection):
+    """Funciones SQL que usa el esquema del historial (triggers de resolution_history)."""
+    conn.create_function("url_fingerprint", 1, url_fingerprint, deterministic=True)
+
+
+class _ThreadConnection:
+    """
+    Conexion de un hilo, guardada en su threading.local. Cuando el hilo
+    termina se libera el holder y su finalizador cierra la conexion.
+    """
+    __slots__ = ("conn", "release", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.release = None
+
+
+class HistoryStore:
+    """
+    Conexiones por hilo a una BD SQLite en modo WAL. La conexion de un hilo
+    se cierra sola cuando el hilo termina (los hilos cortos de Streamlit o
+    de run.io_bound no dejan conexiones abiertas).
+
+    Uso tipico:
+        store = HistoryStore.for_path("data/neo_link_resolver.db")
+        store.ensure_schema(create_tables)
+        with store.transaction() as conn:
+            conn.execute("INSERT ...", params)
+        rows = store.query("SELECT ...", params)
+    """
+
+    _registry: Dict[str, "HistoryStore"] = {}
+    _registry_lock = threading.Lock()
+
+    @classmethod
+    def for_path(cls, db_path) -> "HistoryStore":
+        """Devuelve el store compartido del archivo (lo crea la primera vez)."""
+        key = str(Path(db_path).resolve())
+        with cls._registry_lock:
+            store = cls._registry.get(key)
+            if store is None:
+                store = cls(db_path)
+                cls._registry[key] = store
+            return store
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._connections: Set[sqlite3.Connection] = set()
+        self._schemas = set()
+
+    # ------------------------------------------------------------------
+    # Conexiones
+    # ------------------------------------------------------------------
+    def connection(self) -> sqlite3.Connection:
+        """Conexion del hilo actual (se abre y configura la primera vez)."""
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            conn = self._connect()
+            holder = _ThreadConnection(conn)
+            with self._lock:
+                self._connections.add(conn)
+            holder.release = weakref.finalize(holder, self._release, conn)
+            self._local.holder = holder
+        return holder.conn
+
+    @property
+    def open_connections(self) -> int:
+        """Conexiones por hilo abiertas en este momento."""
+        with self._lock:
+            return len(self._connections)
+
+    def _release(self, conn: sqlite3.Connection):
+        with self._lock:
+            self._connections.discard(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def open_connection(self) -> sqlite3.Connection:
+        """
+        Conexion nueva, configurada como las del store pero fuera del registro
+        por hilo: la usa y la cierra quien la abre (ej: history_cache).
+        """
+        return self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # check_same_thread=False solo para que close_all() y el finalizador
+        # puedan cerrarlas; cada conexion la usa unicamente el hilo que la abrio
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            cached_statements=CACHED_STATEMENTS,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        register_functions(conn)
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        # Antes de pasar a WAL: en una BD nueva deja liberar paginas con
+        # PRAGMA incremental_vacuum; en una existente aplica en el proximo VACUUM
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        # En WAL, NORMAL es seguro ante caidas del proceso y evita un fsync por commit
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def close(self):
+        """Cierra la conexion del hilo actual."""
+        holder = getattr(self._local, "holder", None)
+        if holder is not None:
+            self._local.holder = None
+            holder.release()
+
+    def close_all(self):
+        """Cierra todas las conexiones abiertas (al terminar el proceso o en tests)."""
+        with self._lock:
+            connections, self._connections = self._connections, set()
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Esquema y consultas
+    # ------------------------------------------------------------------
+    def ensure_schema(self, create: Callable[[sqlite3.Connection], None], name: Optional[str] = None):
+        """
+        Ejecuta `create(conn)` una sola vez por store (y por `name`), dentro
+        de una transaccion. Las siguientes llamadas no tocan la BD.
+        """
+        name = name or getattr(create, "__qualname__", repr(create))
+        if name in self._schemas:
+            return
+        with self._schema_lock:
+            if name in self._schemas:
+                return
+            with self.transaction() as conn:
+                create(conn)
+            self._schemas.add(name)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Transaccion en la conexion del hilo: commit al salir, rollback si hay error."""
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        """Ejecuta una sentencia de escritura en su propia transaccion."""
+        with self.transaction() as conn:
+            return conn.execute(sql, params)
+
+    def executemany(self, sql: str, rows) -> int:
+        """Ejecuta una sentencia para muchas filas en una sola transaccion."""
+        with self.transaction() as conn:
+            return conn.executemany(sql, rows).rowcount
+
+    def query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        """Ejecuta una consulta y devuelve todas las filas."""
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params=()) -> Optional[sqlite3.Row]:
+        """Ejecuta una consulta y devuelve la primera fila (o None)."""
+        return self.connection().execute(sql, params).fetchone()
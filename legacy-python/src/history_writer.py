@@ -0,0 +1,184 @@
+"""
+history_writer.py - Escritura asincrona y por lotes del historial.
+
+Los hilos del resolver no escriben en disco: encolan la fila (cola acotada,
+sin bloquear) y un hilo escritor la agrupa con las demas en transacciones de
+varias filas. Un lote se escribe al llegar a `batch_size` filas o al vencer
+`flush_interval_s`, lo que pase primero. Si la cola esta llena la fila se
+descarta y se cuenta (nunca se bloquea al productor). Al cerrar el proceso se
+vacia la cola.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+
+class HistoryWriter:
+    """
+    Hilo escritor de filas para una sentencia INSERT de un HistoryStore.
+
+    Uso tipico:
+        writer = HistoryWriter.for_store(store, "INSERT INTO t (a, b) VALUES (?, ?)")
+        writer.submit((a, b))   # no bloquea
+        writer.flush()          # espera a que lo encolado este en disco
+    """
+
+    MAX_QUEUE = 10000
+    BATCH_SIZE = 200
+    FLUSH_INTERVAL_S = 0.5
+
+    _writers: Dict[tuple, "HistoryWriter"] = {}
+    _writers_lock = threading.Lock()
+
+    @classmethod
+    def for_store(cls, store, sql: str, **kwargs) -> "HistoryWriter":
+        """Writer compartido por (store, sentencia): un solo hilo por BD y tabla."""
+        key = (id(store), sql)
+        with cls._writers_lock:
+            writer = cls._writers.get(key)
+            if writer is None or writer.closed:
+                writer = cls(store, sql, **kwargs)
+                cls._writers[key] = writer
+            return writer
+
+    def __init__(self, store, sql: str, max_queue: int = MAX_QUEUE, batch_size: int = BATCH_SIZE,
+                 flush_interval_s: float = FLUSH_INTERVAL_S):
+        self.store = store
+        self.sql = sql
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.closed = False
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._processed = 0   # Escritas o perdidas por error: ya no estan pendientes
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.batches = 0
+        self.max_batch = 0
+
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # Productores
+    # ------------------------------------------------------------------
+    def submit(self, row: Sequence) -> bool:
+        """
+        Encola una fila sin bloquear.
+
+        Returns:
+            False si la cola estaba llena (fila descartada) o el writer cerrado.
+        """
+        row = tuple(row)
+        # closed y el put bajo el mismo lock que close(): ninguna fila puede
+        # quedar detras del centinela (nunca se escribiria y flush() esperaria)
+        with self._cond:
+            if self.closed:
+                return False
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.dropped += 1
+                return False
+            self._submitted += 1
+            return True
+
+    @property
+    def queue_depth(self) -> int:
+        """Filas pendientes de escribir (encoladas o en el lote en curso)."""
+        with self._cond:
+            return self._submitted - self._processed
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que todo lo encolado hasta ahora este escrito.
+
+        Returns:
+            True si se vacio dentro del timeout.
+        """
+        with self._cond:
+            target = self._submitted
+            return self._cond.wait_for(lambda: self._processed >= target, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Vacia la cola y detiene el hilo escritor."""
+        with self._cond:
+            if self.closed:
+                return
+            self.closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        try:
+            atexit.unregister(self.close)
+        except Exception:
+            pass
+
+    def stats(self) -> Dict:
+        """Estado del writer para logs o la GUI."""
+        return {
+            "queue_depth": self.queue_depth,
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "batches": self.batches,
+            "max_batch": self.max_batch,
+        }
+
+    # ------------------------------------------------------------------
+    # Hilo escritor
+    # ------------------------------------------------------------------
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+                if deadline is None:
+                    # El intervalo cuenta desde la primera fila del lote
+                    deadline = time.monotonic() + self.flush_interval_s
+            if batch:
+                self._write(batch)
+        try:
+            self.store.close()
+        except Exception:
+            pass
+
+    def _write(self, batch):
+        written = 0
+        try:
+            self.store.executemany(self.sql, batch)
+            written = len(batch)
+        except Exception:
+            # Una fila invalida (ej: UNIQUE) no debe tirar todo el lote; ningun
+            # error puede matar al hilo (flush() esperaria para siempre)
+            for row in batch:
+                try:
+                    self.store.execute(self.sql, row)
+                    written += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error writing history row: {e}")
+        with self._cond:
+            self.written += written
+            self.batches += 1
+            self.max_batch = max(self.max_batch, len(batch))
+            self._processed += len(batch)
+            self._cond.notify_all()
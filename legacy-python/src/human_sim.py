@@ -1,29 +1,75 @@
 """
 human_sim.py - Simula comportamiento humano en el navegador.
 Movimientos de mouse, scroll aleatorio, clicks en areas vacias, delays naturales.
+
+La simulacion completa se ejecuta como un perfil con presupuesto de tiempo
+(HumanSimProfile): mientras la pagina carga, las pausas entre acciones esperan
+a que la red quede ociosa, de modo que la simulacion se solapa con la carga en
+vez de sumarse a ella.
 """
 
 import random
 import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from config import HUMAN_SIM_NOT_REQUIRED
+
+
+@dataclass(frozen=True)
+class HumanSimProfile:
+    """Cantidad de acciones y tope total de tiempo (segundos) de una simulacion."""
+    name: str
+    moves: int
+    scrolls: int
+    clicks: int
+    budget_s: float
+
+
+PROFILES = {
+    "off":    HumanSimProfile("off", 0, 0, 0, 0.0),
+    "light":  HumanSimProfile("light", 2, 1, 1, 1.5),
+    "normal": HumanSimProfile("normal", 4, 3, 2, 3.0),
+    "heavy":  HumanSimProfile("heavy", 8, 5, 3, 6.0),
+}
+
+
+def resolve_profile(url: str, intensity: str = "normal", batch: bool = False) -> HumanSimProfile:
+    """
+    Elige el perfil de simulacion para una URL.
+    En modo batch (headless, sin usuario mirando) se omite por completo en los
+    sitios que se sabe que no la necesitan.
+    """
+    if batch and any(site in url.lower() for site in HUMAN_SIM_NOT_REQUIRED):
+        return PROFILES["off"]
+    return PROFILES.get(intensity, PROFILES["normal"])
 
 
-def random_delay(min_s=0.5, max_s=2.0):
-    """Espera un tiempo aleatorio para simular velocidad humana."""
+def random_delay(min_s=0.5, max_s=2.0, page=None):
+    """
+    Espera un tiempo aleatorio para simular velocidad humana.
+    Si se pasa `page`, espera con page.wait_for_timeout para que Playwright siga
+    despachando eventos (listeners de red, popups) durante la pausa.
+    """
     delay = random.uniform(min_s, max_s)
-    time.sleep(delay)
+    if page is not None:
+        page.wait_for_timeout(int(delay * 1000))
+    else:
+        time.sleep(delay)
+
+
+def _viewport(page) -> dict:
+    return page.viewport_size or {"width": 1280, "height": 720}
 
 
 def human_mouse_move(page, steps=5):
     """Mueve el mouse en trayectorias aleatorias por la pagina."""
-    viewport = page.viewport_size
-    if not viewport:
-        viewport = {"width": 1280, "height": 720}
+    viewport = _viewport(page)
 
     for _ in range(steps):
         x = random.randint(100, viewport["width"] - 100)
         y = random.randint(100, viewport["height"] - 100)
         page.mouse.move(x, y, steps=random.randint(5, 15))
-        random_delay(0.2, 0.8)
+        random_delay(0.2, 0.8, page)
 
 
 def human_scroll(page, scrolls=3):
@@ -35,38 +81,128 @@ def human_scroll(page, scrolls=3):
             page.mouse.wheel(0, amount)
         else:
             page.mouse.wheel(0, -amount)
-        random_delay(0.3, 1.0)
+        random_delay(0.3, 1.0, page)
 
 
 def human_click_empty(page, clicks=2):
     """Hace click en areas vacias de la pagina (no en links)."""
-    viewport = page.viewport_size
-    if not viewport:
-        viewport = {"width": 1280, "height": 720}
+    viewport = _viewport(page)
 
     for _ in range(clicks):
         # Click en zonas "seguras" (margenes)
         x = random.randint(50, viewport["width"] - 50)
         y = random.randint(50, min(200, viewport["height"] - 50))
         page.mouse.click(x, y)
-        random_delay(0.3, 0.7)
+        random_delay(0.3, 0.7, page)
 
 
-def simulate_human_behavior(page, intensity="normal"):
+def _plan_actions(profile: HumanSimProfile, viewport: dict) -> List[Tuple[str, tuple, dict, float]]:
+    """Genera la secuencia de acciones (metodo de page.mouse, args, kwargs, pausa posterior en s)."""
+    actions = []
+    for _ in range(profile.moves):
+        x = random.randint(100, viewport["width"] - 100)
+        y = random.randint(100, viewport["height"] - 100)
+        actions.append(("move", (x, y), {"steps": random.randint(5, 15)}, random.uniform(0.2, 0.8)))
+    for _ in range(profile.scrolls):
+        amount = random.randint(100, 400) * random.choice([1, -1])
+        actions.append(("wheel", (0, amount), {}, random.uniform(0.3, 1.0)))
+    for _ in range(profile.clicks):
+        x = random.randint(50, viewport["width"] - 50)
+        y = random.randint(50, min(200, viewport["height"] - 50))
+        actions.append(("click", (x, y), {}, random.uniform(0.3, 0.7)))
+    return actions
+
+
+def _as_profile(intensity) -> HumanSimProfile:
+    if isinstance(intensity, HumanSimProfile):
+        return intensity
+    return PROFILES.get(intensity, PROFILES["normal"])
+
+
+class _SimRun:
+    """
+    Plan, presupuesto y estado de red de una simulacion; simulate_human_behavior
+    solo ejecuta los pasos que devuelve steps().
+    """
+
+    def __init__(self, profile: HumanSimProfile, budget: float, viewport: dict, until_idle: bool):
+        self.profile = profile
+        self.budget = budget
+        self.actions = _plan_actions(profile, viewport)
+        self.idle = not until_idle  # Sin until_idle las pausas son siempre fijas
+        self.start = time.monotonic()
+        print(f"    [SIM] Simulating human behavior ({profile.name}, budget {budget:.1f}s)...")
+
+    @classmethod
+    def begin(cls, page, intensity, budget_s: Optional[float], until_idle: bool) -> Optional["_SimRun"]:
+        """None si no hay nada que simular (perfil 'off' o presupuesto 0)."""
+        profile = _as_profile(intensity)
+        budget = profile.budget_s if budget_s is None else budget_s
+        if budget <= 0 or profile.name == "off":
+            return None
+        return cls(profile, budget, _viewport(page), until_idle)
+
+    def remaining_ms(self) -> int:
+        """Presupuesto restante en ms enteros (menos de 1 ms cuenta como agotado)."""
+        return int((self.budget - (time.monotonic() - self.start)) * 1000)
+
+    def steps(self):
+        """
+        Itera los pasos mientras quede presupuesto:
+            ("mouse", (metodo, args, kwargs))  accion sobre page.mouse
+            ("idle", ms)   pausa esperando 'networkidle' (llamar a network_idle() si se alcanzo)
+            ("wait", ms)   pausa fija
+        Cada pausa se calcula al terminar la accion anterior.
+        """
+        for method, args, kwargs, pause in self.actions:
+            if self.remaining_ms() <= 0:
+                return
+            yield "mouse", (method, args, kwargs)
+            pause_ms = min(int(pause * 1000), self.remaining_ms())
+            if pause_ms > 0:
+                yield ("wait" if self.idle else "idle"), pause_ms
+
+    def network_idle(self):
+        """La red quedo ociosa: el resto de las pausas son fijas (las acciones siguen)."""
+        self.idle = True
+
+    def finish(self) -> float:
+        elapsed = time.monotonic() - self.start
+        print(f"    [SIM] Done ({elapsed:.1f}s).")
+        return elapsed
+
+
+def simulate_human_behavior(page, intensity="normal", budget_s: Optional[float] = None,
+                            until_idle: bool = True) -> float:
     """
-    Ejecuta una secuencia completa de comportamiento humano.
-    intensity: "light" | "normal" | "heavy"
+    Ejecuta una secuencia de comportamiento humano con tope de tiempo.
+    intensity: "off" | "light" | "normal" | "heavy" o un HumanSimProfile
+    budget_s: tope total en segundos (default: el del perfil)
+    until_idle: mientras la pagina carga, las pausas esperan 'networkidle'
+                (la carga y la simulacion se solapan); una vez ociosa la red,
+                las acciones restantes siguen con pausas fijas
+
+    Returns:
+        Segundos consumidos.
     """
-    configs = {
-        "light":  {"moves": 2, "scrolls": 1, "clicks": 1},
-        "normal": {"moves": 4, "scrolls": 3, "clicks": 2},
-        "heavy":  {"moves": 8, "scrolls": 5, "clicks": 3},
-    }
-    cfg = configs.get(intensity, configs["normal"])
-
-    print(f"    [SIM] Simulating human behavior ({intensity})...")
-    human_mouse_move(page, steps=cfg["moves"])
-    human_scroll(page, scrolls=cfg["scrolls"])
-    human_click_empty(page, clicks=cfg["clicks"])
-    random_delay(0.5, 1.5)
-    print(f"    [SIM] Done.")
+    run = _SimRun.begin(page, intensity, budget_s, until_idle)
+    if run is None:
+        return 0.0
+
+    for kind, arg in run.steps():
+        if kind == "idle":
+            try:
+                page.wait_for_load_state("networkidle", timeout=arg)
+                run.network_idle()
+            except Exception:
+                pass  # Red todavia activa: la pausa ya se consumio
+            continue
+        try:
+            if kind == "wait":
+                page.wait_for_timeout(arg)
+            else:
+                method, args, kwargs = arg
+                getattr(page.mouse, method)(*args, **kwargs)
+        except Exception:
+            break
+    return run.finish()
@@ -1,85 +1,393 @@
 """
 logger.py - Sistema de logging centralizado con soporte para GUI.
 Permite capturar logs en tiempo real y enviarlos a callbacks.
+
+Loguear nunca frena al resolver:
+    - Los mensajes van a un buffer circular acotado (los mas viejos se
+      pierden); DEBUG no se guarda salvo con buffer_level="DEBUG"
+    - Cada callback (sink) tiene su nivel minimo; un mensaje que nadie quiere
+      no se registra ni se formatea
+    - El formato (hora, paso) se arma recien cuando alguien lo lee. El
+      mensaje puede ser un callable para no armar textos caros que nadie
+      quiere: se evalua en el hilo que loguea, solo si el buffer o algun
+      callback acepta el mensaje (nunca en el hilo de despacho)
+    - Los callbacks corren en un hilo de despacho, con una cola acotada que
+      descarta lo mas viejo si un callback lento se atrasa. Los que deben
+      correr en el hilo que loguea (ej: st.write de Streamlit) se registran
+      con sync=True
+
+Cada resolucion usa su propio logger ligado (bind) con un resolution_id:
+sus mensajes llevan el id y los callbacks se suscriben por resolucion, asi
+que varias resoluciones en el mismo proceso no mezclan logs ni acumulan
+callbacks. Los callbacks del logger global siguen recibiendo todo.
+
+    job = get_logger().bind()
+    with job.subscribe(gui_callback):
+        LinkResolver(logger=job).resolve(url)
 """
 
+import atexit
 import sys
-from typing import Callable, List
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Union
+
+
+# Nivel numerico de cada level; los desconocidos cuentan como INFO
+LEVELS = {"DEBUG": 10, "INFO": 20, "STEP": 20, "SUCCESS": 25, "WARNING": 30, "ERROR": 40}
+
+Message = Union[str, Callable[[], str]]
+
+
+def level_number(level: Union[str, int]) -> int:
+    if isinstance(level, int):
+        return level
+    return LEVELS.get(level.upper(), LEVELS["INFO"])
+
+
+class LogRecord:
+    """
+    Un mensaje de log; hora y texto formateado se calculan al leerlos. Un
+    mensaje callable lo evalua _emit antes de guardar o despachar el record.
+    """
+
+    __slots__ = ("level", "levelno", "step", "resolution_id", "created", "_message", "_formatted")
+
+    def __init__(self, level: str, message: Message, step: Optional[str] = None,
+                 resolution_id: Optional[str] = None):
+        self.level = level
+        self.levelno = level_number(level)
+        self.step = step
+        self.resolution_id = resolution_id
+        self.created = time.time()
+        self._message = message
+        self._formatted: Optional[str] = None
+
+    @property
+    def message(self) -> str:
+        if callable(self._message):
+            try:
+                self._message = str(self._message())
+            except Exception as e:
+                self._message = f"<error formatting log message: {e}>"
+        return self._message
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.created).strftime("%H:%M:%S")
+
+    @property
+    def formatted(self) -> str:
+        if self._formatted is None:
+            if self.step:
+                self._formatted = f"[{self.timestamp}] [{self.step}] {self.message}"
+            else:
+                self._formatted = f"[{self.timestamp}] {self.message}"
+        return self._formatted
+
+    def to_dict(self) -> dict:
+        return {
+            "timestamp": self.timestamp,
+            "level": self.level,
+            "message": self.message,
+            "step": self.step,
+            "resolution_id": self.resolution_id,
+            "formatted": self.formatted,
+        }
+
+
+class _Sink:
+    __slots__ = ("callback", "levelno", "sync", "resolution_id")
+
+    def __init__(self, callback: Callable[[str, str], None], levelno: int, sync: bool,
+                 resolution_id: Optional[str] = None):
+        self.callback = callback
+        self.levelno = levelno
+        self.sync = sync
+        self.resolution_id = resolution_id  # None: recibe todas las resoluciones
+
+    def accepts(self, record: LogRecord) -> bool:
+        return record.levelno >= self.levelno and (
+            self.resolution_id is None or self.resolution_id == record.resolution_id)
+
+
+class _LogMethods(ABC):
+    """Atajos por nivel sobre log(level, message, step)."""
+
+    @abstractmethod
+    def log(self, level: str, message: Message, step: str = None):
+        """Registra un mensaje (ver ResolverLogger.log)."""
+
+    def info(self, message: Message, step: str = None):
+        self.log("INFO", message, step)
+
+    def debug(self, message: Message, step: str = None):
+        self.log("DEBUG", message, step)
+
+    def success(self, message: Message, step: str = None):
+        self.log("SUCCESS", message, step)
+
+    def warning(self, message: Message, step: str = None):
+        self.log("WARNING", message, step)
+
+    def error(self, message: Message, step: str = None):
+        self.log("ERROR", message, step)
+
+    def step(self, step_name: str, message: Message):
+        self.log("STEP", message, step_name)
+
+
+# Resolucion activa en el hilo (ResolutionLogger.activate): el logger global
+# etiqueta con ella lo que loguea el codigo que no recibe un logger. Es por
+# hilo y no contextvar porque el API sync de Playwright corre los callbacks
+# de eventos en otros greenlets del mismo hilo.
+_active = threading.local()
 
 
-class ResolverLogger:
+class ResolverLogger(_LogMethods):
     """
     Logger que captura todos los mensajes de print() del resolver
     y los envia a callbacks registrados (como una GUI).
     """
 
-    def __init__(self):
-        self.callbacks: List[Callable[[str, str], None]] = []
-        self.logs: List[dict] = []
+    BUFFER_SIZE = 2000   # Mensajes guardados para get_logs()
+    QUEUE_SIZE = 1000    # Mensajes pendientes de despachar a los callbacks
 
-    def register_callback(self, callback: Callable[[str, str], None]):
+    def __init__(self, buffer_size: int = BUFFER_SIZE, buffer_level: Union[str, int] = "INFO",
+                 queue_size: int = QUEUE_SIZE):
+        self.buffer_level = level_number(buffer_level)
+        self.logs: Deque[LogRecord] = deque(maxlen=buffer_size)
+        self._sinks: List[_Sink] = []
+        self._min_level = self.buffer_level
+
+        self._queue: Deque[LogRecord] = deque(maxlen=queue_size)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._queued = 0
+        self._processed = 0   # Despachados o descartados: ya no estan pendientes
+        self.dropped = 0
+
+    @property
+    def callbacks(self) -> List[Callable[[str, str], None]]:
+        return [sink.callback for sink in self._sinks]
+
+    def register_callback(self, callback: Callable[[str, str], None], level: Union[str, int] = "DEBUG",
+                          sync: bool = False, resolution_id: Optional[str] = None):
         """
         Registra un callback que sera llamado con cada nuevo log.
         Firma: callback(level: str, message: str)
+
+        Args:
+            level: Nivel minimo que recibe este callback
+            sync: True para llamarlo en el hilo que loguea (por defecto va
+                  al hilo de despacho y nunca bloquea al resolver)
+            resolution_id: Solo mensajes de esa resolucion (None = todos).
+                  Mejor via bind(): ResolutionLogger.subscribe()
         """
-        self.callbacks.append(callback)
+        with self._cond:
+            self._sinks = self._sinks + [_Sink(callback, level_number(level), sync, resolution_id)]
+            self._update_min_level()
+        if not sync:
+            self._ensure_thread()
+
+    def unregister_callback(self, callback: Callable[[str, str], None], resolution_id: Optional[str] = None):
+        """Quita un callback registrado (solo el de `resolution_id` si se indica; nada si no estaba)."""
+        with self._cond:
+            self._sinks = [sink for sink in self._sinks
+                           if sink.callback is not callback
+                           or (resolution_id is not None and sink.resolution_id != resolution_id)]
+            self._update_min_level()
+
+    def _update_min_level(self):
+        self._min_level = min([self.buffer_level] + [sink.levelno for sink in self._sinks])
 
-    def log(self, level: str, message: str, step: str = None):
+    def bind(self, resolution_id: Optional[str] = None) -> "ResolutionLogger":
+        """Logger de una resolucion (id nuevo si no se indica)."""
+        return ResolutionLogger(self, resolution_id or uuid.uuid4().hex[:8])
+
+    def log(self, level: str, message: Message, step: str = None):
         """
         Registra un mensaje de log.
-        level: "INFO", "SUCCESS", "WARNING", "ERROR", "STEP"
+        level: "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "STEP"
+        message: Texto, o callable que lo arma (solo se llama, en este hilo, si
+                 el buffer o algun callback acepta el mensaje)
         """
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # Formato del mensaje
-        if step:
-            formatted = f"[{timestamp}] [{step}] {message}"
-        else:
-            formatted = f"[{timestamp}] {message}"
-
-        # Guardar en historial
-        log_entry = {
-            "timestamp": timestamp,
-            "level": level,
-            "message": message,
-            "step": step,
-            "formatted": formatted,
-        }
-        self.logs.append(log_entry)
+        active = getattr(_active, "logger", None)
+        self._emit(level, message, step, active.resolution_id if active is not None else None)
 
-        # Notificar a todos los callbacks
-        for callback in self.callbacks:
-            try:
-                callback(level, formatted)
-            except Exception as e:
-                print(f"Error in logger callback: {e}", file=sys.stderr)
+    def _emit(self, level: str, message: Message, step: Optional[str], resolution_id: Optional[str]):
+        levelno = level_number(level)
+        if levelno < self._min_level:
+            return
+        record = LogRecord(level, message, step, resolution_id)
+        buffered = levelno >= self.buffer_level
+        sinks = [sink for sink in self._sinks if sink.accepts(record)]
+        if not buffered and not sinks:
+            return
+        # El callable puede tocar objetos del hilo que loguea (ej: Playwright)
+        record.message
+        if buffered:
+            self.logs.append(record)
 
-    def info(self, message: str, step: str = None):
-        self.log("INFO", message, step)
+        dispatch = False
+        for sink in sinks:
+            if sink.sync:
+                self._call(sink, record)
+            else:
+                dispatch = True
+        if dispatch:
+            with self._cond:
+                if len(self._queue) == self._queue.maxlen:
+                    # Cola llena: se pierde el mas viejo, nunca se espera
+                    self.dropped += 1
+                    self._processed += 1
+                self._queue.append(record)
+                self._queued += 1
+                self._cond.notify_all()
 
-    def debug(self, message: str, step: str = None):
-        self.log("DEBUG", message, step)
+    def clear(self, resolution_id: Optional[str] = None):
+        """Limpia el historial de logs (solo los de `resolution_id` si se indica)."""
+        if resolution_id is None:
+            self.logs.clear()
+            return
+        kept = [record for record in list(self.logs) if record.resolution_id != resolution_id]
+        self.logs.clear()
+        self.logs.extend(kept)
 
-    def success(self, message: str, step: str = None):
-        self.log("SUCCESS", message, step)
+    def get_logs(self) -> List[dict]:
+        """Retorna los logs guardados (los ultimos `buffer_size`)."""
+        return [record.to_dict() for record in list(self.logs)]
 
-    def warning(self, message: str, step: str = None):
-        self.log("WARNING", message, step)
+    # ------------------------------------------------------------------
+    # Despacho a los callbacks
+    # ------------------------------------------------------------------
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que los callbacks hayan recibido todo lo logueado hasta ahora.
 
-    def error(self, message: str, step: str = None):
-        self.log("ERROR", message, step)
+        Returns:
+            True si se vacio la cola dentro del timeout.
+        """
+        with self._cond:
+            target = self._queued
+            return self._cond.wait_for(lambda: self._processed >= target, timeout=timeout)
 
-    def step(self, step_name: str, message: str):
-        self.log("STEP", message, step_name)
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "buffered": len(self.logs),
+                "pending": self._queued - self._processed,
+                "dropped": self.dropped,
+                "callbacks": len(self._sinks),
+            }
+
+    def _ensure_thread(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="logger-dispatch", daemon=True)
+            self._thread.start()
+        atexit.register(self.flush, 2.0)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue)
+                record = self._queue.popleft()
+            for sink in self._sinks:
+                if not sink.sync and sink.accepts(record):
+                    self._call(sink, record)
+            with self._cond:
+                self._processed += 1
+                self._cond.notify_all()
+
+    @staticmethod
+    def _call(sink: _Sink, record: LogRecord):
+        try:
+            sink.callback(record.level, record.formatted)
+        except Exception as e:
+            print(f"Error in logger callback: {e}", file=sys.stderr)
+
+
+class ResolutionLogger(_LogMethods):
+    """
+    Logger de una resolucion: mismo API que ResolverLogger, con sus mensajes
+    etiquetados con `resolution_id` y callbacks que solo reciben los suyos.
+    Comparte buffer, niveles y el hilo de despacho del logger global.
+    """
+
+    def __init__(self, parent: ResolverLogger, resolution_id: str):
+        self.parent = parent
+        self.resolution_id = resolution_id
+        self._callbacks: List[Callable[[str, str], None]] = []
+
+    def log(self, level: str, message: Message, step: str = None):
+        self.parent._emit(level, message, step, self.resolution_id)
+
+    def bind(self, resolution_id: Optional[str] = None) -> "ResolutionLogger":
+        return self if resolution_id in (None, self.resolution_id) else self.parent.bind(resolution_id)
+
+    def register_callback(self, callback: Callable[[str, str], None], level: Union[str, int] = "DEBUG",
+                          sync: bool = False):
+        """Callback que solo recibe los mensajes de esta resolucion."""
+        self.parent.register_callback(callback, level, sync, resolution_id=self.resolution_id)
+        self._callbacks.append(callback)
+
+    def unregister_callback(self, callback: Callable[[str, str], None]):
+        self.parent.unregister_callback(callback, self.resolution_id)
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    @contextmanager
+    def subscribe(self, callback: Callable[[str, str], None], level: Union[str, int] = "DEBUG",
+                  sync: bool = False, flush_timeout: float = 2.0) -> Iterator["ResolutionLogger"]:
+        """
+        Suscribe `callback` mientras dura el bloque; al salir espera (hasta
+        `flush_timeout`) a que le lleguen los mensajes pendientes y lo quita.
+        """
+        self.register_callback(callback, level, sync)
+        try:
+            yield self
+        finally:
+            if not sync:
+                self.parent.flush(flush_timeout)
+            self.unregister_callback(callback)
+
+    @contextmanager
+    def activate(self) -> Iterator["ResolutionLogger"]:
+        """
+        Mientras dura el bloque, lo que se loguea en este hilo por el logger
+        global (modulos que no reciben un logger) queda etiquetado con esta
+        resolucion.
+        """
+        previous = getattr(_active, "logger", None)
+        _active.logger = self
+        try:
+            yield self
+        finally:
+            _active.logger = previous
+
+    def close(self):
+        """Quita los callbacks que quedaron registrados."""
+        for callback in list(self._callbacks):
+            self.unregister_callback(callback)
 
     def clear(self):
-        """Limpia el historial de logs."""
-        self.logs.clear()
+        """Limpia los logs de esta resolucion."""
+        self.parent.clear(self.resolution_id)
 
     def get_logs(self) -> List[dict]:
-        """Retorna todos los logs registrados."""
-        return self.logs.copy()
+        """Logs guardados de esta resolucion."""
+        return [record.to_dict() for record in list(self.parent.logs)
+                if record.resolution_id == self.resolution_id]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return self.parent.flush(timeout)
 
 
 # Instancia global
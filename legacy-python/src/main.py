@@ -5,6 +5,7 @@ y encuentra el mejor link segun criterios del usuario.
 
 Usage:
     python main.py <url> [--quality 1080p] [--format WEB-DL] [--provider utorrent]
+    python main.py --history [N] [--favorites]
 
 Examples:
     python main.py https://www.peliculasgd.net/bob-esponja-...
@@ -13,11 +14,23 @@ Examples:
 
 import sys
 import argparse
+import itertools
 from playwright.sync_api import sync_playwright
 from config import SearchCriteria
 from adapters import get_adapter
 
 
+def non_negative_int(value: str) -> int:
+    """Tipo de argparse: entero >= 0."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or greater: {number}")
+    return number
+
+
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
@@ -25,6 +38,7 @@ def parse_args():
     )
     parser.add_argument(
         "url",
+        nargs="?",
         help="URL of the movie page to resolve"
     )
     parser.add_argument(
@@ -53,12 +67,60 @@ def parse_args():
         action="store_true",
         help="Run browser in headless mode (no GUI)"
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Batch mode: skip human simulation on sites known not to require it"
+    )
+    parser.add_argument(
+        "--screenshots",
+        choices=["off", "on-error", "per-step"],
+        default="on-error",
+        help="Screenshot policy: off, on-error or per-step. Default: on-error"
+    )
+    parser.add_argument(
+        "--history",
+        nargs="?",
+        type=non_negative_int,
+        const=20,
+        metavar="N",
+        help="Show the N most recent history records (default 20) and exit"
+    )
+    parser.add_argument(
+        "--favorites",
+        action="store_true",
+        help="With --history: show only favorites"
+    )
+
+    args = parser.parse_args()
+    if args.url is None and args.history is None:
+        parser.error("a URL is required (or use --history)")
+    return args
 
-    return parser.parse_args()
+
+def print_history(limit: int, favorites_only: bool = False):
+    """Imprime los registros mas recientes (lectura perezosa por paginas)."""
+    from history_manager import HistoryManager
+    manager = HistoryManager()
+    records = itertools.islice(
+        manager.iter_records(favorites_only=favorites_only, page_size=max(1, min(limit, 500))), limit
+    )
+    shown = 0
+    for record in records:
+        star = "*" if record.is_favorite else " "
+        print(f"{star} {record.timestamp[:19]}  {record.provider or '-':12s} {record.quality or '-':6s} "
+              f"{record.score:5.1f}  {record.original_url}")
+        print(f"    -> {record.resolved_url}")
+        shown += 1
+    if not shown:
+        print("No history records.")
 
 
 def main():
     args = parse_args()
+    if args.history is not None:
+        print_history(args.history, favorites_only=args.favorites)
+        return
 
     print("=" * 70)
     print(" Neo-Link-Resolver v0.3 - Intelligent Multi-Site Resolver")
@@ -82,7 +144,8 @@ def main():
 
     # Usar LinkResolver (Centraliza la lógica de Playwright, Stealth y Analizadores)
     from resolver import LinkResolver
-    resolver = LinkResolver(headless=args.headless)
+    resolver = LinkResolver(headless=args.headless, batch_mode=args.batch,
+                            screenshot_policy=args.screenshots)
     
     try:
         result = resolver.resolve(
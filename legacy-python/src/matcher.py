@@ -3,9 +3,16 @@ matcher.py - Motor de ranking de links segun criterios del usuario.
 Encuentra el mejor link entre multiples opciones.
 """
 
+import heapq
+import itertools
 from dataclasses import dataclass
-from typing import List
-from config import SearchCriteria, QUALITY_PRIORITY, FORMAT_PRIORITY, PROVIDER_PRIORITY
+from typing import Any, Iterable, List, Optional, Tuple
+from config import SearchCriteria
+from release_tokenizer import tokenize
+
+
+# Datos que score_link puede encontrar en el texto/URL de un candidato
+TEXT_FIELDS = ("quality", "format", "language")
 
 
 @dataclass
@@ -34,37 +41,16 @@ class LinkMatcher:
         """
         Parsea un link y extrae informacion (proveedor, calidad, formato).
         """
-        text_lower = text.lower()
-        url_lower = url.lower()
-        combined = f"{text_lower} {url_lower}"
-
-        # Detectar proveedor
-        provider = "other"
-        for p in PROVIDER_PRIORITY:
-            if p in url_lower:
-                provider = p
-                break
-
-        # Detectar calidad
-        quality = ""
-        for q in QUALITY_PRIORITY:
-            if q.lower() in combined:
-                quality = q
-                break
-
-        # Detectar formato
-        format_type = ""
-        for f in FORMAT_PRIORITY:
-            if f.lower() in combined:
-                format_type = f
-                break
+        # Un solo tokenizador para calidad/formato (texto + URL) y proveedor (URL)
+        meta = tokenize(f"{text} {url}")
+        provider = tokenize(url).provider or "other"
 
         return LinkOption(
             url=url,
             text=text,
             provider=provider,
-            quality=quality,
-            format=format_type,
+            quality=meta.quality or "",
+            format=meta.format or "",
         )
 
     def score_link(self, link: LinkOption) -> float:
@@ -128,3 +114,89 @@ class LinkMatcher:
         """
         options = [self.parse_link(lnk["url"], lnk["text"]) for lnk in raw_links]
         return self.rank_links(options)
+
+    def max_score(self, shows: Iterable[str] = TEXT_FIELDS) -> float:
+        """
+        Score maximo alcanzable con los criterios actuales (un link que cumple
+        todo). Sirve para cortar la busqueda en cuanto aparece.
+
+        Args:
+            shows: Que datos (TEXT_FIELDS) puede mostrar el texto de los
+                   candidatos. Un criterio que el texto nunca muestra no suma
+                   (ej: Hackstore solo da "proveedor (calidad)": ni formato
+                   ni idioma), si no el maximo seria inalcanzable
+        """
+        shows = set(shows)
+        score = 0.0
+        if self.criteria.quality and "quality" in shows:
+            score += 40
+        if self.criteria.format and "format" in shows:
+            score += 30
+        # El proveedor siempre se conoce (URL o el que infiere el adaptador)
+        best_provider = 100 if self.criteria.preferred_providers else 10
+        score += (best_provider / 100) * 30
+        # Bonus de idioma: sin idioma buscado se suma siempre
+        if not self.criteria.language or "language" in shows:
+            score += 10
+        return score
+
+
+class StreamingLinkMatcher(LinkMatcher):
+    """
+    Variante incremental de LinkMatcher: acepta candidatos a medida que la
+    extraccion los descubre y mantiene solo los top-k en un heap. `perfect`
+    se activa en cuanto llega un link con el score maximo alcanzable, para
+    que el adaptador deje de expandir y hacer click.
+    """
+
+    def __init__(self, criteria: SearchCriteria, k: int = 5, shows: Iterable[str] = TEXT_FIELDS):
+        super().__init__(criteria)
+        self.k = k
+        self.seen = 0
+        self._max_score = self.max_score(shows)
+        self._heap: List[Tuple[float, float, int, LinkOption, Any]] = []
+        self._order = itertools.count()
+
+    def add(self, url: str, text: str, provider: Optional[str] = None, payload: Any = None,
+            tiebreak: float = 0.0) -> LinkOption:
+        """
+        Parsea, puntua y ofrece un candidato.
+
+        Args:
+            provider: Proveedor conocido si la URL no lo revela (ej: "btn_click")
+            payload: Dato asociado que se devuelve junto al LinkOption
+            tiebreak: Desempate entre scores iguales (mayor primero)
+        """
+        option = self.parse_link(url, text)
+        if option.provider == "other" and provider:
+            option.provider = provider
+        return self.add_option(option, payload, tiebreak)
+
+    def add_option(self, option: LinkOption, payload: Any = None, tiebreak: float = 0.0) -> LinkOption:
+        """Puntua y ofrece un LinkOption ya parseado."""
+        option.score = self.score_link(option)
+        self.seen += 1
+        # Entre iguales gana el que llego primero (orden negativo)
+        entry = (option.score, tiebreak, -next(self._order), option, payload)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:3] > self._heap[0][:3]:
+            heapq.heapreplace(self._heap, entry)
+        return option
+
+    @property
+    def perfect(self) -> bool:
+        """True si ya llego un link con el score maximo alcanzable."""
+        best = self.best()
+        return best is not None and best[0].score >= self._max_score
+
+    def best(self) -> Optional[Tuple[LinkOption, Any]]:
+        """Mejor (LinkOption, payload) visto hasta ahora."""
+        if not self._heap:
+            return None
+        entry = max(self._heap, key=lambda e: e[:3])
+        return entry[3], entry[4]
+
+    def top(self) -> List[Tuple[LinkOption, Any]]:
+        """Los top-k (LinkOption, payload) ordenados de mejor a peor."""
+        return [(e[3], e[4]) for e in sorted(self._heap, key=lambda e: e[:3], reverse=True)]
@@ -0,0 +1,188 @@
+"""
+navigation_capture.py - Captura el destino de un click sin cargarlo.
+
+Un NavigationCapture se engancha a una pagina y registra el primer destino
+fuera del sitio de origen que produce un click: la navegacion del frame
+principal (abortada en el route antes de cargar), la cabecera Location de
+una respuesta 3xx, o la URL de un popup. Con el contexto, la navegacion del
+popup tambien se captura en el route (y se aborta) en vez de esperar a que
+cargue. Permite abrir varias pestañas en el mismo contexto (mismas cookies),
+hacer click en un candidato en cada una y esperar a todas a la vez.
+"""
+
+import time
+from typing import Callable, List, Optional
+from urllib.parse import urljoin
+from wait_tuner import site_key
+
+
+class NavigationCapture:
+    """
+    Registra el primer destino externo de navegacion de una pagina.
+    """
+
+    def __init__(self, page, home_url: str, ignore: Optional[Callable[[str], bool]] = None):
+        """
+        Args:
+            page: Pagina de Playwright (sync) en la que se hara el click
+            home_url: URL de origen; las navegaciones dentro de su host se dejan pasar
+            ignore: Predicado opcional para descartar destinos (ej: dominios de ads)
+        """
+        self.page = page
+        self.home_host = site_key(home_url)
+        self.ignore = ignore
+        self.target: Optional[str] = None
+        self.source: Optional[str] = None  # "navigation" | "redirect" | "popup"
+        self._popups: List = []
+        self._context = None
+
+    def attach(self, context=None):
+        """
+        Instala el route y los listeners. Registrar despues del bloqueo de ads
+        para que las requests no capturadas sigan pasando por el (fallback).
+
+        Args:
+            context: Si se pasa, las navegaciones de los popups abiertos por la
+                     pagina se capturan en un route del contexto y se abortan
+        """
+        self.page.route("**/*", self._handle_route)
+        self.page.on("response", self._on_response)
+        self.page.on("popup", self._popups.append)
+        if context is not None:
+            self._context = context
+            context.route("**/*", self._handle_popup_route)
+
+    def detach(self):
+        """Quita routes y listeners y cierra los popups; la pagina sigue abierta."""
+        try:
+            self.page.unroute("**/*", self._handle_route)
+            self.page.remove_listener("response", self._on_response)
+            self.page.remove_listener("popup", self._popups.append)
+        except Exception:
+            pass
+        if self._context is not None:
+            try:
+                self._context.unroute("**/*", self._handle_popup_route)
+            except Exception:
+                pass
+            self._context = None
+        self.close_popups()
+
+    def _is_away(self, url: str) -> bool:
+        if not url or not url.startswith("http"):
+            return False
+        host = site_key(url)
+        if not host or host == self.home_host or host.endswith("." + self.home_host):
+            return False
+        return not (self.ignore and self.ignore(url))
+
+    def _record(self, url: str, source: str):
+        if self.target is None:
+            self.target = url
+            self.source = source
+
+    def _handle_route(self, route):
+        request = route.request
+        try:
+            is_main_nav = request.is_navigation_request() and request.frame == self.page.main_frame
+        except Exception:
+            is_main_nav = False
+        if self.target is None and is_main_nav and self._is_away(request.url):
+            # Ya tenemos el destino: no hace falta cargarlo
+            self._record(request.url, "navigation")
+            route.abort("aborted")
+            return
+        route.fallback()
+
+    def _handle_popup_route(self, route):
+        # Llega por el contexto: las routes de pagina (ads) ya hicieron fallback
+        request = route.request
+        try:
+            frame = request.frame
+            popup = frame.page
+            is_popup_nav = (request.is_navigation_request() and frame.parent_frame is None
+                            and popup != self.page and popup.opener() == self.page)
+        except Exception:
+            is_popup_nav = False
+        if self.target is None and is_popup_nav and self._is_away(request.url):
+            # El popup no llega a renderizar: basta con la URL
+            self._record(request.url, "popup")
+            if popup not in self._popups:
+                self._popups.append(popup)
+            route.abort("aborted")
+            return
+        route.fallback()
+
+    def _on_response(self, response):
+        # Los redirects no vuelven a pasar por el route: leer Location
+        try:
+            if 300 <= response.status < 400 and response.request.is_navigation_request():
+                location = response.headers.get("location")
+                if location:
+                    url = urljoin(response.url, location)
+                    if self._is_away(url):
+                        self._record(url, "redirect")
+        except Exception:
+            pass
+
+    def poll(self) -> Optional[str]:
+        """Devuelve el destino capturado (revisando popups abiertos) o None."""
+        if self.target is None:
+            for popup in self._popups:
+                try:
+                    url = popup.url
+                except Exception:
+                    continue
+                if self._is_away(url):
+                    self._record(url, "popup")
+                    break
+        return self.target
+
+    def close_popups(self):
+        """Cierra los popups abiertos por la pagina."""
+        for p in list(self._popups):
+            try:
+                p.close()
+            except Exception:
+                pass
+        # Misma lista: el listener "popup" sigue agregando en ella
+        self._popups.clear()
+
+    def close(self):
+        """Cierra los popups y la pagina (aborta cualquier carga pendiente)."""
+        if self._context is not None:
+            try:
+                self._context.unroute("**/*", self._handle_popup_route)
+            except Exception:
+                pass
+            self._context = None
+        self.close_popups()
+        try:
+            self.page.close()
+        except Exception:
+            pass
+
+
+def wait_for_captures(captures: List[NavigationCapture], timeout_ms: int, tick_ms: int = 100,
+                      bus=None) -> int:
+    """
+    Espera hasta que todas las capturas tengan destino o venza el tiempo.
+    El tiempo total es el del click mas lento, no la suma. Con un
+    ResolutionBus tambien termina en cuanto hay link final.
+
+    Returns:
+        Numero de capturas con destino.
+    """
+    pending = [c for c in captures if c.poll() is None]
+    deadline = time.monotonic() + timeout_ms / 1000
+    while pending and time.monotonic() < deadline:
+        if bus and bus.done:
+            break
+        try:
+            # Mantener vivo el despacho de eventos de Playwright
+            pending[0].page.wait_for_timeout(tick_ms)
+        except Exception:
+            pending.pop(0)
+            continue
+        pending = [c for c in pending if c.poll() is None]
+    return sum(1 for c in captures if c.target)
@@ -6,6 +6,7 @@ Detecta y bloquea ads, captura redirects y encuentra links de descarga en el tr
 import re
 import json
 import time
+import weakref
 from pathlib import Path
 from typing import List, Dict, Optional, Set
 from urllib.parse import urlparse, urljoin
@@ -18,12 +19,19 @@ class NetworkAnalyzer:
     Implementa un filtrado básico tipo uBlock Origin Lite (Basic).
     """
     
-    def __init__(self, config_path: str = "config/ad_domains.json"):
-        self.logger = get_logger()
+    def __init__(self, config_path: str = "config/ad_domains.json", bus=None,
+                 abort_download_navigations: bool = True, logger=None):
+        self.logger = logger or get_logger()  # Logger de la resolucion (ResolutionLogger) o el global
+        self.bus = bus  # ResolutionBus opcional: publica el primer link de descarga confiable
+        # El ultimo salto a mega/drive/mediafire solo interesa por su URL: no cargarlo
+        self.abort_download_navigations = abort_download_navigations
         self.intercepted_requests = 0
         self.blocked_requests = 0
+        self.aborted_downloads = 0
         self.captured_links: List[Dict] = []
         self.seen_urls: Set[str] = set()
+        # Paginas cuyo trafico solo pasa por el bloqueo de ads (ver exclude_page)
+        self._excluded_pages = weakref.WeakSet()
         
         # Patrones de filtrado "Basic+" (inspirado en EasyList/uBOL/uBlock)
         self.ad_patterns = [
@@ -108,18 +116,30 @@ class NetworkAnalyzer:
             
         return False
 
+    @staticmethod
+    def _host_in(host: str, domains: List[str]) -> bool:
+        """True si `host` es uno de `domains` o un subdominio suyo."""
+        host = host.lower().rstrip(".")
+        return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+    def _url_host_in(self, url: str, domains: List[str]) -> bool:
+        # Por hostname: un acortador con "mega.nz" en el query no es un host de descarga
+        try:
+            host = urlparse(url).hostname or ""
+        except ValueError:
+            return False
+        return bool(host) and self._host_in(host, domains)
+
     def is_shortener_url(self, url: str) -> bool:
         """Verifica si una URL pertenece a un acortador de enlaces."""
-        url_lower = url.lower()
-        return any(domain in url_lower for domain in self.shortener_domains)
+        return self._url_host_in(url, self.shortener_domains)
 
     def is_download_url(self, url: str) -> bool:
         """Verifica si una URL es de un proveedor de descargas válido."""
-        url_lower = url.lower()
         # Evitar falsos positivos con dominios de ads que contienen palabras parecidas
         if self.is_ad_url(url):
             return False
-        return any(domain in url_lower for domain in self.download_domains)
+        return self._url_host_in(url, self.download_domains)
 
     def get_basic_blocking_script(self) -> str:
         """
@@ -186,12 +206,34 @@ class NetworkAnalyzer:
         page.on("response", self._handle_response)
         self.logger.info("Network monitoring enabled for download links")
 
+    def exclude_page(self, page: Page):
+        """
+        El trafico de `page` sigue pasando por el bloqueo de ads, pero no se
+        captura ni se publica en el bus. Para pestañas auxiliares (ej: las de
+        captura de candidatos de hackstore) cuyo destino no es el resultado.
+        """
+        self._excluded_pages.add(page)
+
+    def _is_excluded(self, message) -> bool:
+        """True si la request/respuesta viene de una pagina excluida."""
+        if not self._excluded_pages:
+            return False
+        try:
+            return message.frame.page in self._excluded_pages
+        except Exception:
+            return False
+
     def _handle_route(self, route: Route):
         """Decide si permitir o bloquear una request (uBOL Basic efficiency)."""
         request = route.request
         url = request.url
         resource_type = request.resource_type
         self.intercepted_requests += 1
+
+        # Ya hay link final: no tiene sentido cargar nada mas
+        if self.bus and self.bus.done:
+            route.abort("aborted")
+            return
         
         # Bloquear dominios de ads/trackers conocidos
         if self.is_ad_url(url):
@@ -200,6 +242,19 @@ class NetworkAnalyzer:
             route.abort("aborted") # Usar error de bloqueo estándar
             return
 
+        # Navegacion del frame principal a un host de descarga: la URL es el
+        # resultado, la pagina (pesada) no hace falta
+        if self.abort_download_navigations and self._is_main_frame_navigation(request) \
+                and self.is_download_url(url) and not self._is_excluded(request):
+            self.aborted_downloads += 1
+            self.logger.info(f"Captured navigation to download host (not loaded): {url[:80]}...")
+            if url not in self.seen_urls:
+                self._add_captured_link(url, "Navigation (aborted)", confident=True)
+            elif self.bus:
+                self.bus.publish(url, "network: Navigation (aborted)")
+            route.abort("aborted")
+            return
+
         # Bloqueo de tipos de recursos innecesarios si son de terceros
         # (Esto imita reglas de bloqueo de medios de uBOL)
         blocked_types = ["image", "media", "font"]
@@ -215,7 +270,7 @@ class NetworkAnalyzer:
                 # Bloquear multimedia de terceros que no sea de dominios de descarga o el sitio mismo
                 if request_domain and page_domain and request_domain != page_domain:
                     # Permitir si es un dominio de descarga conocido
-                    if not any(d in request_domain for d in self.download_domains):
+                    if not self._url_host_in(url, self.download_domains):
                         # Permitir google (para captchas o perfiles)
                         if "google" not in request_domain:
                             self.blocked_requests += 1
@@ -223,12 +278,29 @@ class NetworkAnalyzer:
                             return
             except: pass
 
-        route.continue_()
+        # fallback (no continue_): las routes del contexto (capturas de popups)
+        # tambien ven la request; sin otra route equivale a continuar
+        route.fallback()
+
+    def _is_main_frame_navigation(self, request: Request) -> bool:
+        """True si la request es la navegacion del documento principal de una pagina."""
+        try:
+            return request.is_navigation_request() and request.frame.parent_frame is None
+        except Exception:
+            return False
 
     def _handle_response(self, response: Response):
         """Analiza respuestas en busca de links de descarga."""
+        if self._is_excluded(response):
+            return
         url = response.url
         status = response.status
+        # Solo las navegaciones (documento principal o redirect) son confiables:
+        # un script o imagen servido desde mega.nz no es el link final
+        try:
+            is_navigation = response.request.is_navigation_request()
+        except Exception:
+            is_navigation = False
         
         # 1. Si el status es redirect (3xx)
         if 300 <= status < 400:
@@ -241,21 +313,23 @@ class NetworkAnalyzer:
                 
                 if self.is_download_url(location) and location not in self.seen_urls:
                     self.logger.info(f"Captured redirect to download link: {location[:80]}...")
-                    self._add_captured_link(location, f"Redirect ({status})")
+                    self._add_captured_link(location, f"Redirect ({status})", confident=is_navigation)
 
         # 2. Si el URL mismo es de descarga (directo)
         elif self.is_download_url(url) and url not in self.seen_urls:
             self.logger.info(f"Captured direct download link: {url[:80]}...")
-            self._add_captured_link(url, "Direct Network Traffic")
+            self._add_captured_link(url, "Direct Network Traffic", confident=is_navigation)
 
-    def _add_captured_link(self, url: str, source: str):
-        """Registra un link capturado."""
+    def _add_captured_link(self, url: str, source: str, confident: bool = False):
+        """Registra un link capturado; si es confiable lo publica en el bus."""
         self.seen_urls.add(url)
         self.captured_links.append({
             'url': url,
             'source': source,
             'timestamp': __import__('time').time()
         })
+        if confident and self.bus:
+            self.bus.publish(url, f"network: {source}")
 
     def analyze_dom_links(self, page: Page) -> List[Dict]:
         """
@@ -360,5 +434,6 @@ class NetworkAnalyzer:
             'intercepted': self.intercepted_requests,
             'blocked': self.blocked_requests,
             'captured': len(self.captured_links),
+            'aborted_downloads': self.aborted_downloads,
             'efficiency': f"{(self.blocked_requests / self.intercepted_requests * 100):.1f}%" if self.intercepted_requests > 0 else "0%"
         }
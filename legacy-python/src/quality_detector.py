@@ -2,12 +2,12 @@
 quality_detector.py - Detecta calidades disponibles de una URL de película
 """
 
-import re
 import time
 from typing import List, Dict
 from playwright.sync_api import sync_playwright
 from config import TIMEOUT_NAV
 from logger import get_logger
+from release_tokenizer import tokenize
 
 
 class QualityDetector:
@@ -67,23 +67,18 @@ class QualityDetector:
                 ".quality", ".calidad", ".btn-download", ".dl-link", ".server-item"
             ]
             
-            elements = page.query_selector_all(", ".join(selectors))
-            
-            # 2. PATRONES DE CALIDAD (Regular Expressions)
-            # Calidades (con o sin 'p')
-            q_regex = r"(2160p|4K|1080p|720p|480p|360p|DVD[\s-]?Rip|BD[\s-]?Rip|BR[\s-]?Rip|HD[\s-]?Rip|FULL[\s-]?HD|HD|4K[\s-]?UHD)"
-            # Formatos
-            f_regex = r"(WEB-DL|WEB-dl|BluRay|Blu-Ray|REPACK|REMUX|IMAX|X264|H264|HEVC|X265)"
-            
+            # Textos de todos los elementos en una sola evaluacion
+            dom_texts = page.evaluate(
+                "(sel) => Array.from(document.querySelectorAll(sel)).map(el => (el.innerText || '').trim()).filter(t => t)",
+                ", ".join(selectors),
+            )
+
+            # 2. TOKENIZADOR COMPARTIDO (release_tokenizer) para calidad y formato
             seen_texts = set()
             
             # NUEVO: Analizar URL
             texts_to_analyze = [{"text": url, "source": "URL"}]
-            for el in elements:
-                try:
-                    t = el.inner_text().strip()
-                    if t: texts_to_analyze.append({"text": t, "source": "DOM"})
-                except: continue
+            texts_to_analyze.extend({"text": t, "source": "DOM"} for t in dom_texts)
 
             for entry in texts_to_analyze:
                 try:
@@ -94,28 +89,11 @@ class QualityDetector:
                     
                     seen_texts.add(text)
                     
-                    # Buscar coincidencia de calidad
-                    q_match = re.search(q_regex, text, re.I)
-                    if q_match:
-                        raw_quality = q_match.group(1)
-                        
-                        # Normalizar calidad
-                        quality_norm = "1080p" 
-                        q_lower = raw_quality.lower()
-                        if "2160" in q_lower or "4k" in q_lower: quality_norm = "2160p"
-                        elif "1080" in q_lower or "full hd" in q_lower: quality_norm = "1080p"
-                        elif "720" in q_lower: quality_norm = "720p"
-                        elif "480" in q_lower or "dvd" in q_lower: quality_norm = "480p"
-                        
-                        # Buscar formato
-                        f_match = re.search(f_regex, text, re.I)
-                        format_norm = ""
-                        if f_match:
-                            format_norm = f_match.group(1).upper()
-                        elif "bluray" in text.lower() or "brrip" in text.lower():
-                            format_norm = "BluRay"
-                        elif "web" in text.lower():
-                            format_norm = "WEB-DL"
+                    # Buscar coincidencia de calidad (un DVDRip sin calidad explicita es 480p)
+                    meta = tokenize(text)
+                    quality_norm = meta.quality or ("480p" if meta.format == "DVDRip" else None)
+                    if quality_norm:
+                        format_norm = meta.format or ""
                         
                         # Limpiar display
                         display = text
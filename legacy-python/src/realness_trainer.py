@@ -0,0 +1,120 @@
+"""
+realness_trainer.py - Entrena el modelo de "realness" de DOMAnalyzer.
+
+Lee el dataset de resultados de clicks (data/realness_dataset.jsonl), ajusta una
+regresión logística con NumPy (descenso de gradiente con L2) y escribe los
+pesos en data/realness_weights.json, que DOMAnalyzer carga al iniciar.
+
+Usage:
+    python realness_trainer.py [--dataset PATH] [--out PATH] [--epochs N] [--l2 X]
+"""
+
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from dom_analyzer import FEATURE_NAMES, DATASET_FILE, WEIGHTS_FILE
+
+MIN_SAMPLES = 20  # Con menos muestras se mantiene el modelo a mano
+
+
+def load_dataset(dataset_file) -> Tuple[np.ndarray, np.ndarray]:
+    """Carga (X, y) del dataset JSONL; ignora lineas corruptas o de otro tamaño."""
+    rows: List[List[float]] = []
+    labels: List[int] = []
+    with open(dataset_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            if len(item.get("features", [])) != len(FEATURE_NAMES):
+                continue
+            rows.append(item["features"])
+            labels.append(int(item["label"]))
+    X = np.asarray(rows, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+    return X, np.asarray(labels, dtype=np.float64)
+
+
+def train_logistic(X: np.ndarray, y: np.ndarray, epochs: int = 2000, lr: float = 0.5,
+                   l2: float = 0.01) -> Tuple[np.ndarray, float]:
+    """
+    Regresión logística por descenso de gradiente (batch completo).
+    Las clases se ponderan para que un dataset desbalanceado (muchos ads)
+    no empuje todo hacia una sola respuesta.
+
+    Returns:
+        (weights, bias)
+    """
+    n, d = X.shape
+    w = np.zeros(d)
+    b = 0.0
+    pos = max(1.0, y.sum())
+    neg = max(1.0, n - y.sum())
+    sample_w = np.where(y > 0.5, n / (2 * pos), n / (2 * neg))
+
+    for _ in range(epochs):
+        p = 1.0 / (1.0 + np.exp(-(X @ w + b)))
+        err = (p - y) * sample_w
+        w -= lr * (X.T @ err / n + l2 * w)
+        b -= lr * err.mean()
+    return w, b
+
+
+def accuracy(X: np.ndarray, y: np.ndarray, w: np.ndarray, b: float) -> float:
+    p = 1.0 / (1.0 + np.exp(-(X @ w + b)))
+    return float(((p >= 0.5) == (y > 0.5)).mean()) if len(y) else 0.0
+
+
+def train(dataset_file=DATASET_FILE, out_file=WEIGHTS_FILE, epochs: int = 2000, l2: float = 0.01) -> dict:
+    """
+    Entrena y guarda los pesos.
+
+    Returns:
+        El dict escrito en out_file (o {} si no hay suficientes muestras)
+    """
+    X, y = load_dataset(dataset_file)
+    if len(y) < MIN_SAMPLES:
+        print(f"Not enough samples to train ({len(y)} < {MIN_SAMPLES})")
+        return {}
+
+    w, b = train_logistic(X, y, epochs=epochs, l2=l2)
+    model = {
+        "model": "logistic",
+        "features": FEATURE_NAMES,
+        "weights": [round(float(x), 6) for x in w],
+        "bias": round(float(b), 6),
+        "samples": int(len(y)),
+        "positives": int(y.sum()),
+        "accuracy": round(accuracy(X, y, w, b), 4),
+        "trained_at": datetime.now().isoformat(),
+    }
+    Path(out_file).parent.mkdir(parents=True, exist_ok=True)
+    Path(out_file).write_text(json.dumps(model, indent=2), encoding="utf-8")
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the DOMAnalyzer realness model")
+    parser.add_argument("--dataset", default=str(DATASET_FILE), help="Outcome dataset (JSONL)")
+    parser.add_argument("--out", default=str(WEIGHTS_FILE), help="Output weights file (JSON)")
+    parser.add_argument("--epochs", type=int, default=2000, help="Gradient descent epochs. Default: 2000")
+    parser.add_argument("--l2", type=float, default=0.01, help="L2 regularization. Default: 0.01")
+    args = parser.parse_args()
+
+    model = train(args.dataset, args.out, epochs=args.epochs, l2=args.l2)
+    if model:
+        print(f"Trained on {model['samples']} samples ({model['positives']} positive), "
+              f"accuracy {model['accuracy']:.1%}")
+        for name, weight in zip(FEATURE_NAMES, model["weights"]):
+            print(f"  {name:18s} {weight:+.3f}")
+        print(f"  {'bias':18s} {model['bias']:+.3f}")
+        print(f"Saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+release_tokenizer.py - Tokenizador unico de metadata de releases.
+
+Una sola expresion regular compilada recorre el texto (titulo, slug de URL,
+texto de boton) una vez y devuelve la calidad, el formato, el idioma y el
+proveedor normalizados. Lo usan LinkMatcher, url_parser y QualityDetector,
+asi que todos detectan lo mismo de la misma forma. Los resultados se
+memorizan por texto de entrada.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional
+from config import QUALITY_PRIORITY, FORMAT_PRIORITY, PROVIDER_PRIORITY
+
+
+@dataclass(frozen=True)
+class ReleaseMetadata:
+    """Metadata normalizada de un release (None si no se detecto)."""
+    quality: Optional[str] = None   # "2160p", "1080p", "720p", "480p", "360p"
+    format: Optional[str] = None    # "WEB-DL", "BluRay", "BRRip", ...
+    language: Optional[str] = None  # "latino", "español", "dual", "inglés", ...
+    provider: Optional[str] = None  # Nombre de PROVIDER_PRIORITY ("mega", "drive.google", ...)
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return {
+            "quality": self.quality,
+            "format": self.format,
+            "language": self.language,
+            "provider": self.provider,
+        }
+
+
+# Alias -> valor normalizado, por categoria
+_QUALITY_ALIASES = {
+    "2160p": "2160p", "4k": "2160p", "uhd": "2160p",
+    "1080p": "1080p", "fullhd": "1080p", "full hd": "1080p", "full-hd": "1080p",
+    "720p": "720p", "hd": "720p",
+    "480p": "480p",
+    "360p": "360p",
+}
+_FORMAT_ALIASES = {
+    "web-dl": "WEB-DL", "webdl": "WEB-DL", "web.dl": "WEB-DL", "web dl": "WEB-DL",
+    "bluray": "BluRay", "blu-ray": "BluRay", "blu ray": "BluRay",
+    "brrip": "BRRip", "br-rip": "BRRip", "br rip": "BRRip", "bdrip": "BRRip", "bd-rip": "BRRip", "bd rip": "BRRip",
+    "hdrip": "HDRip", "hd-rip": "HDRip", "hd rip": "HDRip",
+    "dvdrip": "DVDRip", "dvd-rip": "DVDRip", "dvd rip": "DVDRip",
+    "camrip": "CAMRip", "cam": "CAMRip",
+    "ts": "TS", "telesync": "TS",
+    "remux": "REMUX",
+    "webrip": "WEBRip", "web-rip": "WEBRip", "web rip": "WEBRip",
+    "hdtv": "HDTV",
+}
+_LANGUAGE_ALIASES = {
+    "latino": "latino", "lat": "latino",
+    "español": "español", "espanol": "español", "castellano": "español", "esp": "español", "cast": "español",
+    "dual": "dual",
+    "inglés": "inglés", "ingles": "inglés", "english": "inglés", "eng": "inglés",
+    "subtitulado": "subtitulado", "sub": "subtitulado", "subs": "subtitulado",
+    "vose": "VOSE",
+}
+_PROVIDER_ALIASES = {p: p for p in PROVIDER_PRIORITY if p != "other"}
+
+# Orden de preferencia cuando aparecen varios tokens de la misma categoria
+_FORMAT_ORDER = FORMAT_PRIORITY + [f for f in _FORMAT_ALIASES.values() if f not in FORMAT_PRIORITY]
+_LANGUAGE_ORDER = list(dict.fromkeys(_LANGUAGE_ALIASES.values()))
+
+_CATEGORIES = {
+    "quality": (_QUALITY_ALIASES, QUALITY_PRIORITY),
+    "format": (_FORMAT_ALIASES, _FORMAT_ORDER),
+    "language": (_LANGUAGE_ALIASES, _LANGUAGE_ORDER),
+    "provider": (_PROVIDER_ALIASES, PROVIDER_PRIORITY),
+}
+
+
+# Alias -> (categoria, valor normalizado), de todas las categorias juntas
+_ALIASES = {alias: (name, value)
+            for name, (aliases, _) in _CATEGORIES.items()
+            for alias, value in aliases.items()}
+
+# Un solo patron con los alias de todas las categorias, los mas largos primero:
+# asi "hd-rip" (formato) gana a "hd" (calidad) y "web-dl" a "web". Cada token
+# va delimitado por caracteres no alfanumericos (o inicio/fin) para no
+# confundir "ts" con "https"
+_TOKEN_RE = re.compile(
+    r"(?<![a-z0-9])(?:"
+    + "|".join(re.escape(a) for a in sorted(_ALIASES, key=len, reverse=True))
+    + r")(?![a-z0-9])"
+)
+
+
+@lru_cache(maxsize=8192)
+def tokenize(text: str) -> ReleaseMetadata:
+    """
+    Recorre `text` una sola vez y devuelve su metadata normalizada. Si hay
+    varios tokens de una categoria gana el de mayor prioridad (ej: 2160p
+    sobre 1080p, como el orden de QUALITY_PRIORITY).
+    """
+    found: Dict[str, set] = {name: set() for name in _CATEGORIES}
+    for match in _TOKEN_RE.finditer((text or "").lower()):
+        name, value = _ALIASES[match.group(0)]
+        found[name].add(value)
+
+    values = {}
+    for name, (_, order) in _CATEGORIES.items():
+        values[name] = next((v for v in order if v in found[name]), None)
+    return ReleaseMetadata(**values)
+
+
+def strip_release_tokens(text: str) -> str:
+    """Quita de `text` (en minusculas) los tokens de calidad, formato, idioma y proveedor."""
+    return _TOKEN_RE.sub(" ", (text or "").lower())
@@ -0,0 +1,84 @@
+"""
+resolution_bus.py - Bus de resultado/cancelacion por resolucion.
+
+Varios componentes pueden ver el link final por su cuenta (NetworkAnalyzer,
+los listeners del adaptador, ShortenerChainResolver, CompletionWaiter). El
+primero que observa una URL de descarga confiable la publica en el bus; el
+resto de las esperas, polls y navegaciones en curso consultan el bus y
+terminan en cuanto hay resultado, en lugar de seguir hasta que su propio
+loop lo note.
+"""
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+class ResolutionBus:
+    """
+    Resultado compartido de una resolucion: gana la primera publicacion.
+
+    Uso tipico:
+        bus = ResolutionBus()
+        bus.publish(url, "network")   # desde un listener
+        if bus.done: ...              # en un loop: cortar en cuanto hay resultado
+        bus.sleep(page, 2000)         # espera cortable (True si hay resultado)
+    """
+
+    TICK_MS = 100  # Granularidad de las esperas cortables
+
+    def __init__(self):
+        self.result: Optional[str] = None
+        self.source: Optional[str] = None
+        self.published_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, str], None]] = []
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def subscribe(self, callback: Callable[[str, str], None]):
+        """Registra un callback(url, source) que se llama una vez, al publicar."""
+        self._listeners.append(callback)
+
+    def publish(self, url: str, source: str) -> bool:
+        """
+        Publica el link final. Solo la primera publicacion cuenta.
+
+        Returns:
+            True si esta publicacion fue la ganadora.
+        """
+        if not url:
+            return False
+        with self._lock:
+            if self.result is not None:
+                return False
+            self.result = url
+            self.source = source
+            self.published_at = time.monotonic()
+        for callback in self._listeners:
+            try:
+                callback(url, source)
+            except Exception as e:
+                print(f"Error in resolution bus listener: {e}")
+        return True
+
+    def sleep(self, page, ms: int) -> bool:
+        """
+        Espera `ms` en tramos cortos (bombeando eventos de Playwright) y corta
+        en cuanto llega un resultado.
+
+        Returns:
+            True si la espera se corto porque hay resultado.
+        """
+        deadline = time.monotonic() + ms / 1000
+        while self.result is None:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            try:
+                page.wait_for_timeout(min(self.TICK_MS, remaining_ms))
+            except Exception:
+                break
+        return self.result is not None
@@ -15,6 +15,8 @@ from network_analyzer import NetworkAnalyzer
 from dom_analyzer import DOMAnalyzer
 from timer_interceptor import TimerInterceptor
 from shortener_resolver import ShortenerChainResolver
+from wait_tuner import WaitTuner
+from resolution_bus import ResolutionBus
 from vision_fallback import VisionFallback
 from stealth_config import apply_stealth_to_context, setup_popup_handler, STEALTH_AVAILABLE
 import time
@@ -36,17 +38,25 @@ class LinkResolver:
     Incluye retry logic con backoff exponencial para recuperarse de fallos transitorios.
     """
 
-    def __init__(self, headless: bool = True, screenshot_callback: Optional[Callable] = None, max_retries: int = 2, use_persistent: bool = False):
+    def __init__(self, headless: bool = True, screenshot_callback: Optional[Callable] = None, max_retries: int = 2, use_persistent: bool = False, batch_mode: bool = False,
+                 screenshot_policy: Optional[str] = None, logger=None):
         self.headless = headless
-        self.logger = get_logger()
+        # Logger propio de la resolucion (resolution_id): los callbacks de la
+        # GUI se suscriben a este y no ven los logs de otras resoluciones
+        self.logger = (logger or get_logger()).bind()
+        self.resolution_id = self.logger.resolution_id
         self.screenshot_callback = screenshot_callback
-        self.screenshot_handler = ScreenshotHandler(callback=screenshot_callback)
+        # Politica por defecto: pasos solo si hay GUI mirando; si no, solo errores
+        if screenshot_policy is None:
+            screenshot_policy = "per-step" if screenshot_callback else "on-error"
+        self.screenshot_handler = ScreenshotHandler(callback=screenshot_callback, policy=screenshot_policy)
         self.max_retries = max_retries
         self.history_manager = HistoryManager()
         self.use_network_interception = True
         self.accelerate_timers = True
         self.use_vision_fallback = False  # Desactivado por defecto
         self.use_persistent = use_persistent
+        self.batch_mode = batch_mode  # Sin usuario mirando: omite simulacion humana innecesaria
         self.user_data_dir = os.path.join(os.getcwd(), "data", "browser_profile")
         
         # Crear carpeta de perfil si no existe
@@ -69,20 +79,23 @@ class LinkResolver:
         Returns:
             LinkOption con el mejor link encontrado, o None si falla.
         """
-        # Intentar resolver con retry
-        for attempt in range(self.max_retries + 1):
-            try:
-                result = self._resolve_internal(url, quality, format_type, providers, language, mobile)
-                return result
-            except Exception as e:
-                if attempt < self.max_retries:
-                    wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
-                    self.logger.warning(f"Resolution attempt {attempt + 1} failed: {str(e)[:80]}")
-                    self.logger.info(f"Retrying after {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    self.logger.error(f"All {self.max_retries + 1} resolution attempts failed")
-                    return None
+        # Lo que loguean los modulos sin logger propio (stealth, vision) en
+        # este hilo tambien queda etiquetado con esta resolucion
+        with self.logger.activate():
+            # Intentar resolver con retry
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result = self._resolve_internal(url, quality, format_type, providers, language, mobile)
+                    return result
+                except Exception as e:
+                    if attempt < self.max_retries:
+                        wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
+                        self.logger.warning(f"Resolution attempt {attempt + 1} failed: {str(e)[:80]}")
+                        self.logger.info(f"Retrying after {wait_time}s...")
+                        time.sleep(wait_time)
+                    else:
+                        self.logger.error(f"All {self.max_retries + 1} resolution attempts failed")
+                        return None
     
     def _resolve_internal(
         self,
@@ -116,6 +129,9 @@ class LinkResolver:
         result = None
         browser = None
         context = None
+        # Duracion de cada fase en ms, se guarda con el registro del historial
+        timings = {}
+        started = time.perf_counter()
 
         try:
             with sync_playwright() as p:
@@ -182,11 +198,17 @@ class LinkResolver:
                             is_mobile=mobile
                         )
                     
-                    # 1. Instanciar analizadores primero
-                    network_analyzer = NetworkAnalyzer()
-                    dom_analyzer = DOMAnalyzer()
-                    timer_interceptor = TimerInterceptor(speed_factor=20.0)
-                    shortener_resolver = ShortenerChainResolver(network_analyzer, timer_interceptor)
+                    # 1. Instanciar analizadores primero. El bus es de esta
+                    # resolucion: el primer link final observado corta el resto
+                    bus = ResolutionBus()
+                    bus.subscribe(lambda found, source: self.logger.success(
+                        f"Final link observed ({source}): {found[:80]}"))
+                    network_analyzer = NetworkAnalyzer(bus=bus, logger=self.logger)
+                    dom_analyzer = DOMAnalyzer(logger=self.logger)
+                    timer_interceptor = TimerInterceptor(speed_factor=20.0, logger=self.logger)
+                    wait_tuner = WaitTuner(self.history_manager.db_path)
+                    shortener_resolver = ShortenerChainResolver(network_analyzer, timer_interceptor, wait_tuner, bus=bus,
+                                                                logger=self.logger)
                     vision_fallback = VisionFallback() if self.use_vision_fallback else None
 
                     # 2. Aplicar configuración anti-detección al contexto
@@ -227,6 +249,8 @@ class LinkResolver:
                     # 5. Configurar la página inicial (si ya existe)
                     if context.pages:
                         on_page_created(context.pages[0])
+
+                    timings["browser_ms"] = round((time.perf_counter() - started) * 1000)
                     
                 except Exception as e:
                     self.logger.error(f"Failed to create browser context: {e}")
@@ -244,12 +268,7 @@ class LinkResolver:
                         self.logger.error(f"Unsupported site: {e}")
                         return None
 
-                    # Patchear el adaptador para que use nuestro logger
-                    original_log = adapter.log
-                    def patched_log(step, msg):
-                        self.logger.step(step, msg)
-                        # original_log(step, msg) - No duplicar en stdout
-                    adapter.log = patched_log
+                    adapter.batch_mode = self.batch_mode
 
                     # Pasar analizadores ya creados al adaptador
                     adapter.set_analyzers(
@@ -257,16 +276,28 @@ class LinkResolver:
                         dom_analyzer=dom_analyzer,
                         timer_interceptor=timer_interceptor,
                         vision_resolver=vision_fallback,
-                        shortener_resolver=shortener_resolver
+                        shortener_resolver=shortener_resolver,
+                        wait_tuner=wait_tuner,
+                        screenshot_handler=self.screenshot_handler,
+                        bus=bus,
+                        logger=self.logger  # adapter.log() va al logger de la resolucion
                     )
 
                     # Resolver
                     self.logger.step("RESOLVE", "Starting navigation...")
+                    resolve_started = time.perf_counter()
                     try:
                         result = adapter.resolve(url)
                     except Exception as e:
-                        self.logger.error(f"Adapter resolution failed: {e}")
-                        raise e # Re-lanzar para activar retry
+                        if not bus.done:
+                            self.logger.error(f"Adapter resolution failed: {e}")
+                            raise e # Re-lanzar para activar retry
+                        # Cortado a mitad de camino: el link ya esta en el bus
+                        result = None
+
+                    if result is None and bus.done:
+                        result = adapter.resolved_option()
+                    timings["resolve_ms"] = round((time.perf_counter() - resolve_started) * 1000)
 
                     if result is None:
                         # Si el adaptador termina sin error pero sin link, lanzamos excepción
@@ -278,6 +309,8 @@ class LinkResolver:
                     if stats['intercepted'] > 0:
                         self.logger.info(f"Network: {stats['blocked']} blocked ads")
                         self.logger.info(f"Captured: {stats['captured']} download candidates")
+                        if stats['aborted_downloads']:
+                            self.logger.info(f"Skipped loading {stats['aborted_downloads']} download host page(s)")
 
                     if result:
                         self.logger.success("Link resolved successfully!")
@@ -287,15 +320,20 @@ class LinkResolver:
                         self.logger.info(f"Format: {result.format or 'N/A'}")
                         self.logger.info(f"Score: {result.score:.1f}/100")
                         
-                        # Guardar en historial
-                        self.history_manager.add_record(
+                        # Guardar en historial (encolado: el writer escribe por lotes)
+                        queued = self.history_manager.add_record_async(
                             original_url=url,
                             resolved_url=result.url,
                             quality=result.quality or "",
                             format_type=result.format or "",
                             provider=result.provider or "",
-                            score=result.score
+                            score=result.score,
+                            timings={**timings, "total_ms": round((time.perf_counter() - started) * 1000)}
                         )
+                        if not queued:
+                            self.logger.warning("History queue full: record dropped")
+                        else:
+                            self.logger.debug(f"History queue depth: {self.history_manager.writer.queue_depth}")
                     else:
                         self.logger.error("Adapter returned None - could not resolve link")
 
@@ -306,6 +344,7 @@ class LinkResolver:
 
                 finally:
                     # Cleanup
+                    self.screenshot_handler.flush()
                     if context:
                         try:
                             context.close()
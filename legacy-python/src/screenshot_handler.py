@@ -1,80 +1,205 @@
 """
 screenshot_handler.py - Maneja la captura y envio de screenshots en tiempo real.
+
+La captura es opcional segun una politica ("off", "on-error", "per-step") y
+sale del camino critico: en el hilo de Playwright solo se pide la imagen ya
+codificada (JPEG con calidad/clip); la escritura a disco, la conversion a
+WebP (si Pillow esta instalado) y la poda del directorio por tamaño se hacen
+en un hilo de fondo. El callback de la GUI se llama en el hilo que
+captura, en cuanto llega la imagen y antes de encolar su escritura: recibe
+los bytes ya codificados (`data`, `mime_type`) porque el archivo de
+`filepath` puede no existir todavia.
 """
 
+import io
 import os
+import queue
+import threading
 from datetime import datetime
 from typing import Callable, Optional
 from pathlib import Path
 
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+SCREENSHOT_POLICIES = ("off", "on-error", "per-step")
+IMAGE_EXTENSIONS = ("*.png", "*.jpg", "*.webp")
+
 
 class ScreenshotHandler:
     """
     Captura screenshots del navegador y los envia a callbacks (GUI).
     """
 
-    def __init__(self, output_dir: str = "screenshots", callback: Optional[Callable] = None):
+    def __init__(self, output_dir: str = "screenshots", callback: Optional[Callable] = None,
+                 policy: str = "per-step", image_format: str = "jpeg", quality: int = 70,
+                 max_dir_bytes: int = 50 * 1024 * 1024):
+        """
+        Args:
+            policy: "off" | "on-error" | "per-step"
+            image_format: "jpeg" | "webp" (webp requiere Pillow; si no, jpeg) | "png"
+            quality: Calidad 0-100 para jpeg/webp
+            max_dir_bytes: Tamaño maximo del directorio; se borran los mas antiguos
+        """
+        if policy not in SCREENSHOT_POLICIES:
+            raise ValueError(f"Unknown screenshot policy: {policy}")
         self.output_dir = output_dir
         self.callback = callback
+        self.policy = policy
+        self.image_format = "jpeg" if image_format == "webp" and not PIL_AVAILABLE else image_format
+        self.quality = quality
+        self.max_dir_bytes = max_dir_bytes
         self.screenshot_count = 0
-        
-        # Crear directorio si no existe
-        os.makedirs(output_dir, exist_ok=True)
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+        # Crear directorio si no existe (solo si se va a usar)
+        if policy != "off":
+            os.makedirs(output_dir, exist_ok=True)
 
     def set_callback(self, callback: Callable):
-        """Registra un callback para recibir notificaciones de nuevos screenshots."""
+        """
+        Registra un callback para recibir notificaciones de nuevos screenshots:
+        callback(filepath, name, description, url, data, mime_type).
+        """
         self.callback = callback
 
-    def capture(self, page, name: str, description: str = "") -> str:
+    def should_capture(self, kind: str = "step") -> bool:
+        """True si la politica actual captura screenshots de este tipo ("step" o "error")."""
+        if self.policy == "per-step":
+            return True
+        return self.policy == "on-error" and kind == "error"
+
+    def capture(self, page, name: str, description: str = "", kind: str = "step",
+                clip: Optional[dict] = None, full_page: bool = False) -> Optional[str]:
         """
-        Captura un screenshot de la pagina actual.
-        
+        Captura un screenshot de la pagina actual (si la politica lo permite).
+
         Args:
             page: Objeto Page de Playwright
             name: Nombre del screenshot (ej: "page_load", "link_found")
             description: Descripcion para mostrar en la GUI
-            
+            kind: "step" o "error"
+            clip: Region opcional {x, y, width, height}
+            full_page: Capturar la pagina completa en vez del viewport
+
         Returns:
-            Path del screenshot capturado
+            Path donde se escribira el screenshot, o None si no se capturo
         """
+        if not self.should_capture(kind):
+            return None
+
         try:
             self.screenshot_count += 1
-            
+
             # Generar nombre de archivo con timestamp
             timestamp = datetime.now().strftime("%H%M%S")
-            filename = f"{self.screenshot_count:03d}_{name}_{timestamp}.png"
+            ext = {"jpeg": "jpg", "webp": "webp"}.get(self.image_format, "png")
+            filename = f"{self.screenshot_count:03d}_{name}_{timestamp}.{ext}"
             filepath = os.path.join(self.output_dir, filename)
-            
-            # Capturar screenshot
-            page.screenshot(path=filepath)
-            
-            # Notificar al callback (GUI)
-            if self.callback:
-                try:
-                    self.callback(
-                        filepath=filepath,
-                        name=name,
-                        description=description,
-                        url=page.url,
-                    )
-                except Exception as e:
-                    print(f"Error in screenshot callback: {e}")
-            
+
+            # Capturar en memoria: el navegador ya entrega la imagen codificada.
+            # Para webp se pide png sin perdida y Pillow la convierte en el hilo de fondo
+            options = {"clip": clip, "full_page": full_page}
+            if self.image_format == "jpeg":
+                options.update(type="jpeg", quality=self.quality)
+            else:
+                options.update(type="png")
+            data = page.screenshot(**options)
+            url = page.url
+
+            self._notify(filepath, name, description, url, data, f"image/{options['type']}")
+            self._ensure_worker()
+            self._queue.put((filepath, data))
             return filepath
-            
+
         except Exception as e:
             print(f"Error capturing screenshot: {e}")
             return None
 
-    def capture_step(self, page, step: int, step_name: str) -> str:
+    def capture_step(self, page, step: int, step_name: str) -> Optional[str]:
         """Captura un screenshot de un paso especifico del proceso."""
         return self.capture(page, f"step{step}_{step_name}", f"Paso {step}: {step_name}")
 
+    def capture_error(self, page, name: str, description: str = "") -> Optional[str]:
+        """Captura un screenshot de diagnostico (politicas "on-error" y "per-step")."""
+        return self.capture(page, name, description, kind="error")
+
+    # ------------------------------------------------------------------
+    # Escritura en segundo plano
+    # ------------------------------------------------------------------
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="screenshot-writer", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            filepath, data = self._queue.get()
+            try:
+                if self.image_format == "webp":
+                    Image.open(io.BytesIO(data)).save(filepath, "WEBP", quality=self.quality)
+                else:
+                    with open(filepath, "wb") as f:
+                        f.write(data)
+                self._enforce_retention()
+            except Exception as e:
+                print(f"Error writing screenshot: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _enforce_retention(self):
+        """Borra los screenshots mas antiguos si el directorio supera max_dir_bytes."""
+        files = []
+        for pattern in IMAGE_EXTENSIONS:
+            for file in Path(self.output_dir).glob(pattern):
+                try:
+                    stat = file.stat()
+                    files.append((stat.st_mtime, stat.st_size, file))
+                except OSError:
+                    continue
+        total = sum(size for _, size, _ in files)
+        for _, size, file in sorted(files):
+            if total <= self.max_dir_bytes:
+                break
+            try:
+                file.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def _notify(self, filepath: str, name: str, description: str, url: str, data: bytes, mime_type: str):
+        """Notifica al callback (GUI) con la imagen en memoria."""
+        if not self.callback:
+            return
+        try:
+            self.callback(
+                filepath=filepath,
+                name=name,
+                description=description,
+                url=url,
+                data=data,
+                mime_type=mime_type,
+            )
+        except Exception as e:
+            print(f"Error in screenshot callback: {e}")
+
+    def flush(self):
+        """Espera a que terminen las escrituras pendientes."""
+        if self._worker is not None:
+            self._queue.join()
+
     def clear(self):
         """Limpia los screenshots antiguos."""
         try:
-            for file in Path(self.output_dir).glob("*.png"):
-                file.unlink()
+            for pattern in IMAGE_EXTENSIONS:
+                for file in Path(self.output_dir).glob(pattern):
+                    file.unlink()
             self.screenshot_count = 0
         except Exception as e:
             print(f"Error clearing screenshots: {e}")
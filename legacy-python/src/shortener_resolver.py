@@ -10,6 +10,7 @@ from logger import get_logger
 from network_analyzer import NetworkAnalyzer
 from timer_interceptor import TimerInterceptor
 from stealth_config import apply_stealth_to_page
+from wait_tuner import WaitTuner, site_key
 
 class ShortenerChainResolver:
     """
@@ -19,11 +20,23 @@ class ShortenerChainResolver:
     
     MAX_CHAIN_DEPTH = 8
     TIMER_WAIT_TIMEOUT = 30000  # 30s
+    STEP_WAIT_DEFAULT = 2000    # Default conservador de las esperas de cada paso
+
+    # Condicion de "listo": hay algun boton de avance en la pagina
+    READY_BUTTONS_JS = """() => {
+        if (document.querySelector('#getLink, .btn-success, .get-link, #btn-main')) return true;
+        const words = ['get link', 'continuar', 'continue', 'ingresar', 'vínculo', 'ir al enlace'];
+        return Array.from(document.querySelectorAll('a, button'))
+            .some(el => words.some(w => (el.innerText || '').toLowerCase().includes(w)));
+    }"""
     
-    def __init__(self, network_analyzer: NetworkAnalyzer, timer_interceptor: TimerInterceptor):
+    def __init__(self, network_analyzer: NetworkAnalyzer, timer_interceptor: TimerInterceptor,
+                 wait_tuner: Optional[WaitTuner] = None, bus=None, logger=None):
         self.network = network_analyzer
+        self.bus = bus  # ResolutionBus opcional de la resolucion en curso
         self.timer = timer_interceptor
-        self.logger = get_logger()
+        self.wait_tuner = wait_tuner
+        self.logger = logger or get_logger()
         self.chain = []
         self.page = None
         self.captured_redirects = []
@@ -41,6 +54,7 @@ class ShortenerChainResolver:
                 url = frame.url
                 if url and url not in self.captured_redirects and url != "about:blank":
                     self.captured_redirects.append(url)
+                    self._publish_if_final(url, "chain navigation")
 
         def on_response(response: Response):
             if 300 <= response.status < 400:
@@ -52,6 +66,11 @@ class ShortenerChainResolver:
                         loc = urljoin(response.url, loc)
                     if loc not in self.captured_redirects:
                         self.captured_redirects.append(loc)
+                        try:
+                            if response.request.is_navigation_request():
+                                self._publish_if_final(loc, "chain redirect")
+                        except Exception:
+                            pass
 
         page.on("framenavigated", on_nav)
         page.on("response", on_response)
@@ -62,6 +81,11 @@ class ShortenerChainResolver:
             self.chain = []
             
             for depth in range(self.MAX_CHAIN_DEPTH):
+                # Otro componente ya vio el link final: cortar la cadena
+                if self.bus and self.bus.done:
+                    self.logger.success(f"Final link already observed ({self.bus.source}), stopping chain")
+                    return self.bus.result
+
                 self.chain.append(current_url)
                 self.logger.info(f"Chain step {depth + 1}/{self.MAX_CHAIN_DEPTH}: {current_url[:60]}")
                 
@@ -69,6 +93,10 @@ class ShortenerChainResolver:
                 step_referer = referer if depth == 0 else None
                 next_url = self._follow_step(current_url, referer=step_referer)
                 
+                if self.bus and self.bus.done:
+                    self.logger.success(f"Final link observed during step ({self.bus.source})")
+                    return self.bus.result
+
                 if not next_url:
                     self.logger.warning(f"Chain broke at step {depth + 1}")
                     return None
@@ -122,11 +150,17 @@ class ShortenerChainResolver:
                     self.logger.warning(f"Error applying specific timer skip: {e}")
 
             # 2. Esperar y hacer click en botones "Get Link"
-            # Esperar un momento a que aparezcan los botones
-            self.page.wait_for_timeout(2000)
-            if self.timer.wait_and_click_when_ready(self.page, timeout_ms=self.TIMER_WAIT_TIMEOUT):
+            # Esperar a que aparezcan los botones (presupuesto aprendido por sitio)
+            step_url = self.page.url
+            self._wait_ready(step_url, "chain_buttons", lambda timeout_ms: self.page.wait_for_function(
+                self.READY_BUTTONS_JS, timeout=timeout_ms))
+            if self.bus and self.bus.done:
+                return self.bus.result
+            if self.timer.wait_and_click_when_ready(self.page, timeout_ms=self.TIMER_WAIT_TIMEOUT, bus=self.bus):
                 # Esperar a que la navegación ocurra tras el click
-                self.page.wait_for_timeout(2000)
+                click_url = self.page.url
+                self._wait_ready(click_url, "chain_post_click", lambda timeout_ms: self.page.wait_for_url(
+                    lambda u: u != click_url, wait_until="commit", timeout=timeout_ms))
             
             # 3. Detectar siguiente URL (Prioridad 1: Redirects capturados)
             next_url = self._detect_next_url()
@@ -143,6 +177,21 @@ class ShortenerChainResolver:
             self.logger.error(f"Navigation error in chain: {e}")
             return None
 
+    def _publish_if_final(self, url: str, source: str):
+        """Publica en el bus las navegaciones que ya llegan a un dominio de descarga."""
+        if self.bus and self.network.is_download_url(url):
+            self.bus.publish(url, source)
+
+    def _wait_ready(self, url: str, step: str, wait_fn) -> bool:
+        """Espera de un paso de la cadena; con WaitTuner usa lo aprendido para el sitio."""
+        if self.wait_tuner:
+            return self.wait_tuner.wait(site_key(url), step, self.STEP_WAIT_DEFAULT, wait_fn)
+        try:
+            wait_fn(self.STEP_WAIT_DEFAULT)
+            return True
+        except Exception:
+            return False
+
     def _detect_next_url(self) -> Optional[str]:
         """Busca señales de la siguiente URL en la página actual o historial de navegación."""
         # 1. Revisar URLs capturadas por listeners (Navegación nativa)
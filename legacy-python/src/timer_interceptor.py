@@ -6,13 +6,64 @@ timer_interceptor.py - Aceleración de timers (setTimeout/setInterval) vía JS I
 from playwright.sync_api import Page
 from logger import get_logger
 
+# Script de reduccion de contadores de PeliculasGD (neworldtravel / acortame)
+PELICULASGD_SKIP_SCRIPT = """
+(() => {
+    // 1. Buscar variables comunes de contadores
+    const originalSeconds = window.seconds || null;
+    if (window.counter !== undefined) window.counter = Math.max(0, window.counter - 40);
+    if (window.seconds !== undefined) window.seconds = Math.max(0, window.seconds - 40);
+    if (window.timer !== undefined) window.timer = Math.max(0, window.timer - 40);
+
+    // 2. Buscar elementos del DOM que parecen contadores y reducirlos
+    const timerEls = document.querySelectorAll('.timer, #timer, #counter, .countdown, [id*="time"], [class*="time"]');
+    timerEls.forEach(el => {
+        if (!el || typeof el.innerText !== 'string') return;
+        const match = el.innerText.match(/(\\d+)/);
+        if (match) {
+            const currentValue = parseInt(match[1]);
+            if (currentValue > 10) {
+                const newValue = Math.max(10, currentValue - 40);
+                el.innerText = el.innerText.replace(/\\d+/, newValue.toString());
+                console.log("Timer element reduced:", currentValue, "->", newValue);
+            }
+        }
+    });
+
+    // 3. Buscar botones deshabilitados y verificar si pueden activarse
+    const disabledButtons = document.querySelectorAll('button[disabled], a.disabled, .btn-disabled');
+    disabledButtons.forEach(btn => {
+        const text = btn.innerText.toLowerCase();
+        if (text.includes('continuar') || text.includes('descargar') || text.includes('siguiente')) {
+            // NO activar aún - solo loggear para monitoreo
+            console.log("Found disabled button (will auto-activate with timer):", text);
+        }
+    });
+
+    // 4. Específico de peliculasgd: Buscar función de validación
+    if (typeof verifyHuman === 'function') {
+        console.log("Found verifyHuman function - but NOT triggering (server-side validation)");
+    }
+
+    if (typeof enableDownload === 'function') {
+        console.log("Found enableDownload function - monitoring...");
+    }
+
+    return {
+        originalSeconds: originalSeconds,
+        modified: true
+    };
+})();
+"""
+
+
 class TimerInterceptor:
     """
     Inyecta scripts para acelerar el paso del tiempo en el navegador del cliente.
     """
     
-    def __init__(self, speed_factor: float = 10.0):
-        self.logger = get_logger()
+    def __init__(self, speed_factor: float = 10.0, logger=None):
+        self.logger = logger or get_logger()
         self.speed_factor = speed_factor
 
     def accelerate_timers(self, page: Page):
@@ -86,61 +137,32 @@ class TimerInterceptor:
         """
         self.logger.step("HACK", "Attempting to accelerate mandatory ad wait...")
         
-        script = """
-        (() => {
-            // 1. Buscar variables comunes de contadores
-            const originalSeconds = window.seconds || null;
-            if (window.counter !== undefined) window.counter = Math.max(0, window.counter - 40);
-            if (window.seconds !== undefined) window.seconds = Math.max(0, window.seconds - 40);
-            if (window.timer !== undefined) window.timer = Math.max(0, window.timer - 40);
-            
-            // 2. Buscar elementos del DOM que parecen contadores y reducirlos
-            const timerEls = document.querySelectorAll('.timer, #timer, #counter, .countdown, [id*="time"], [class*="time"]');
-            timerEls.forEach(el => {
-                if (!el || typeof el.innerText !== 'string') return;
-                const match = el.innerText.match(/(\\d+)/);
-                if (match) {
-                    const currentValue = parseInt(match[1]);
-                    if (currentValue > 10) {
-                        const newValue = Math.max(10, currentValue - 40);
-                        el.innerText = el.innerText.replace(/\\d+/, newValue.toString());
-                        console.log("Timer element reduced:", currentValue, "->", newValue);
-                    }
-                }
-            });
-            
-            // 3. Buscar botones deshabilitados y verificar si pueden activarse
-            const disabledButtons = document.querySelectorAll('button[disabled], a.disabled, .btn-disabled');
-            disabledButtons.forEach(btn => {
-                const text = btn.innerText.toLowerCase();
-                if (text.includes('continuar') || text.includes('descargar') || text.includes('siguiente')) {
-                    // NO activar aún - solo loggear para monitoreo
-                    console.log("Found disabled button (will auto-activate with timer):", text);
-                }
-            });
-            
-            // 4. Específico de peliculasgd: Buscar función de validación
-            if (typeof verifyHuman === 'function') {
-                console.log("Found verifyHuman function - but NOT triggering (server-side validation)");
-            }
-            
-            if (typeof enableDownload === 'function') {
-                console.log("Found enableDownload function - monitoring...");
-            }
-            
-            return {
-                originalSeconds: originalSeconds,
-                modified: true
-            };
-        })();
-        """
         try:
-            result = page.evaluate(script)
+            result = page.evaluate(PELICULASGD_SKIP_SCRIPT)
             if result and result.get('modified'):
                 self.logger.info("Timer acceleration applied - wait time reduced significantly")
         except Exception as e:
             self.logger.info(f"PeliculasGD timer skip not applicable or failed: {e}")
 
+    def install_peliculasgd_timer_skip(self, page: Page):
+        """
+        Instala UNA vez la reduccion de contadores de PeliculasGD como init script.
+        Se ejecuta sola en cada documento de neworldtravel/acortame (al cargar el DOM
+        y al terminar la carga), en lugar de re-inyectarla periodicamente.
+        """
+        script = f"""
+        (() => {{
+            if (!/neworldtravel|acortame/.test(location.hostname)) return;
+            const skip = () => {{ try {{ {PELICULASGD_SKIP_SCRIPT.strip()} }} catch (e) {{}} }};
+            document.addEventListener('DOMContentLoaded', skip);
+            window.addEventListener('load', skip);
+        }})();
+        """
+        try:
+            page.add_init_script(script)
+        except Exception as e:
+            self.logger.info(f"PeliculasGD timer skip could not be installed: {e}")
+
     def force_enable_buttons(self, page: Page):
         """
         Intenta forzar la activación de botones deshabilitados después de un tiempo prudencial.
@@ -230,10 +252,11 @@ class TimerInterceptor:
         except:
             return False
 
-    def wait_and_click_when_ready(self, page: Page, timeout_ms: int = 20000) -> bool:
+    def wait_and_click_when_ready(self, page: Page, timeout_ms: int = 20000, bus=None) -> bool:
         """
         Espera a que un posible timer termine y clickea el botón resultante.
         Usa una estrategia combinada de esperar visibilidad y forzar activación.
+        Con un ResolutionBus la espera se corta en cuanto hay link final.
         """
         self.logger.info(f"Waiting for button to be ready (timeout {timeout_ms}ms)...")
         
@@ -250,6 +273,8 @@ class TimerInterceptor:
         ]
         
         while (__import__('time').time() - start_time) * 1000 < timeout_ms:
+            if bus and bus.done:
+                return False
             for selector in selectors:
                 try:
                     # Intentar encontrar un botón que sea visible y no deshabilitado
@@ -281,7 +306,10 @@ class TimerInterceptor:
                         page.wait_for_timeout(500)
                         continue
             
-            page.wait_for_timeout(1000)
+            if bus:
+                bus.sleep(page, 1000)
+            else:
+                page.wait_for_timeout(1000)
             
         self.logger.warning("Timed out waiting for button")
         return False
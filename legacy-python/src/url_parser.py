@@ -4,11 +4,14 @@ url_parser.py - Utilidades para parsear información de URLs
 
 import re
 from typing import Dict, Optional
+from urllib.parse import unquote, urlparse
+from release_tokenizer import strip_release_tokens, tokenize
 
 
 def extract_metadata_from_url(url: str) -> Dict[str, Optional[str]]:
     """
-    Extrae metadata (calidad, formato, idioma) de una URL de película.
+    Extrae metadata (calidad, formato, idioma) de una URL de película
+    con el tokenizador compartido (release_tokenizer).
     
     Ejemplos:
         https://www.peliculasgd.net/la-empleada-2025-web-dl-1080p-latino-googledrive/
@@ -23,65 +26,12 @@ def extract_metadata_from_url(url: str) -> Dict[str, Optional[str]]:
     Returns:
         Dict con 'quality', 'format', 'language' (o None si no se detecta)
     """
-    url_lower = url.lower()
-    
-    metadata = {
-        'quality': None,
-        'format': None,
-        'language': None
-    }
-    
-    # Detectar calidad (1080p, 720p, 480p, 4k, 2160p, etc)
-    quality_patterns = [
-        r'\b(2160p|4k)\b',
-        r'\b(1080p)\b',
-        r'\b(720p)\b',
-        r'\b(480p)\b',
-        r'\b(360p)\b'
-    ]
-    
-    for pattern in quality_patterns:
-        match = re.search(pattern, url_lower)
-        if match:
-            metadata['quality'] = match.group(1).upper()
-            if metadata['quality'] == '4K':
-                metadata['quality'] = '2160p'
-            break
-    
-    # Detectar formato (WEB-DL, BluRay, DVDRip, REMUX, etc)
-    format_patterns = {
-        r'\b(web-dl|webdl|web\.dl)\b': 'WEB-DL',
-        r'\b(bluray|blu-ray|bdrip|brrip)\b': 'BluRay',
-        r'\b(dvdrip|dvd-rip)\b': 'DVDRip',
-        r'\b(remux)\b': 'REMUX',
-        r'\b(webrip|web-rip)\b': 'WEBRip',
-        r'\b(hdtv)\b': 'HDTV',
-        r'\b(cam|camrip)\b': 'CAM',
-        r'\b(ts|telesync)\b': 'TS',
-        r'\b(hdrip)\b': 'HDRip'
+    meta = tokenize(url)
+    return {
+        'quality': meta.quality,
+        'format': meta.format,
+        'language': meta.language
     }
-    
-    for pattern, format_name in format_patterns.items():
-        if re.search(pattern, url_lower):
-            metadata['format'] = format_name
-            break
-    
-    # Detectar idioma (latino, español, castellano, dual, inglés, sub)
-    language_patterns = {
-        r'\b(latino|lat)\b': 'latino',
-        r'\b(español|castellano|esp|cast)\b': 'español',
-        r'\b(dual|dual-latino)\b': 'dual',
-        r'\b(inglés|english|eng|ingles)\b': 'inglés',
-        r'\b(subtitulado|sub|subs)\b': 'subtitulado',
-        r'\b(vose)\b': 'VOSE'
-    }
-    
-    for pattern, lang_name in language_patterns.items():
-        if re.search(pattern, url_lower):
-            metadata['language'] = lang_name
-            break
-    
-    return metadata
 
 
 def should_override_criteria_from_url(url: str) -> bool:
@@ -105,3 +55,25 @@ def should_override_criteria_from_url(url: str) -> bool:
         return True
     
     return False
+
+
+def extract_title_from_url(url: str) -> str:
+    """
+    Titulo de la pelicula a partir del slug de la URL: ultimo segmento del
+    path, sin tokens de release (calidad, formato, idioma, proveedor).
+
+    Ejemplos:
+        https://www.peliculasgd.net/la-empleada-2025-web-dl-1080p-latino/
+        -> 'la empleada 2025'
+
+        https://hackstore.mx/peliculas/interstellar-2014-bluray-1080p
+        -> 'interstellar 2014'
+
+    Returns:
+        Palabras del titulo separadas por espacios ("" si la URL no tiene slug)
+    """
+    segments = [s for s in urlparse(url or "").path.split("/") if s]
+    if not segments:
+        return ""
+    slug = re.sub(r"\.[a-z0-9]{2,4}$", "", unquote(segments[-1]).lower())  # .html, .php...
+    return " ".join(re.split(r"[\W_]+", strip_release_tokens(slug))).strip()
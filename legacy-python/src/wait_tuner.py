@@ -0,0 +1,197 @@
+"""
+wait_tuner.py - Esperas adaptativas por sitio aprendidas del historial.
+
+Cada espera con condicion de "listo" registra en la BD cuanto tardo la pagina
+en estar lista (por sitio y paso). La siguiente ejecucion usa el p95 aprendido
+mas un margen como presupuesto; si ese presupuesto se queda corto, la espera se
+extiende automaticamente hasta el default conservador y la observacion queda
+marcada como fallback, lo que devuelve ese paso al default durante un tiempo.
+Con el uso, cada paso converge a la minima espera segura.
+
+Las lecturas usan la conexion por hilo del HistoryStore de la BD y las
+observaciones se encolan en un HistoryWriter: el hilo del resolver nunca
+escribe en disco. history_maintenance poda las observaciones que ya no se
+consultan (prune_observations).
+"""
+
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from history_store import HistoryStore
+from history_writer import HistoryWriter
+
+
+def site_key(url: str) -> str:
+    """Clave de sitio para las observaciones (host sin 'www.')."""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class WaitTuner:
+    """
+    Presupuestos de espera aprendidos por (sitio, paso).
+    """
+
+    DB_FILENAME = "neo_link_resolver.db"
+    WINDOW = 50            # Ultimas N observaciones consideradas
+    MIN_SAMPLES = 5        # Minimo de exitos antes de confiar en lo aprendido
+    FALLBACK_LOOKBACK = 3  # Un fallback reciente devuelve el paso al default
+    MARGIN_FACTOR = 1.25
+    MARGIN_MS = 250
+
+    SQL_INSERT = ("INSERT INTO wait_observations (site, step, elapsed_ms, ok, fallback, timestamp) "
+                  "VALUES (?, ?, ?, ?, ?, ?)")
+    SQL_RECENT = ("SELECT elapsed_ms, ok, fallback FROM wait_observations "
+                  "WHERE site = ? AND step = ? ORDER BY id DESC LIMIT ?")
+
+    def __init__(self, db_file: Optional[str] = None):
+        """
+        Args:
+            db_file: Ruta del archivo SQLite (default: data/neo_link_resolver.db,
+                     la misma BD que el historial)
+        """
+        if db_file is None:
+            data_dir = Path(__file__).parent.parent / "data"
+            data_dir.mkdir(exist_ok=True)
+            db_file = data_dir / self.DB_FILENAME
+        self.db_file = db_file
+        self.store = HistoryStore.for_path(db_file)
+        # None: el paso volvio al default (fallback reciente, quiza aun en la cola)
+        self._budgets: Dict[Tuple[str, str], Optional[int]] = {}
+        try:
+            self.store.ensure_schema(create_tables, name="wait_observations")
+        except Exception as e:
+            print(f"Error initializing wait tuner table: {e}")
+        self._writer = HistoryWriter.for_store(self.store, self.SQL_INSERT)
+
+    # ------------------------------------------------------------------
+    # Aprendizaje
+    # ------------------------------------------------------------------
+    def record(self, site: str, step: str, elapsed_ms: int, ok: bool = True, fallback: bool = False):
+        """Encola una observacion de tiempo-hasta-listo (no bloquea)."""
+        if fallback or not ok:
+            self._budgets[(site, step)] = None
+        self._writer.submit((site, step, int(elapsed_ms), int(ok), int(fallback), datetime.now().isoformat()))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que las observaciones encoladas esten en disco."""
+        return self._writer.flush(timeout)
+
+    def budget_ms(self, site: str, step: str, default_ms: int) -> int:
+        """
+        Presupuesto de espera para (sitio, paso): p95 aprendido + margen, nunca
+        mayor que el default. Usa el default si faltan muestras, si hubo un
+        fallback reciente o si la BD no responde.
+        """
+        key = (site, step)
+        if key in self._budgets:
+            cached = self._budgets[key]
+            return default_ms if cached is None else min(cached, default_ms)
+
+        budget = default_ms
+        try:
+            rows = self.store.query(self.SQL_RECENT, (site, step, self.WINDOW))
+            recent_fallback = any(fb for _, _, fb in rows[:self.FALLBACK_LOOKBACK])
+            samples = sorted(elapsed for elapsed, ok, _ in rows if ok)
+            if not recent_fallback and len(samples) >= self.MIN_SAMPLES:
+                p95 = samples[max(0, math.ceil(0.95 * len(samples)) - 1)]
+                budget = int(p95 * self.MARGIN_FACTOR + self.MARGIN_MS)
+        except Exception as e:
+            print(f"Error reading wait observations: {e}")
+
+        self._budgets[key] = budget
+        return min(budget, default_ms)
+
+    # ------------------------------------------------------------------
+    # Esperas
+    # ------------------------------------------------------------------
+    def wait(self, site: str, step: str, default_ms: int, wait_fn: Callable[[int], None]) -> bool:
+        """
+        Ejecuta una espera con presupuesto aprendido.
+
+        Args:
+            wait_fn: Bloquea hasta que la condicion de "listo" se cumpla o lanza
+                     una excepcion tras `timeout_ms` (ej: page.wait_for_function)
+
+        Returns:
+            True si la condicion se cumplio dentro del default conservador.
+        """
+        budget = self.budget_ms(site, step, default_ms)
+        start = time.monotonic()
+        try:
+            wait_fn(budget)
+            self.record(site, step, (time.monotonic() - start) * 1000, ok=True)
+            return True
+        except Exception:
+            pass
+
+        # Lo aprendido se quedo corto: extender hasta el default conservador
+        remaining = default_ms - int((time.monotonic() - start) * 1000)
+        if budget < default_ms and remaining > 0:
+            try:
+                wait_fn(remaining)
+                self.record(site, step, (time.monotonic() - start) * 1000, ok=True, fallback=True)
+                return True
+            except Exception:
+                pass
+
+        self.record(site, step, (time.monotonic() - start) * 1000, ok=False, fallback=budget < default_ms)
+        return False
+
+    def wait_for_function(self, page, step: str, default_ms: int, predicate_js: str, arg=None,
+                          polling="raf") -> bool:
+        """Espera a que `predicate_js` sea verdadero en la pagina, con presupuesto aprendido."""
+        def wait_fn(timeout_ms: int):
+            page.wait_for_function(predicate_js, arg=arg, timeout=max(1, timeout_ms), polling=polling)
+        return self.wait(site_key(page.url), step, default_ms, wait_fn)
+
+
+def create_tables(conn):
+    """Tabla de observaciones (idempotente; via HistoryStore.ensure_schema)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS wait_observations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            site TEXT NOT NULL,
+            step TEXT NOT NULL,
+            elapsed_ms INTEGER NOT NULL,
+            ok BOOLEAN NOT NULL,
+            fallback BOOLEAN DEFAULT 0,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_wait_observations_site_step
+        ON wait_observations (site, step, id)
+    """)
+
+
+# Observaciones fuera de las ultimas `keep` de su (sitio, paso): budget_ms no las lee
+SQL_PRUNE = """
+    DELETE FROM wait_observations WHERE id IN (
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY site, step ORDER BY id DESC) AS rn
+            FROM wait_observations
+        ) WHERE rn > ? LIMIT ?
+    )
+"""
+
+
+def prune_observations(store, keep: int = WaitTuner.WINDOW, batch_size: int = 500) -> int:
+    """
+    Deja solo las ultimas `keep` observaciones de cada (sitio, paso), en
+    transacciones de a lo sumo `batch_size` filas.
+
+    Returns:
+        Observaciones borradas
+    """
+    store.ensure_schema(create_tables, name="wait_observations")
+    deleted = 0
+    while True:
+        n = store.execute(SQL_PRUNE, (keep, batch_size)).rowcount
+        deleted += n
+        if n < batch_size:
+            return deleted
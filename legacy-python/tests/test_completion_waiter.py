@@ -0,0 +1,177 @@
+"""
+tests/test_completion_waiter.py - Espera por señales: red, navegacion, boton final, deadline y bus.
+"""
+
+import pytest
+
+from src import completion_waiter
+from src.completion_waiter import CompletionWaiter
+from src.resolution_bus import ResolutionBus
+
+
+def _is_final(url):
+    return "mega.nz" in url
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+class _Frame:
+    def __init__(self, url=""):
+        self.url = url
+
+
+class _Request:
+    def __init__(self, url):
+        self.url = url
+
+
+class _Element:
+    def __init__(self, page, navigates_to=None):
+        self.page = page
+        self.navigates_to = navigates_to
+        self.clicked = False
+        self.marked = False
+
+    def evaluate(self, script):
+        self.marked = True
+
+    def click(self, timeout=None):
+        self.clicked = True
+        if self.navigates_to:
+            self.page.main_frame.url = self.navigates_to
+            self.page.emit("framenavigated", self.page.main_frame)
+
+
+class _Page:
+    """Pagina falsa: eventos via emit() y un reloj que avanza con wait_for_timeout()."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.main_frame = _Frame("https://acortame.site/x")
+        self.handlers = {}
+        self.bindings = {}
+        self.init_scripts = []
+        self.pending_element = None
+        self.ticks = 0
+        self.on_tick = None
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.handlers[event].remove(handler)
+
+    def emit(self, event, arg):
+        for handler in list(self.handlers.get(event, [])):
+            handler(arg)
+
+    def expose_binding(self, name, callback):
+        self.bindings[name] = callback
+
+    def add_init_script(self, script):
+        self.init_scripts.append(script)
+
+    def evaluate(self, script):
+        pass
+
+    def query_selector(self, selector):
+        return self.pending_element
+
+    def is_closed(self):
+        return False
+
+    def wait_for_timeout(self, ms):
+        self.ticks += 1
+        self.clock.now += ms / 1000
+        if self.on_tick:
+            self.on_tick(self.ticks)
+
+
+@pytest.fixture
+def page(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(completion_waiter, "time", clock)  # Solo el reloj del modulo
+    return _Page(clock)
+
+
+def test_network_request_signal_ends_the_wait_and_publishes(page):
+    bus = ResolutionBus()
+    waiter = CompletionWaiter(page, is_final_url=_is_final, bus=bus)
+    waiter.attach()
+    page.on_tick = lambda n: n == 2 and (page.emit("request", _Request("https://ads.example.com/x")),
+                                         page.emit("request", _Request("https://mega.nz/file/abc")))
+
+    assert waiter.wait(timeout_s=30) == "https://mega.nz/file/abc"
+    assert waiter.source == "network" and page.ticks == 2
+    assert bus.result == "https://mega.nz/file/abc" and bus.source == "completion: network"
+
+    waiter.detach()
+    assert page.handlers["request"] == [] and page.handlers["framenavigated"] == []
+
+
+def test_only_main_frame_navigation_to_a_download_host_counts(page):
+    waiter = CompletionWaiter(page, is_final_url=lambda url: False, is_download_url=_is_final)
+    waiter.attach()
+
+    def tick(n):
+        if n == 1:
+            page.emit("framenavigated", _Frame("https://mega.nz/embed/iframe"))  # no es el main frame
+        elif n == 2:
+            page.main_frame.url = "https://otro-acortador.site/y"
+            page.emit("framenavigated", page.main_frame)
+        elif n == 3:
+            page.main_frame.url = "https://mega.nz/file/abc"
+            page.emit("framenavigated", page.main_frame)
+
+    page.on_tick = tick
+    assert waiter.wait(timeout_s=30) == "https://mega.nz/file/abc"
+    assert waiter.source == "navigation" and page.ticks == 3
+
+
+def test_final_button_from_the_mutation_observer_is_clicked(page):
+    waiter = CompletionWaiter(page, is_final_url=lambda url: False, is_download_url=_is_final)
+    waiter.attach()
+    waiter.watch_final_button()
+    waiter.watch_final_button()  # una sola instalacion
+    assert len(page.init_scripts) == 1 and CompletionWaiter.BINDING_NAME in page.bindings
+
+    button = _Element(page, navigates_to="https://mega.nz/file/abc")
+    page.pending_element = button
+    # El observer en pagina avisa por el binding (source, texto)
+    page.on_tick = lambda n: n == 1 and page.bindings[CompletionWaiter.BINDING_NAME](None, "ingresar")
+
+    assert waiter.wait(timeout_s=30) == "https://mega.nz/file/abc"
+    assert button.marked and button.clicked
+    assert waiter.source == "navigation" and waiter.pending_button is None
+
+
+def test_hard_deadline_without_signals(page):
+    waiter = CompletionWaiter(page, is_final_url=_is_final)
+    waiter.attach()
+
+    assert waiter.wait(timeout_s=2) is None
+    assert page.clock.now == pytest.approx(2.0)
+    assert page.ticks == 2000 // CompletionWaiter.TICK_MS
+
+
+def test_bus_result_from_another_component_short_circuits(page):
+    bus = ResolutionBus()
+    bus.publish("https://mega.nz/file/ya", "network")
+    waiter = CompletionWaiter(page, is_final_url=_is_final, bus=bus)
+    waiter.attach()
+
+    assert waiter.wait(timeout_s=30) == "https://mega.nz/file/ya"
+    assert waiter.source == "network" and page.ticks == 0
+
+    # Publicado mientras se espera: corta en el tick siguiente
+    bus = ResolutionBus()
+    waiter = CompletionWaiter(page, is_final_url=_is_final, bus=bus)
+    page.on_tick = lambda n: bus.publish("https://mega.nz/file/otro", "shortener")
+    assert waiter.wait(timeout_s=30) == "https://mega.nz/file/otro"
+    assert waiter.source == "shortener"
@@ -0,0 +1,77 @@
+"""
+tests/test_hackstore_capture.py - Preparacion en paralelo de las pestañas de captura.
+"""
+
+from src.adapters.hackstore import HackstoreAdapter
+from src.config import SearchCriteria
+from src.wait_tuner import WaitTuner
+
+
+class _Expander:
+    def __init__(self, tab):
+        self.tab = tab
+
+    def click(self, **kwargs):
+        self.tab.log.append(("expand", self.tab.name))
+        self.tab.buttons += 2  # Aparecen los botones de proveedor
+
+
+class _Tab:
+    """Pestaña falsa: el listado aparece tras `ready_after` sondeos."""
+
+    url = "https://hackstore.mx/peliculas/x"
+
+    def __init__(self, name, log, ready_after):
+        self.name = name
+        self.log = log
+        self.ready_after = ready_after
+        self.polls = 0
+        self.buttons = 1  # "MEGA" suelto en la pagina antes de expandir
+
+    def evaluate(self, script, arg=None):
+        if script == HackstoreAdapter.LISTING_READY_JS:
+            self.polls += 1
+            return self.polls >= self.ready_after
+        if script == HackstoreAdapter.PROVIDER_BUTTONS_JS:
+            return self.buttons
+        if script == HackstoreAdapter.LINKS_EXPANDED_JS:
+            self.log.append(("expanded?", self.name))
+            return self.buttons > arg["before"]
+        return 1  # Expansores marcados
+
+    def query_selector_all(self, selector):
+        return [_Expander(self)]
+
+    def wait_for_timeout(self, ms):
+        self.log.append(("wait", ms))
+
+
+def test_tabs_are_prepared_together(tmp_path):
+    adapter = HackstoreAdapter(None, SearchCriteria())
+    adapter.wait_tuner = WaitTuner(db_file=tmp_path / "tuner.db")
+    log = []
+    tabs = [_Tab("a", log, ready_after=3), _Tab("b", log, ready_after=1), _Tab("c", log, ready_after=2)]
+
+    adapter._prepare_tabs(tabs)
+
+    # La carga tarda lo que la pestaña mas lenta (3 sondeos), no la suma
+    assert [t.polls for t in tabs] == [3, 1, 2]
+    assert log.count(("wait", HackstoreAdapter.POLL_MS)) == 2
+    # Expansiones seguidas, sin pausas, y una sola espera comun despues
+    expand_at = [i for i, entry in enumerate(log) if entry[0] == "expand"]
+    first_check = log.index(("expanded?", "a"))
+    assert len(expand_at) == 3 and max(expand_at) < first_check
+    assert not [entry for entry in log if entry[0] == "wait" and entry[1] != HackstoreAdapter.POLL_MS]
+
+    adapter.wait_tuner.flush()
+    steps = [tuple(r) for r in adapter.wait_tuner.store.query("SELECT step, ok FROM wait_observations ORDER BY id")]
+    assert steps == [("capture_ready", 1), ("capture_expand_links", 1)]
+
+
+def test_group_wait_gives_up_at_the_default():
+    adapter = HackstoreAdapter(None, SearchCriteria())
+    log = []
+    never = _Tab("a", log, ready_after=10 ** 9)
+
+    assert adapter.tuned_wait_all([(never, None)], "capture_ready", 50, HackstoreAdapter.LISTING_READY_JS) is False
+    assert adapter.tuned_wait_all([], "capture_ready", 50, HackstoreAdapter.LISTING_READY_JS) is True
@@ -0,0 +1,259 @@
+"""
+tests/test_hackstore_ranking.py - Ranking de candidatos extraidos en pagina.
+"""
+
+from src.adapters.hackstore import HackstoreAdapter
+from src.config import SearchCriteria
+from src.matcher import StreamingLinkMatcher
+
+
+def test_rank_uses_in_page_provider_for_click_candidates():
+    criteria = SearchCriteria(quality="1080p", preferred_providers=["mega"])
+    adapter = HackstoreAdapter(None, criteria)
+    matcher = StreamingLinkMatcher(criteria, k=10)
+    candidates = [
+        {"id": "MEDIAFIRE-0", "url": "btn_click", "text": "mediafire (720p)", "provider": "mediafire", "quality": "720p", "href": None},
+        {"id": "MEGA-0", "url": "btn_click", "text": "mega (1080p)", "provider": "mega", "quality": "1080p", "href": None},
+        {"id": "MEGA-1", "url": "btn_click", "text": "mega (720p)", "provider": "mega", "quality": "720p", "href": None},
+    ]
+
+    adapter._feed_candidates(None, matcher, candidates)
+    ranked = matcher.top()
+
+    assert [cand["id"] for _, cand in ranked] == ["MEGA-0", "MEGA-1", "MEDIAFIRE-0"]
+    best, _ = ranked[0]
+    assert best.provider == "mega"
+    assert best.quality == "1080p"
+
+
+class _ScanPage:
+    """Pagina falsa: evaluate() devuelve lo que devolveria EXTRACT_CANDIDATES_JS."""
+
+    def __init__(self, items):
+        self.items = items
+
+    def evaluate(self, script, arg=None):
+        return self.items
+
+
+def test_perfect_match_fires_on_hackstore_candidate_text():
+    # Criterios reales de la GUI: formato e idioma que el texto de Hackstore nunca muestra
+    criteria = SearchCriteria(quality="1080p", format="WEB-DL", preferred_providers=["mega"])
+    adapter = HackstoreAdapter(None, criteria)
+    page = _ScanPage([
+        {"id": "MEDIAFIRE-0", "text": "MEDIAFIRE", "provider": "mediafire", "quality": "1080p", "href": None},
+        {"id": "MEGA-0", "text": "MEGA", "provider": "mega", "quality": "720p", "href": None},
+    ])
+    matcher = adapter.candidate_matcher()
+    assert not adapter._feed_candidates(None, matcher, adapter._scan_candidates(page, "a", [], True))
+
+    page.items = [{"id": "MEGA-1", "text": "MEGA", "provider": "mega", "quality": "1080p", "href": None}]
+    candidates = adapter._scan_candidates(page, "a", [], True)
+    assert candidates[0]["text"] == "mega (1080p)"
+    assert adapter._feed_candidates(None, matcher, candidates)
+    assert matcher.best()[1]["id"] == "MEGA-1"
+
+
+class _NoNewPage:
+    """expect_page() que nunca ve una pestaña nueva."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def value(self):
+        raise TimeoutError("no new page")
+
+
+class _AbortedButton:
+    """El click navega a un host de descarga; el route lo aborta y lo publica en el bus."""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.clicks = 0
+
+    def scroll_into_view_if_needed(self):
+        pass
+
+    def click(self, **kwargs):
+        self.clicks += 1
+        self.bus.publish("https://mega.nz/file/abc", "network: Navigation (aborted)")
+
+
+class _ListingPage:
+    url = "https://hackstore.mx/peliculas/x"
+
+    def __init__(self, button):
+        self.button = button
+        self.context = self
+
+    def expect_page(self, timeout=None):
+        return _NoNewPage()
+
+    def query_selector(self, selector):
+        return self.button
+
+    def wait_for_timeout(self, ms):
+        pass
+
+
+def test_aborted_same_tab_navigation_resolves_from_the_bus():
+    from src.network_analyzer import NetworkAnalyzer
+    from src.resolution_bus import ResolutionBus
+
+    class _Dataset:
+        def __init__(self):
+            self.labels = []
+
+        def record_outcomes(self, features, labels, site=None):
+            self.labels.extend(labels)
+
+    bus = ResolutionBus()
+    dataset = _Dataset()
+    adapter = HackstoreAdapter(None, SearchCriteria())
+    adapter.set_analyzers(network_analyzer=NetworkAnalyzer(), dom_analyzer=dataset, bus=bus)
+    button = _AbortedButton(bus)
+    candidate = {"id": "MEGA-0", "url": "btn_click", "text": "mega (1080p)", "features": [1.0]}
+
+    final_url = adapter._follow_candidate(_ListingPage(button), candidate)
+    assert final_url == "https://mega.nz/file/abc"
+    assert button.clicks == 1  # sin segundo click
+
+    adapter._record_click_outcome(candidate, final_url)
+    assert dataset.labels == [True]
+
+
+class _Expander:
+    def __init__(self, page):
+        self.page = page
+
+    def click(self, **kwargs):
+        self.page.expanded = True
+
+
+class _RetryPage:
+    """Listado con un MEGA 1080p visible y un MEDIAFIRE que aparece al expandir."""
+
+    url = "https://hackstore.mx/peliculas/x"
+
+    def __init__(self):
+        self.expanded = False
+        self.gotos = 0
+        self.context = self
+
+    def new_page(self):
+        return self
+
+    def goto(self, url, **kwargs):
+        self.gotos += 1
+        self.expanded = False
+
+    def wait_for_load_state(self, *args, **kwargs):
+        pass
+
+    def wait_for_function(self, *args, **kwargs):
+        pass
+
+    def wait_for_timeout(self, ms):
+        pass
+
+    def query_selector(self, selector):
+        return None
+
+    def query_selector_all(self, selector):
+        return [_Expander(self)]
+
+    def evaluate(self, script, arg=None):
+        if script == HackstoreAdapter.EXTRACT_CANDIDATES_JS:
+            items = [{"id": "MEGA-0", "text": "MEGA", "provider": "mega", "quality": "1080p",
+                      "href": "https://mega.nz/file/dead"}]
+            if self.expanded:
+                items.append({"id": "MEDIAFIRE-0", "text": "MEDIAFIRE", "provider": "mediafire",
+                              "quality": "1080p", "href": "https://www.mediafire.com/file/ok"})
+            return items
+        if script == HackstoreAdapter.PROVIDER_BUTTONS_JS:
+            return 2 if self.expanded else 1
+        return 1  # Expansores marcados
+
+    def close(self):
+        pass
+
+
+def test_failed_perfect_match_expands_and_retries_the_rest():
+    criteria = SearchCriteria(quality="1080p", format="WEB-DL", preferred_providers=["mega"])
+    page = _RetryPage()
+    adapter = HackstoreAdapter(page, criteria)
+    adapter.batch_mode = True
+    followed = []
+
+    def extract(page, matcher):
+        # Match perfecto antes de expandir: no se expande ninguna seccion
+        links = adapter._scan_candidates(page, "a", [], True)
+        assert adapter._feed_candidates(page, matcher, links)
+        return links
+
+    def follow(page, candidate):
+        followed.append(candidate["id"])
+        return None if candidate["id"] == "MEGA-0" else candidate["url"]
+
+    adapter._extract_download_links = extract
+    adapter._follow_candidate = follow
+
+    best = adapter.resolve(page.url)
+
+    assert followed == ["MEGA-0", "MEDIAFIRE-0"]
+    assert best.url == "https://www.mediafire.com/file/ok"
+    assert page.gotos == 2  # Carga inicial + recarga para expandir todo
+
+
+class _InternalNavButton:
+    """El click navega la misma pestaña a otra pagina de hackstore."""
+
+    def __init__(self, page):
+        self.page = page
+
+    def scroll_into_view_if_needed(self):
+        pass
+
+    def click(self, **kwargs):
+        self.page.url = "https://hackstore.mx/go/123"
+
+
+class _SameTabPage(_RetryPage):
+    def __init__(self):
+        super().__init__()
+        self.log = []
+
+    def expect_page(self, timeout=None):
+        return _NoNewPage()
+
+    def query_selector(self, selector):
+        return _InternalNavButton(self)
+
+    def goto(self, url, **kwargs):
+        super().goto(url)
+        self.url = url
+        self.log.append("goto")
+
+    def wait_for_function(self, script, arg=None, **kwargs):
+        if script == HackstoreAdapter.LINKS_EXPANDED_JS:
+            self.log.append(("expanded?", self.expanded, arg["before"]))
+
+    def evaluate(self, script, arg=None):
+        if script == HackstoreAdapter.EXTRACT_CANDIDATES_JS:
+            self.log.append("scan")
+        return super().evaluate(script, arg)
+
+
+def test_same_tab_rescan_waits_for_the_expanded_links():
+    page = _SameTabPage()
+    adapter = HackstoreAdapter(page, SearchCriteria())
+    candidate = {"id": "MEGA-0", "url": "btn_click", "text": "mega (1080p)"}
+
+    assert adapter._follow_candidate(page, candidate) is None
+
+    assert page.url == _RetryPage.url
+    assert page.log == ["goto", ("expanded?", True, 1), "scan"]
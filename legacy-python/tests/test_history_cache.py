@@ -0,0 +1,79 @@
+"""
+tests/test_history_cache.py - Cache de lecturas del historial (data_version + deltas).
+"""
+
+import sqlite3
+import threading
+
+from src.history_manager import HistoryManager
+from src.history_store import register_functions
+
+
+def _add(manager, i, provider="mega"):
+    return manager.add_record(f"https://hackstore.mx/peliculas/{i}", "https://mega.nz/file/x",
+                              "1080p", "WEB-DL", provider, 80.0 + i)
+
+
+def test_reads_are_cached_until_another_connection_commits(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    for i in range(3):
+        _add(manager, i)
+    reads = manager.reads
+    assert HistoryManager(db_path=tmp_path).reads is reads
+
+    records, _ = reads.records_page()
+    misses = reads.misses
+    assert [r.id for r in reads.records_page()[0]] == [r.id for r in records]
+    assert reads.statistics()["total_records"] == 3
+    assert reads.misses == misses + 1  # solo las stats fueron a SQLite
+
+    # Escritura desde otro hilo (otra conexion del store)
+    t = threading.Thread(target=lambda: (_add(manager, 3), manager.store.close()))
+    t.start()
+    t.join()
+    assert len(reads.records_page()[0]) == 4
+    assert reads.statistics()["total_records"] == 4
+
+    # Escritura desde otro proceso (conexion sqlite3 independiente)
+    conn = sqlite3.connect(manager.db_path)
+    register_functions(conn)
+    with conn:
+        conn.execute(HistoryManager.SQL_INSERT, ("https://hackstore.mx/peliculas/x", "", "", "", "mega", 1.0,
+                                                 "2099-01-01T00:00:00", "", "", None))
+    conn.close()
+    assert reads.records_page()[0][0].original_url == "https://hackstore.mx/peliculas/x"
+
+
+def test_toggle_delete_and_notes_apply_as_deltas(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    ids = [_add(manager, i) for i in range(4)]
+    reads = manager.reads
+    page, _ = reads.records_page()
+    assert reads.favorites() == []
+    reads.statistics()
+    misses = reads.misses
+
+    assert manager.toggle_favorite(ids[0])
+    assert manager.update_notes(ids[1], "buena copia")
+    assert manager.delete_record(ids[2])
+    page_after, _ = reads.records_page()
+    assert reads.misses == misses  # la pagina no se releyo
+    assert page[-1].is_favorite is False  # lo devuelto antes no cambia
+    by_id = {r.id: r for r in page_after}
+    assert ids[2] not in by_id
+    assert by_id[ids[0]].is_favorite and by_id[ids[1]].notes == "buena copia"
+
+    # Favoritos y estadisticas se recalculan; coinciden con la BD
+    assert [r.id for r in reads.favorites()] == [ids[0]]
+    assert reads.statistics()["total_favorites"] == 1
+    assert reads.misses == misses + 2
+    assert [(r.id, r.is_favorite, r.notes) for r in page_after] == \
+        [(r.id, r.is_favorite, r.notes) for r in manager.get_records_page()[0]]
+
+    # Desmarcar saca la fila de las paginas de favoritos sin releer
+    reads.records_page(favorites_only=True)
+    misses = reads.misses
+    assert manager.toggle_favorite(ids[0])
+    assert reads.records_page(favorites_only=True)[0] == []
+    assert reads.misses == misses
+    assert not manager.toggle_favorite(999999)
@@ -0,0 +1,64 @@
+"""
+tests/test_history_columnar.py - Exportacion columnar tipada del historial (Parquet/Arrow/npz).
+"""
+
+import numpy as np
+import pytest
+
+from src.history_manager import HistoryManager
+from src import history_columnar
+
+
+def _manager(tmp_path, n=10):
+    manager = HistoryManager(db_path=tmp_path)
+    for i in range(n):
+        timings = {"browser_ms": 900 + i, "resolve_ms": 5000 + i}
+        if i % 2:
+            timings["total_ms"] = 7000 + i
+        manager.add_record(f"https://hackstore.mx/peliculas/{i}", f"https://mega.nz/file/{i}",
+                           "1080p", "WEB-DL", "mega" if i % 3 else "drive.google", float(i), timings=timings)
+    manager.add_record("https://hackstore.mx/peliculas/old", "")  # Sin timings
+    return manager
+
+
+def test_npz_columns_are_typed_and_written_by_row_group(tmp_path):
+    manager = _manager(tmp_path)
+    path = tmp_path / "history.npz"
+
+    count, written = history_columnar.export_columnar(manager.store, path, row_group_size=4)
+    assert count == 11 and written == path
+    with np.load(path) as data:
+        assert len([k for k in data.files if k.startswith("score/")]) == 3
+
+    columns = history_columnar.load_npz(path)
+    assert columns["score"].dtype == np.float64 and columns["score"][:10].sum() == 45.0
+    assert columns["is_favorite"].dtype == np.bool_
+    assert columns["timestamp"].dtype == np.dtype("datetime64[us]") and not np.isnat(columns["timestamp"]).any()
+    assert list(columns["provider"][:3]) == ["drive.google", "mega", "mega"]
+    assert columns["timing_resolve_ms"][3] == 5003
+    assert np.isnan(columns["timing_total_ms"][0]) and columns["timing_total_ms"][1] == 7001
+    assert np.isnan(columns["timing_browser_ms"][10])
+
+
+def test_falls_back_to_npz_without_pyarrow(tmp_path, monkeypatch):
+    manager = _manager(tmp_path, n=2)
+    monkeypatch.setattr(history_columnar, "PYARROW_AVAILABLE", False)
+
+    count, written = history_columnar.export_columnar(manager.store, tmp_path / "history.parquet")
+    assert count == 3 and written.suffix == ".npz"
+    assert len(history_columnar.load_npz(written)["id"]) == 3
+
+
+def test_parquet_and_arrow_with_pyarrow(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    manager = _manager(tmp_path)
+
+    count, path = history_columnar.export_columnar(manager.store, tmp_path / "history.parquet", row_group_size=4)
+    table = pq.read_table(path)
+    assert count == 11 and pq.ParquetFile(path).num_row_groups == 3
+    assert table.schema.field("timestamp").type == pa.timestamp("us")
+
+    count, path = history_columnar.export_columnar(manager.store, tmp_path / "history.arrow")
+    with pa.ipc.open_file(path) as reader:
+        assert reader.read_all().column("timing_total_ms").null_count == 6
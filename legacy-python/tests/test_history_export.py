@@ -0,0 +1,75 @@
+"""
+tests/test_history_export.py - Exportacion del historial en streaming (NDJSON/CSV/JSON, gzip/xz, stdout).
+"""
+
+import csv
+import gzip
+import io
+import json
+import lzma
+import sys
+
+from src.history_manager import HistoryManager
+from src import history_export
+
+
+def _manager(tmp_path, n=25):
+    manager = HistoryManager(db_path=tmp_path)
+    rows = [(f"https://hackstore.mx/peliculas/{i}", f"https://mega.nz/file/{i}", "1080p", "WEB-DL", "mega",
+             float(i), f"2024-01-01T00:00:{i:02d}", "ñandú" if i == 3 else "", "", None) for i in range(n)]
+    manager.store.executemany(HistoryManager.SQL_INSERT, rows)
+    manager.toggle_favorite(1)
+    return manager
+
+
+def test_ndjson_gzip_roundtrip_in_chunks(tmp_path):
+    manager = _manager(tmp_path)
+    path = tmp_path / "history.ndjson.gz"
+
+    assert history_export.export_history(manager.store, path, "ndjson", chunk_size=4) == 25
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 25
+    assert records[0]["original_url"].endswith("/24")  # mas recientes primero
+    assert records[-4]["notes"] == "ñandú"
+    assert sum(r["is_favorite"] for r in records) == 1
+
+
+def test_json_object_keeps_previous_shape(tmp_path):
+    manager = _manager(tmp_path)
+    ok, path = manager.export_to_json(filepath=tmp_path / "history.json")
+    assert ok
+    data = json.loads(open(path, encoding="utf-8").read())
+    assert data["total_records"] == 25 and len(data["records"]) == 25
+    assert set(data["records"][0]) == set(history_export.EXPORT_FIELDS)
+
+    # Con una lista explicita de registros, mismo formato que en streaming
+    ok, path = manager.export_to_json(manager.get_favorites(), filepath=tmp_path / "favorites.json")
+    favorites = json.loads(open(path, encoding="utf-8").read())["records"]
+    assert ok and len(favorites) == 1 and list(favorites[0]) == history_export.EXPORT_FIELDS
+    (tmp_path / "empty").mkdir()
+    assert manager.has_records() and not HistoryManager(db_path=tmp_path / "empty").has_records()
+
+    out = io.StringIO()
+    assert history_export.write_json([], out) == 0
+    assert json.loads(out.getvalue())["records"] == []
+
+
+def test_csv_xz_and_favorites_only(tmp_path):
+    manager = _manager(tmp_path)
+    path = tmp_path / "favorites.csv.xz"
+    assert manager.export_stream(path, "csv", favorites_only=True) == 1
+    with lzma.open(path, "rt", encoding="utf-8", newline="") as f:
+        [row] = list(csv.DictReader(f))
+    assert row["is_favorite"] == "Yes" and row["original_url"].endswith("/0")
+
+
+def test_stdout_pipe(tmp_path, monkeypatch):
+    manager = _manager(tmp_path, n=3)
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    monkeypatch.setattr(sys, "stdout", stdout)
+
+    assert history_export.export_history(manager.store, "-", "ndjson", compression="gzip") == 3
+    lines = gzip.decompress(stdout.buffer.getvalue()).decode("utf-8").splitlines()
+    assert len(lines) == 3
+    assert not stdout.closed
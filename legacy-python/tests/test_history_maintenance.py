@@ -0,0 +1,95 @@
+"""
+tests/test_history_maintenance.py - Retencion: resumen diario, archivo comprimido y compactacion.
+"""
+
+import gzip
+import json
+from datetime import datetime
+
+from src.history_manager import HistoryManager
+from src import history_maintenance
+from src.history_maintenance import RetentionPolicy
+from src.wait_tuner import WaitTuner
+
+
+NOW = datetime(2024, 6, 1)
+
+
+def _manager(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    rows = []
+    for i in range(40):
+        day = "2024-01-0%d" % (1 + i % 3) if i < 30 else "2024-05-30"
+        rows.append((f"https://hackstore.mx/peliculas/{i}", f"https://mega.nz/file/{i}" if i % 4 else "",
+                     "1080p", "WEB-DL", "mega" if i % 2 else "drive.google", 50.0,
+                     f"{day}T10:00:{i:02d}", "", "", None))
+    manager.store.executemany(HistoryManager.SQL_INSERT, rows)
+    manager.toggle_favorite(1)  # Favorito viejo
+    return manager
+
+
+def test_old_rows_are_rolled_up_archived_and_deleted(tmp_path):
+    manager = _manager(tmp_path)
+    policy = RetentionPolicy(keep_days=30, archive_dir=str(tmp_path / "archive"), batch_size=7)
+
+    summary = history_maintenance.run_maintenance(manager, policy, now=NOW, log=lambda msg: None)
+
+    assert summary["archived"] == 29
+    remaining = manager.get_all_records()
+    assert len(remaining) == 11 and any(r.is_favorite for r in remaining)
+    assert manager.get_statistics()["total_records"] == 11
+
+    with gzip.open(summary["archive_file"], "rt", encoding="utf-8") as f:
+        archived = [json.loads(line) for line in f]
+    assert len(archived) == 29 and {r["id"] for r in archived}.isdisjoint(r.id for r in remaining)
+
+    rollups = history_maintenance.daily_rollups(manager.store)
+    assert sum(r["n"] for r in rollups) == 29
+    assert {r["day"] for r in rollups} == {"2024-01-01", "2024-01-02", "2024-01-03"}
+    assert sum(r["successful"] for r in rollups) == sum(1 for r in archived if r["resolved_url"])
+    # Las URLs de las filas archivadas ya no se guardan
+    assert summary["orphan_urls"] > 0
+    assert not manager.has_resolved("https://hackstore.mx/peliculas/2")
+
+
+def test_second_run_and_dry_run_change_nothing(tmp_path):
+    manager = _manager(tmp_path)
+    policy = RetentionPolicy(keep_days=30, archive_dir=str(tmp_path / "archive"))
+    quiet = lambda msg: None
+
+    assert history_maintenance.run_maintenance(manager, policy, now=NOW, dry_run=True, log=quiet)["archived"] == 29
+    assert len(manager.get_all_records()) == 40
+
+    history_maintenance.run_maintenance(manager, policy, now=NOW, log=quiet)
+    again = history_maintenance.run_maintenance(manager, policy, now=NOW, log=quiet)
+    assert again["archived"] == 0 and again["archive_file"] is None
+    assert sum(r["n"] for r in history_maintenance.daily_rollups(manager.store)) == 29
+
+
+def test_incremental_vacuum_returns_free_pages(tmp_path):
+    manager = _manager(tmp_path)
+    manager.store.executemany(HistoryManager.SQL_INSERT, [
+        (f"https://hackstore.mx/peliculas/big-{i}", "", "", "", "", 0.0, f"2023-01-01T00:{i // 60:02d}:{i % 60:02d}",
+         "x" * 2000, "", None) for i in range(300)])
+    assert manager.store.query_one("PRAGMA auto_vacuum")[0] == 2
+
+    summary = history_maintenance.run_maintenance(
+        manager, RetentionPolicy(keep_days=30, archive=False), now=NOW, log=lambda msg: None)
+    assert summary["archive_file"] is None and summary["freed_pages"] > 0
+    assert manager.store.query_one("PRAGMA freelist_count")[0] == 0
+
+
+def test_wait_observations_are_trimmed_to_the_tuner_window(tmp_path):
+    manager = _manager(tmp_path)
+    tuner = WaitTuner(manager.db_path)
+    for elapsed in range(WaitTuner.WINDOW + 20):
+        tuner.record("hackstore.mx", "expand_links", elapsed)
+    tuner.flush()
+    quiet = lambda msg: None
+
+    off = history_maintenance.run_maintenance(manager, RetentionPolicy(wait_observations=0), now=NOW, log=quiet)
+    assert off["wait_observations"] == 0
+    summary = history_maintenance.run_maintenance(manager, RetentionPolicy(), now=NOW, log=quiet)
+
+    assert summary["wait_observations"] == 20
+    assert manager.store.query_one("SELECT MIN(elapsed_ms), COUNT(*) FROM wait_observations")[:] == (20, WaitTuner.WINDOW)
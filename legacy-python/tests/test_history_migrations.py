@@ -0,0 +1,87 @@
+"""
+tests/test_history_migrations.py - Esquema versionado y URLs internadas por fingerprint.
+"""
+
+import sqlite3
+
+from src.history_manager import HistoryManager
+from src import history_schema
+from src.history_store import url_fingerprint
+
+
+def _old_database(tmp_path):
+    """BD con la tabla original (URLs en texto, sin user_version)."""
+    conn = sqlite3.connect(tmp_path / HistoryManager.DB_FILENAME)
+    conn.execute("""
+        CREATE TABLE resolution_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, original_url TEXT NOT NULL, resolved_url TEXT,
+            quality TEXT, format_type TEXT, provider TEXT, score REAL, is_favorite BOOLEAN DEFAULT 0,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, notes TEXT, UNIQUE(original_url, timestamp))
+    """)
+    rows = [("https://hackstore.mx/peliculas/coco-2017", "https://mega.nz/file/a", "1080p", "mega", 1, "t1", "ok"),
+            ("https://hackstore.mx/peliculas/coco-2017", "https://mega.nz/file/a", "720p", "mega", 0, "t2", ""),
+            ("https://hackstore.mx/peliculas/dune-2021", "", "", "", 0, "t3", ""),
+            ("https://hackstore.mx/peliculas/borrada", "https://mega.nz/file/b", "", "mega", 0, "t4", "")]
+    conn.executemany("INSERT INTO resolution_history (original_url, resolved_url, quality, provider, is_favorite, "
+                     "timestamp, notes) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.execute("DELETE FROM resolution_history WHERE id = 4")
+    conn.commit()
+    conn.close()
+
+
+def test_new_database_is_at_latest_version(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    conn = manager.store.connection()
+    assert history_schema.schema_version(conn) == history_schema.SCHEMA_VERSION
+    kinds = {row["name"]: row["type"] for row in manager.store.query("SELECT name, type FROM sqlite_master")}
+    assert kinds["resolutions"] == "table" and kinds["urls"] == "table"
+    assert kinds["resolution_history"] == "view"
+
+    # Migrar otra vez no hace nada
+    history_schema.migrate(conn)
+    assert history_schema.schema_version(conn) == history_schema.SCHEMA_VERSION
+
+
+def test_existing_rows_are_migrated_with_shared_urls(tmp_path):
+    _old_database(tmp_path)
+    manager = HistoryManager(db_path=tmp_path)
+
+    records = manager.get_all_records()
+    assert [r.id for r in records] == [3, 2, 1]
+    assert records[2].is_favorite and records[2].notes == "ok" and records[2].quality == "1080p"
+    assert records[0].resolved_url == ""
+    # coco (x2), dune y mega/a: cada URL distinta una sola vez
+    assert manager.store.query_one("SELECT COUNT(*) FROM urls")[0] == 3
+    assert manager.store.query_one("SELECT title FROM resolutions WHERE id = 1")[0] == "coco 2017"
+
+    assert [r.id for r in manager.search_records("coco")] and manager.get_statistics()["total_favorites"] == 1
+    # AUTOINCREMENT conservado: el id 4 (borrado) no se reutiliza
+    assert manager.add_record("https://hackstore.mx/peliculas/nueva", "https://mega.nz/file/a") == 5
+
+
+def test_inserts_intern_urls_and_has_resolved_probes_by_fingerprint(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    first = manager.add_record("https://hackstore.mx/peliculas/coco-2017", "https://mega.nz/file/a")
+    manager.add_record_async("https://hackstore.mx/peliculas/coco-2017", "https://mega.nz/file/a")
+    manager.add_record("https://hackstore.mx/peliculas/dune-2021", "")
+    assert manager.flush_pending(timeout=10)
+
+    assert first == 1
+    assert manager.store.query_one("SELECT COUNT(*) FROM urls")[0] == 3
+    fingerprint = manager.store.query_one("SELECT fingerprint FROM urls WHERE id = 1")[0]
+    assert fingerprint == url_fingerprint("https://hackstore.mx/peliculas/coco-2017")
+
+    assert manager.has_resolved("https://hackstore.mx/peliculas/coco-2017")
+    assert not manager.has_resolved("https://hackstore.mx/peliculas/dune-2021")
+    assert not manager.has_resolved("https://hackstore.mx/peliculas/otra")
+
+
+def test_fingerprint_collision_keeps_urls_apart(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    manager.add_record("https://hackstore.mx/peliculas/a", "https://mega.nz/file/a")
+    # Simular otra URL con el mismo fingerprint
+    manager.store.execute("INSERT INTO urls (fingerprint, url) VALUES (?, ?)",
+                          (url_fingerprint("https://hackstore.mx/peliculas/a"), "https://hackstore.mx/peliculas/b"))
+
+    assert manager.has_resolved("https://hackstore.mx/peliculas/a")
+    assert not manager.has_resolved("https://hackstore.mx/peliculas/b")
@@ -0,0 +1,70 @@
+"""
+tests/test_history_search.py - Busqueda FTS5 del historial (prefijos, ranking, triggers).
+"""
+
+import sqlite3
+
+from src.history_manager import HistoryManager
+from src.url_parser import extract_title_from_url
+
+
+def test_title_is_the_slug_without_release_tokens():
+    assert extract_title_from_url("https://hackstore.mx/peliculas/interstellar-2014-bluray-1080p") == "interstellar 2014"
+    assert extract_title_from_url("https://www.peliculasgd.net/la-empleada-2025-web-dl-1080p-latino/") == "la empleada 2025"
+    assert extract_title_from_url("https://hackstore.mx/") == ""
+
+
+def test_prefix_search_ranks_title_matches_first(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    assert manager.fts_available
+    in_notes = manager.add_record("https://hackstore.mx/peliculas/eragon-2006", "https://mega.nz/file/1",
+                                  notes="parecida a interstellar")
+    in_title = manager.add_record("https://hackstore.mx/peliculas/interstellar-2014-bluray-1080p",
+                                  "https://mega.nz/file/2")
+    manager.add_record("https://hackstore.mx/peliculas/dune-2021", "https://mega.nz/file/3")
+
+    assert [r.id for r in manager.search_records("inter")] == [in_title, in_notes]
+    assert [r.id for r in manager.search_records("Inter 2014")] == [in_title]
+    assert len(manager.search_records("hackstore", limit=2)) == 2
+    # Sintaxis FTS en el texto del usuario no rompe la consulta
+    assert manager.search_records('"dune (2021*') != []
+
+
+def test_triggers_keep_index_in_sync(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    record_id = manager.add_record("https://hackstore.mx/peliculas/dune-2021", "https://mega.nz/file/1")
+
+    manager.update_notes(record_id, "version extendida")
+    assert [r.id for r in manager.search_records("extend")] == [record_id]
+    manager.update_notes(record_id, "")
+    assert manager.search_records("extend") == []
+
+    manager.delete_record(record_id)
+    assert manager.search_records("dune") == []
+
+
+def test_existing_database_gets_title_and_index(tmp_path):
+    conn = sqlite3.connect(tmp_path / HistoryManager.DB_FILENAME)
+    conn.execute("""
+        CREATE TABLE resolution_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, original_url TEXT NOT NULL, resolved_url TEXT,
+            quality TEXT, format_type TEXT, provider TEXT, score REAL, is_favorite BOOLEAN DEFAULT 0,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, notes TEXT, UNIQUE(original_url, timestamp))
+    """)
+    conn.execute("INSERT INTO resolution_history (original_url, resolved_url, notes) "
+                 "VALUES ('https://hackstore.mx/peliculas/coco-2017-1080p', 'https://mega.nz/file/1', '')")
+    conn.commit()
+    conn.close()
+
+    manager = HistoryManager(db_path=tmp_path)
+    [record] = manager.search_records("coco")
+    assert manager.store.query_one("SELECT title FROM resolution_history")["title"] == "coco 2017"
+
+
+def test_like_fallback_without_fts(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    record_id = manager.add_record("https://hackstore.mx/peliculas/coco-2017", "https://mega.nz/file/1")
+    manager._fts_available = False
+
+    assert [r.id for r in manager.search_records("coco")] == [record_id]
+    assert [r.id for r in manager.search_records("")] == [record_id]
@@ -0,0 +1,77 @@
+"""
+tests/test_history_stats.py - Estadisticas del historial en SQL y contadores materializados.
+"""
+
+import sqlite3
+
+from src.history_manager import HistoryManager
+
+
+def _add(manager, i, provider, quality, score, resolved="https://mega.nz/file/x"):
+    manager.store.execute(HistoryManager.SQL_INSERT, (
+        f"https://hackstore.mx/peliculas/{i}", resolved, quality, "WEB-DL", provider, score,
+        f"2024-01-{i + 1:02d}T12:00:00", "", "", None))
+
+
+def _python_stats(manager):
+    """Calculo de referencia sobre todas las filas."""
+    records = manager.get_all_records()
+    ok = [r for r in records if r.resolved_url and r.resolved_url != "LINK_NOT_RESOLVED"]
+    return (len(records), len([r for r in records if r.is_favorite]), len(ok) / len(records) * 100,
+            sum(r.score for r in records) / len(records))
+
+
+def test_counters_follow_inserts_updates_and_deletes(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    _add(manager, 0, "mega", "1080p", 90.0)
+    _add(manager, 1, "mega", "720p", 70.0)
+    _add(manager, 2, "drive.google", "1080p", 50.0, resolved="LINK_NOT_RESOLVED")
+    first = manager.get_all_records()[-1]
+    manager.toggle_favorite(first.id)
+
+    stats = manager.get_statistics()
+    assert (stats["total_records"], stats["total_favorites"], stats["success_rate"], stats["average_score"]) \
+        == _python_stats(manager)
+    assert stats["most_used_provider"] == "mega" and stats["most_used_quality"] == "1080p"
+    assert stats["providers"] == {"mega": 2, "drive.google": 1}
+
+    manager.store.execute("UPDATE resolutions SET provider = 'drive.google' WHERE id = ?", (first.id,))
+    manager.delete_record(manager.get_all_records()[0].id)
+    stats = manager.get_statistics()
+    assert (stats["total_records"], stats["total_favorites"], stats["success_rate"], stats["average_score"]) \
+        == _python_stats(manager)
+    assert stats["providers"] == {"mega": 1, "drive.google": 1}
+
+    manager.clear_history()
+    assert manager.get_statistics()["total_records"] == 0
+    assert manager.get_statistics()["most_used_provider"] is None
+
+
+def test_time_window_aggregates(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    for i in range(10):
+        _add(manager, i, "mega" if i < 7 else "mediafire", "1080p", float(i))
+
+    window = manager.get_statistics(since="2024-01-08", until="2024-01-10")
+    assert window["total_records"] == 2
+    assert window["most_used_provider"] == "mediafire"
+    assert window["average_score"] == 7.5
+    assert manager.get_statistics(since="2025-01-01")["total_records"] == 0
+
+
+def test_existing_rows_are_counted_when_counters_are_created(tmp_path):
+    conn = sqlite3.connect(tmp_path / HistoryManager.DB_FILENAME)
+    conn.execute("""
+        CREATE TABLE resolution_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, original_url TEXT NOT NULL, resolved_url TEXT,
+            quality TEXT, format_type TEXT, provider TEXT, score REAL, is_favorite BOOLEAN DEFAULT 0,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, notes TEXT, UNIQUE(original_url, timestamp))
+    """)
+    conn.executemany("INSERT INTO resolution_history (original_url, resolved_url, provider, score) "
+                     "VALUES (?, 'https://mega.nz/file/1', 'mega', 80)", [("a",), ("b",)])
+    conn.commit()
+    conn.close()
+
+    stats = HistoryManager(db_path=tmp_path).get_statistics()
+    assert stats["total_records"] == 2 and stats["providers"] == {"mega": 2}
+    assert stats["average_score"] == 80.0
@@ -0,0 +1,156 @@
+"""
+tests/test_history_store.py - Acceso SQLite compartido del historial (WAL, conexion por hilo).
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from src.history_manager import HistoryManager
+from src.history_store import HistoryStore
+
+
+def test_store_is_shared_and_schema_created_once(tmp_path):
+    first = HistoryManager(db_path=tmp_path)
+    second = HistoryManager(db_path=tmp_path)
+    assert first.store is second.store
+
+    calls = []
+    first.store.ensure_schema(lambda conn: calls.append(1), name="probe")
+    second.store.ensure_schema(lambda conn: calls.append(1), name="probe")
+    assert calls == [1]
+
+
+def test_connection_per_thread_in_wal_mode(tmp_path):
+    store = HistoryStore(tmp_path / "store.db")
+    main_conn = store.connection()
+    assert store.connection() is main_conn
+    assert store.query_one("PRAGMA journal_mode")[0] == "wal"
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(store.connection()))
+    t.start()
+    t.join()
+    assert other[0] is not main_conn
+    store.close_all()
+
+
+def test_crud_through_store(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    record_id = manager.add_record("https://hackstore.mx/peliculas/x", "https://mega.nz/file/1",
+                                   "1080p", "WEB-DL", "mega", 95.0)
+
+    assert manager.toggle_favorite(record_id)
+    assert manager.update_notes(record_id, "buena copia")
+    [record] = manager.get_favorites()
+    assert record.is_favorite and record.notes == "buena copia"
+    assert manager.search_records("copia")[0].id == record_id
+
+    assert manager.toggle_favorite(record_id)
+    assert manager.get_favorites() == []
+    assert not manager.toggle_favorite(9999)
+
+    assert manager.delete_record(record_id)
+    assert manager.get_all_records() == []
+
+
+def test_readers_do_not_block_while_writers_insert(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    errors = []
+
+    def writer(w):
+        for i in range(50):
+            if manager.add_record(f"https://hackstore.mx/peliculas/{w}-{i}", "https://mega.nz/file/x") is None:
+                errors.append("write")
+        manager.store.close()
+
+    def reader():
+        for _ in range(50):
+            try:
+                manager.get_all_records()
+            except Exception:
+                errors.append("read")
+        manager.store.close()
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(3)]
+    threads += [threading.Thread(target=reader) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(manager.get_all_records()) == 150
+
+
+def _fill(manager, n):
+    rows = [(f"https://hackstore.mx/peliculas/{i}", f"https://mega.nz/file/{i}", "1080p", "WEB-DL",
+             "mega" if i % 2 else "drive.google", 80.0, f"2024-01-01T00:00:{i // 10:02d}.{i % 10}", "", "", None)
+            for i in range(n)]
+    manager.store.executemany(HistoryManager.SQL_INSERT, rows)
+
+
+def test_keyset_pages_cover_history_without_gaps_or_repeats(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    _fill(manager, 95)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        records, cursor = manager.get_records_page(after=cursor, limit=20)
+        seen.extend(r.id for r in records)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 5
+    assert seen == [r.id for r in manager.get_all_records()]
+    assert len(set(seen)) == 95
+
+
+def test_filtered_pages_and_lazy_iterator(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    _fill(manager, 30)
+    for record in manager.get_all_records()[:7]:
+        manager.toggle_favorite(record.id)
+
+    favorites, cursor = manager.get_records_page(favorites_only=True, limit=5)
+    assert len(favorites) == 5 and cursor is not None
+    rest, cursor = manager.get_records_page(after=cursor, favorites_only=True, limit=5)
+    assert len(rest) == 2 and cursor is None
+
+    drive = list(manager.iter_records(provider="drive.google", page_size=4))
+    assert len(drive) == 15 and all(r.provider == "drive.google" for r in drive)
+
+    plan = manager.store.query(
+        "EXPLAIN QUERY PLAN SELECT * FROM resolution_history WHERE is_favorite = 1 "
+        "AND (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT 5", ("z", 1))
+    assert "idx_history_favorite" in plan[0]["detail"]
+
+
+def test_connections_of_finished_threads_are_closed(tmp_path):
+    store = HistoryStore(tmp_path / "store.db")
+    store.connection()
+    seen = []
+
+    def rerun():
+        # Como un rerun de Streamlit o un run.io_bound de NiceGUI: hilo corto
+        seen.append(store.connection())
+        store.query_one("SELECT 1")
+
+    for _ in range(50):
+        t = threading.Thread(target=rerun)
+        t.start()
+        t.join()
+        assert store.open_connections <= 2  # la del hilo principal y como mucho una mas
+
+    assert store.open_connections == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        seen[0].execute("SELECT 1")  # cerrada al terminar su hilo
+
+    store.close()
+    assert store.open_connections == 0
+    store.connection()  # el hilo puede volver a abrir la suya
+    assert store.open_connections == 1
+    store.close_all()
+    assert store.open_connections == 0
@@ -0,0 +1,105 @@
+"""
+tests/test_history_writer.py - Escritura del historial por lotes en segundo plano.
+"""
+
+import threading
+
+from src.history_manager import HistoryManager
+from src.history_writer import HistoryWriter
+
+
+def test_async_records_are_batched_and_flushed(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    for i in range(500):
+        assert manager.add_record_async(f"https://hackstore.mx/peliculas/{i}", "https://mega.nz/file/x")
+
+    assert manager.flush_pending(timeout=10)
+    writer = manager.writer
+    assert writer.queue_depth == 0
+    assert writer.written == 500
+    # Coalescido en transacciones de varias filas
+    assert writer.batches < 500 and writer.max_batch > 1
+    assert len(manager.get_all_records()) == 500
+    writer.close()
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    gate = threading.Event()
+    original = manager.store.executemany
+
+    def slow_executemany(sql, rows):
+        gate.wait(10)
+        return original(sql, rows)
+
+    manager.store.executemany = slow_executemany
+    writer = HistoryWriter(manager.store, HistoryManager.SQL_INSERT, max_queue=5, batch_size=1)
+    rows = [(f"https://x/{i}", "", "", "", "", 0.0, f"t{i}", "", "", None) for i in range(20)]
+    accepted = [writer.submit(row) for row in rows]
+
+    assert not all(accepted)
+    assert writer.dropped == accepted.count(False)
+    gate.set()
+    assert writer.flush(timeout=10)
+    assert writer.written == accepted.count(True)
+    writer.close()
+
+
+def test_close_writes_pending_rows_and_bad_rows_do_not_sink_the_batch(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    writer = HistoryWriter(manager.store, HistoryManager.SQL_INSERT, flush_interval_s=60)
+    row = ("https://hackstore.mx/peliculas/x", "", "", "", "", 0.0, "2024-01-01T00:00:00", "", "", None)
+    writer.submit(row)
+    writer.submit(row)  # UNIQUE(original_url, timestamp)
+    writer.submit(("https://hackstore.mx/peliculas/y", "", "", "", "", 0.0, "2024-01-01T00:00:00", "", "", None))
+
+    writer.close()
+    assert writer.written == 2 and writer.errors == 1
+    assert len(manager.get_all_records()) == 2
+
+
+def test_non_sqlite_errors_do_not_kill_the_writer(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    original = manager.store.execute
+
+    def failing_execute(sql, params=()):
+        if params and params[0] == "https://x/bad":
+            raise RuntimeError("boom")
+        return original(sql, params)
+
+    def failing_executemany(sql, rows):
+        raise RuntimeError("boom")
+
+    manager.store.execute = failing_execute
+    manager.store.executemany = failing_executemany
+    writer = HistoryWriter(manager.store, HistoryManager.SQL_INSERT, batch_size=1)
+    writer.submit(("https://x/ok", "", "", "", "", 0.0, "2024-01-01T00:00:00", "", "", None))
+    writer.submit(("https://x/bad", "", "", "", "", 0.0, "2024-01-01T00:00:01", "", "", None))
+    writer.submit(("https://x/ok2", "", "", "", "", 0.0, "2024-01-01T00:00:02", "", "", None))
+
+    assert writer.flush(timeout=10)
+    assert writer.written == 2 and writer.errors == 1
+    writer.close()
+
+
+def test_submit_racing_close_never_strands_rows(tmp_path):
+    manager = HistoryManager(db_path=tmp_path)
+    writer = HistoryWriter(manager.store, HistoryManager.SQL_INSERT)
+    start = threading.Barrier(5)
+
+    def produce(n):
+        start.wait()
+        for i in range(200):
+            writer.submit((f"https://x/{n}-{i}", "", "", "", "", 0.0, f"t{n}-{i}", "", "", None))
+
+    threads = [threading.Thread(target=produce, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    start.wait()
+    writer.close()
+    for t in threads:
+        t.join()
+
+    assert writer.flush(timeout=5)
+    assert writer.queue_depth == 0
+    assert writer.written == len(manager.get_all_records())
@@ -0,0 +1,124 @@
+"""
+tests/test_human_sim.py - Perfiles y presupuesto de la simulacion humana.
+"""
+
+import random
+
+import pytest
+
+from src import human_sim
+from src.adapters.hackstore import HackstoreAdapter
+from src.config import SearchCriteria
+from src.human_sim import PROFILES, HumanSimProfile, resolve_profile, simulate_human_behavior
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+class _Mouse:
+    def __init__(self, page):
+        self.page = page
+
+    def move(self, x, y, steps=1):
+        self.page.calls.append("move")
+
+    def wheel(self, dx, dy):
+        self.page.calls.append("wheel")
+
+    def click(self, x, y):
+        self.page.calls.append("click")
+
+
+class _Page:
+    """Pagina falsa: las esperas avanzan el reloj; la red queda ociosa en `idle_at` (s)."""
+
+    viewport_size = {"width": 1280, "height": 720}
+
+    def __init__(self, clock, idle_at=None):
+        self.clock = clock
+        self.idle_at = idle_at
+        self.mouse = _Mouse(self)
+        self.calls = []
+
+    def wait_for_load_state(self, state, timeout=None):
+        self.calls.append("idle?")
+        if self.idle_at is not None and self.clock.now + timeout / 1000 >= self.idle_at:
+            self.clock.now = max(self.clock.now, self.idle_at)
+            return
+        self.clock.now += timeout / 1000
+        raise TimeoutError("networkidle")
+
+    def wait_for_timeout(self, ms):
+        self.calls.append("wait")
+        self.clock.now += ms / 1000
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(human_sim, "time", clock)  # Solo el reloj del modulo
+    random.seed(7)
+    return clock
+
+
+def _actions(page):
+    return [c for c in page.calls if c in ("move", "wheel", "click")]
+
+
+def test_resolve_profile_skips_listed_sites_only_in_batch():
+    assert resolve_profile("https://www.HackStore.mx/peliculas/x", "light", batch=True) is PROFILES["off"]
+    assert resolve_profile("https://hackstore.mx/peliculas/x", "light") is PROFILES["light"]
+    assert resolve_profile("https://otro.site/x", "heavy", batch=True) is PROFILES["heavy"]
+    assert resolve_profile("https://otro.site/x", "desconocida") is PROFILES["normal"]
+
+
+def test_batch_mode_turns_the_adapter_simulation_off(clock):
+    adapter = HackstoreAdapter(None, SearchCriteria())
+    url = "https://hackstore.mx/peliculas/x"
+    assert adapter.sim_profile(url, "light").name == "light"
+
+    adapter.batch_mode = True  # LinkResolver(batch_mode=True) / --batch
+    page = _Page(clock)
+    # El adaptador importa human_sim sin el prefijo src: se compara por nombre
+    profile = PROFILES[adapter.sim_profile(url, "light").name]
+    assert profile is PROFILES["off"]
+    assert simulate_human_behavior(page, profile) == 0.0
+    assert page.calls == []
+
+
+def test_off_profile_and_zero_budget_do_nothing(clock):
+    page = _Page(clock)
+    assert simulate_human_behavior(page, "off") == 0.0
+    assert simulate_human_behavior(page, "heavy", budget_s=0) == 0.0
+    assert page.calls == []
+
+
+def test_budget_caps_the_run_while_the_network_stays_busy(clock):
+    page = _Page(clock)
+    elapsed = simulate_human_behavior(page, "heavy", budget_s=2.0)
+
+    assert elapsed == pytest.approx(2.0, abs=0.01)
+    profile = PROFILES["heavy"]
+    assert 0 < len(_actions(page)) < profile.moves + profile.scrolls + profile.clicks
+    assert "wait" not in page.calls  # todas las pausas esperaron la red
+
+
+def test_idle_network_does_not_cut_the_remaining_actions(clock):
+    page = _Page(clock, idle_at=0.0)  # ya ociosa antes de empezar
+    profile = HumanSimProfile("test", 3, 2, 1, 60.0)
+    simulate_human_behavior(page, profile)
+
+    assert len(_actions(page)) == 6
+    assert page.calls.count("idle?") == 1  # una vez ociosa, pausas fijas
+    assert page.calls.count("wait") == 5
+
+
+def test_without_until_idle_every_pause_is_fixed(clock):
+    page = _Page(clock)
+    simulate_human_behavior(page, HumanSimProfile("test", 2, 1, 1, 60.0), until_idle=False)
+    assert "idle?" not in page.calls and page.calls.count("wait") == 4
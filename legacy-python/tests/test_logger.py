@@ -0,0 +1,114 @@
+"""
+tests/test_logger.py - Logger con buffer circular, niveles por callback y despacho en segundo plano.
+"""
+
+import threading
+import time
+
+from src.logger import ResolverLogger
+
+
+def test_buffer_is_bounded_and_formatting_is_lazy():
+    logger = ResolverLogger(buffer_size=3)
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return "cookies: 12"
+
+    logger.debug(lambda: calls.append("debug") or "nadie lo pide")
+    assert calls == []  # el DEBUG sin callbacks no se evalua
+    for i in range(5):
+        logger.info(f"mensaje {i}")
+    logger.info(expensive, step="Paso 1")
+    assert calls == [1]  # el aceptado se evalua al loguear
+
+    logs = logger.get_logs()
+    assert [entry["message"] for entry in logs] == ["mensaje 3", "mensaje 4", "cookies: 12"]
+    assert logs[-1]["formatted"].endswith("[Paso 1] cookies: 12") and logs[-1]["step"] == "Paso 1"
+    assert calls == [1]
+
+
+def test_lazy_messages_run_on_the_logging_thread():
+    logger = ResolverLogger(buffer_level="ERROR")
+    threads, seen = [], []
+    logger.register_callback(lambda level, msg: seen.append(msg), level="INFO")
+
+    logger.info(lambda: threads.append(threading.current_thread()) or "estado")
+    assert logger.flush(timeout=5)
+
+    assert threads == [threading.current_thread()] and seen[-1].endswith("estado")
+
+
+def test_sinks_filter_by_level_and_sync_runs_inline():
+    logger = ResolverLogger()
+    seen_async, seen_sync = [], []
+    logger.register_callback(lambda level, msg: seen_async.append((level, msg)), level="WARNING")
+    logger.register_callback(lambda level, msg: seen_sync.append((level, threading.current_thread())),
+                             level="DEBUG", sync=True)
+
+    logger.debug("detalle")
+    logger.info("info")
+    logger.error("fallo", step="Paso 2")
+    assert [level for level, _ in seen_sync] == ["DEBUG", "INFO", "ERROR"]
+    assert all(thread is threading.current_thread() for _, thread in seen_sync)
+    assert logger.flush(timeout=2)
+    assert len(seen_async) == 1 and seen_async[0][0] == "ERROR" and "[Paso 2] fallo" in seen_async[0][1]
+    assert [entry["level"] for entry in logger.get_logs()] == ["INFO", "ERROR"]
+
+    logger.unregister_callback(logger.callbacks[1])
+    logger.debug("ya no")
+    assert len(seen_sync) == 3
+
+
+def test_slow_callback_never_blocks_and_drops_oldest():
+    logger = ResolverLogger(queue_size=10)
+    release = threading.Event()
+    received = []
+
+    def slow(level, msg):
+        release.wait(5)
+        received.append(msg)
+
+    logger.register_callback(slow)
+    start = time.perf_counter()
+    for i in range(100):
+        logger.info(f"m{i}")
+    assert time.perf_counter() - start < 0.5
+    release.set()
+    assert logger.flush(timeout=5)
+
+    stats = logger.stats()
+    assert stats["pending"] == 0 and stats["dropped"] >= 80
+    assert received[-1].endswith("m99")  # los mas nuevos llegan
+    assert len(received) + stats["dropped"] == 100
+
+
+def test_resolution_loggers_keep_jobs_apart():
+    logger = ResolverLogger()
+    everything = []
+    logger.register_callback(lambda level, msg: everything.append(msg))
+    job_a, job_b = logger.bind(), logger.bind("job-b")
+    assert job_a.resolution_id != job_b.resolution_id and job_b.bind() is job_b
+
+    seen_a, seen_b = [], []
+    with job_a.subscribe(lambda level, msg: seen_a.append(msg)):
+        job_b.register_callback(lambda level, msg: seen_b.append(msg))
+        job_a.info("a1")
+        job_b.info("b1")
+        with job_b.activate():
+            logger.warning("desde un modulo sin logger")  # etiquetado con job-b
+        job_a.step("NAV", "a2")
+    assert logger.flush(timeout=2)
+
+    assert [m.rsplit(" ", 1)[-1] for m in seen_a] == ["a1", "a2"]
+    assert len(seen_b) == 2 and seen_b[1].endswith("desde un modulo sin logger")
+    assert len(everything) == 4
+    assert logger.stats()["callbacks"] == 2  # el de job_a se quito al salir del bloque
+    job_b.close()
+    assert logger.stats()["callbacks"] == 1
+
+    assert [entry["message"] for entry in job_b.get_logs()] == ["b1", "desde un modulo sin logger"]
+    assert {entry["resolution_id"] for entry in job_a.get_logs()} == {job_a.resolution_id}
+    job_a.clear()
+    assert job_a.get_logs() == [] and len(job_b.get_logs()) == 2
@@ -0,0 +1,26 @@
+"""
+tests/test_main.py - Argumentos de la linea de comandos.
+"""
+
+import sys
+
+import pytest
+
+from src import main
+
+
+def _parse(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["main.py", *argv])
+    return main.parse_args()
+
+
+def test_history_accepts_zero_and_defaults_to_20(monkeypatch):
+    assert _parse(monkeypatch, "--history").history == 20
+    assert _parse(monkeypatch, "--history", "0").history == 0
+
+
+def test_negative_history_is_a_usage_error(monkeypatch, capsys):
+    with pytest.raises(SystemExit) as exc:
+        _parse(monkeypatch, "--history", "-3")
+    assert exc.value.code == 2
+    assert "must be 0 or greater" in capsys.readouterr().err
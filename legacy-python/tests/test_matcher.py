@@ -0,0 +1,47 @@
+"""
+tests/test_matcher.py - Pruebas del ranking de links.
+"""
+
+from src.config import SearchCriteria
+from src.matcher import LinkMatcher, StreamingLinkMatcher
+
+
+def _criteria():
+    return SearchCriteria(quality="1080p", format="WEB-DL", preferred_providers=["mega", "mediafire"])
+
+
+def test_streaming_matches_full_sort():
+    raw = [
+        {"url": "https://www.mediafire.com/file/a", "text": "720p WEB-DL"},
+        {"url": "https://mega.nz/file/b", "text": "1080p BluRay"},
+        {"url": "https://1fichier.com/?c", "text": "1080p WEB-DL"},
+        {"url": "https://mega.nz/file/d", "text": "480p"},
+    ]
+    ranked = LinkMatcher(_criteria()).parse_and_rank(raw)
+
+    streaming = StreamingLinkMatcher(_criteria(), k=2)
+    for lnk in raw:
+        streaming.add(lnk["url"], lnk["text"], payload=lnk["url"])
+
+    assert streaming.seen == 4
+    assert [payload for _, payload in streaming.top()] == [link.url for link in ranked[:2]]
+    assert not streaming.perfect
+
+
+def test_perfect_match_is_detected_on_arrival():
+    streaming = StreamingLinkMatcher(_criteria(), k=3)
+    assert streaming.max_score() == 40 + 30 + 30 + 10
+
+    streaming.add("https://mega.nz/file/a", "720p WEB-DL latino")
+    assert not streaming.perfect
+    streaming.add("btn_click", "1080p WEB-DL latino", provider="mega")
+    assert streaming.perfect
+    assert streaming.best()[0].score == streaming.max_score()
+
+
+def test_max_score_only_counts_what_the_text_can_show():
+    matcher = LinkMatcher(_criteria())
+    assert matcher.max_score(shows=("quality",)) == 40 + 30
+    assert matcher.max_score(shows=("quality", "format")) == 40 + 30 + 30
+    no_language = LinkMatcher(SearchCriteria(quality="1080p", preferred_providers=["mega"], language=""))
+    assert no_language.max_score(shows=("quality",)) == 40 + 30 + 10  # el bonus se suma siempre
@@ -0,0 +1,117 @@
+"""
+tests/test_navigation_capture.py - Captura de destinos de click sin cargarlos.
+"""
+
+from src.navigation_capture import NavigationCapture
+
+
+class _Frame:
+    pass
+
+
+class _Request:
+    def __init__(self, url, frame, navigation=True):
+        self.url = url
+        self.frame = frame
+        self._navigation = navigation
+
+    def is_navigation_request(self):
+        return self._navigation
+
+
+class _Route:
+    def __init__(self, request):
+        self.request = request
+        self.action = None
+
+    def abort(self, error_code=None):
+        self.action = "abort"
+
+    def fallback(self):
+        self.action = "fallback"
+
+
+class _Response:
+    def __init__(self, url, status, location, request):
+        self.url = url
+        self.status = status
+        self.headers = {"location": location}
+        self.request = request
+
+
+class _Page:
+    def __init__(self):
+        self.main_frame = _Frame()
+        self.url = "https://hackstore.mx/peliculas/x"
+
+
+def test_external_main_frame_navigation_is_captured_and_aborted():
+    page = _Page()
+    capture = NavigationCapture(page, page.url)
+
+    internal = _Route(_Request("https://www.hackstore.mx/link/1", page.main_frame))
+    capture._handle_route(internal)
+    assert internal.action == "fallback"
+    assert capture.poll() is None
+
+    external = _Route(_Request("https://acortame.site/abc", page.main_frame))
+    capture._handle_route(external)
+    assert external.action == "abort"
+    assert capture.poll() == "https://acortame.site/abc"
+    assert capture.source == "navigation"
+
+
+def test_redirect_location_and_ignored_targets():
+    page = _Page()
+    capture = NavigationCapture(page, page.url, ignore=lambda url: "ads" in url)
+
+    nav = _Request("https://hackstore.mx/link/1", page.main_frame)
+    capture._on_response(_Response(nav.url, 302, "https://ads.example.com/x", nav))
+    assert capture.poll() is None
+
+    capture._on_response(_Response(nav.url, 302, "https://mega.nz/file/abc", nav))
+    assert capture.target == "https://mega.nz/file/abc"
+    assert capture.source == "redirect"
+
+
+class _Popup:
+    def __init__(self, opener):
+        self.main_frame = _Frame()
+        self.main_frame.parent_frame = None
+        self.main_frame.page = self
+        self._opener = opener
+        self.closed = False
+
+    def opener(self):
+        return self._opener
+
+    def close(self):
+        self.closed = True
+
+
+def test_popup_navigation_is_captured_in_context_route_and_closed():
+    page = _Page()
+    capture = NavigationCapture(page, "https://peliculasgd.net/pelicula/x",
+                                ignore=lambda url: "acortame" not in url)
+
+    # Popup de un ad: no es el destino, se deja seguir
+    ad = _Popup(page)
+    ad_route = _Route(_Request("https://ads.example.com/pop", ad.main_frame))
+    capture._handle_popup_route(ad_route)
+    assert ad_route.action == "fallback"
+
+    # Popup abierto por otra pagina: no es nuestro
+    other = _Popup(_Page())
+    other_route = _Route(_Request("https://acortame.site/zzz", other.main_frame))
+    capture._handle_popup_route(other_route)
+    assert other_route.action == "fallback"
+
+    popup = _Popup(page)
+    route = _Route(_Request("https://acortame.site/abc", popup.main_frame))
+    capture._handle_popup_route(route)
+    assert route.action == "abort"
+    assert capture.poll() == "https://acortame.site/abc"
+    assert capture.source == "popup"
+
+    capture.close_popups()
+    assert popup.closed
@@ -65,3 +65,143 @@ def test_dom_analyzer_score():
     
     score = analyzer.calculate_realness_score(ad_features)
     assert score < 0.4
+
+def test_dom_analyzer_vectorized_matches_single_score():
+    from src.dom_analyzer import feature_vector
+
+    analyzer = DOMAnalyzer()
+    base = {
+        'display': 'block', 'visibility': 'visible', 'position': 'static', 'zIndex': 0,
+        'classes': 'btn', 'id': '', 'opacity': 1.0, 'href': '', 'cursor': 'pointer',
+    }
+    elements = [
+        dict(base, area=5000, text='Descargar', href='https://mega.nz/file/1'),
+        dict(base, area=300000, position='fixed', zIndex=9999, classes='banner', text='Gana'),
+        dict(base, area=100, opacity=0.1, text=''),
+    ]
+
+    rows = [feature_vector(f) for f in elements * 700]
+    scores = analyzer.score_matrix(rows, [True, True, False] * 700)
+
+    assert len(scores) == 2100
+    assert abs(scores[0] - analyzer.calculate_realness_score(elements[0])) < 1e-9
+    assert abs(scores[1] - analyzer.calculate_realness_score(elements[1])) < 1e-9
+    assert scores[2] == 0.0
+
+def test_network_analyzer_aborts_main_frame_navigation_to_download_host():
+    class Frame:
+        def __init__(self, parent=None):
+            self.parent_frame = parent
+
+    class Request:
+        def __init__(self, url, frame, resource_type="document"):
+            self.url = url
+            self.frame = frame
+            self.resource_type = resource_type
+
+        def is_navigation_request(self):
+            return self.resource_type == "document"
+
+    class Route:
+        def __init__(self, request):
+            self.request = request
+            self.action = None
+
+        def abort(self, error_code=None):
+            self.action = "abort"
+
+        def fallback(self):
+            self.action = "fallback"
+
+    analyzer = NetworkAnalyzer()
+    main = Frame()
+
+    final = Route(Request("https://mega.nz/file/abc#key", main))
+    analyzer._handle_route(final)
+    assert final.action == "abort"
+    assert analyzer.captured_links[0]['url'] == "https://mega.nz/file/abc#key"
+    assert analyzer.get_stats()['aborted_downloads'] == 1
+
+    # Un iframe embebido o un script del host de descarga no es el salto final
+    embedded = Route(Request("https://drive.google.com/file/d/1/preview", Frame(parent=main)))
+    analyzer._handle_route(embedded)
+    assert embedded.action == "fallback"
+
+    shortener = Route(Request("https://acortame.site/x", main))
+    analyzer._handle_route(shortener)
+    assert shortener.action == "fallback"
+
+    # Un acortador con el host de descarga en el query sigue su camino
+    wrapped = Route(Request("https://ouo.io/go?url=https://mega.nz/file/xyz", main))
+    analyzer._handle_route(wrapped)
+    assert wrapped.action == "fallback"
+    assert analyzer.get_stats()['aborted_downloads'] == 1
+
+def test_network_analyzer_matches_download_and_shortener_hosts():
+    analyzer = NetworkAnalyzer()
+
+    assert analyzer.is_download_url("https://www.MEGA.nz/file/abc") is True
+    assert analyzer.is_download_url("https://ouo.io/go?url=https://mega.nz/file/abc") is False
+    assert analyzer.is_download_url("https://notmega.nz/file/abc") is False
+    assert analyzer.is_download_url("https://acortame.site/mega.nz/abc") is False
+    assert analyzer.is_shortener_url("https://ouo.io/abc") is True
+    assert analyzer.is_shortener_url("https://mega.nz/file/abc?ref=ouo.io") is False
+
+def test_network_analyzer_excluded_pages_only_block_ads():
+    from src.resolution_bus import ResolutionBus
+
+    class Page:
+        pass
+
+    class Frame:
+        def __init__(self, page):
+            self.page = page
+            self.parent_frame = None
+
+    class Request:
+        resource_type = "document"
+
+        def __init__(self, url, frame):
+            self.url = url
+            self.frame = frame
+
+        def is_navigation_request(self):
+            return True
+
+    class Route:
+        def __init__(self, request):
+            self.request = request
+            self.action = None
+
+        def abort(self, error_code=None):
+            self.action = "abort"
+
+        def fallback(self):
+            self.action = "fallback"
+
+    class Response:
+        status = 302
+
+        def __init__(self, frame):
+            self.frame = frame
+            self.url = "https://acortame.site/x"
+            self.headers = {"location": "https://mega.nz/file/tab"}
+            self.request = Request(self.url, frame)
+
+    bus = ResolutionBus()
+    analyzer = NetworkAnalyzer(bus=bus)
+    tab = Page()
+    analyzer.exclude_page(tab)
+
+    # Pestaña de captura: sus destinos no se capturan ni ganan el bus
+    nav = Route(Request("https://mega.nz/file/tab", Frame(tab)))
+    analyzer._handle_route(nav)
+    analyzer._handle_response(Response(Frame(tab)))
+    assert nav.action == "fallback"
+    ad = Route(Request("https://doubleclick.net/ad", Frame(tab)))
+    analyzer._handle_route(ad)
+    assert ad.action == "abort"
+    assert analyzer.captured_links == [] and not bus.done
+
+    analyzer._handle_response(Response(Frame(Page())))
+    assert bus.result == "https://mega.nz/file/tab"
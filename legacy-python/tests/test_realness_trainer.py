@@ -0,0 +1,39 @@
+"""
+tests/test_realness_trainer.py - Entrenamiento del modelo de realness de DOMAnalyzer.
+"""
+
+from src.dom_analyzer import DOMAnalyzer, FEATURE_NAMES
+from src.realness_trainer import train
+
+
+def _row(**flags):
+    return [1.0 if flags.get(name) else 0.0 for name in FEATURE_NAMES]
+
+
+def test_trained_weights_are_loaded_and_separate_outcomes(tmp_path):
+    dataset = tmp_path / "dataset.jsonl"
+    weights = tmp_path / "weights.json"
+    analyzer = DOMAnalyzer(weights_file=weights, dataset_file=dataset)
+    assert analyzer.model == "linear"
+
+    real = _row(good_text=True, standard_size=True, pointer=True)
+    # Anuncio con texto de descarga: el modelo a mano lo puntua alto
+    fake = _row(good_text=True, standard_size=True, pointer=True, floating_overlay=True)
+    analyzer.record_outcomes([real] * 15 + [fake] * 15, [True] * 15 + [False] * 15, site="hackstore.mx")
+
+    model = train(dataset, weights, epochs=3000)
+    assert model["samples"] == 30
+    assert model["accuracy"] == 1.0
+
+    trained = DOMAnalyzer(weights_file=weights, dataset_file=dataset)
+    assert trained.model == "logistic"
+    scores = trained.score_matrix([real, fake])
+    assert scores[0] > 0.5 > scores[1]
+
+
+def test_train_requires_minimum_samples(tmp_path):
+    dataset = tmp_path / "dataset.jsonl"
+    DOMAnalyzer(weights_file=tmp_path / "none.json", dataset_file=dataset).record_outcomes([_row()], [True])
+
+    assert train(dataset, tmp_path / "weights.json") == {}
+    assert not (tmp_path / "weights.json").exists()
@@ -0,0 +1,72 @@
+"""
+tests/test_release_tokenizer.py - Tokenizador compartido de metadata de releases.
+"""
+
+from src.release_tokenizer import tokenize
+from src.url_parser import extract_metadata_from_url
+
+
+def test_url_slug_is_normalized():
+    meta = tokenize("https://www.peliculasgd.net/la-empleada-2025-web-dl-1080p-latino-googledrive/")
+    assert (meta.quality, meta.format, meta.language) == ("1080p", "WEB-DL", "latino")
+
+    assert extract_metadata_from_url("https://hackstore.mx/peliculas/interstellar-2014-bluray-4k") == {
+        "quality": "2160p", "format": "BluRay", "language": None,
+    }
+
+
+def test_tokens_need_word_boundaries():
+    # "ts" dentro de "https" o "hd" dentro de "hdrip" no son tokens
+    meta = tokenize("https://mega.nz/file/abc HDRip")
+    assert meta.format == "HDRip"
+    assert meta.quality is None
+    assert meta.provider == "mega"
+    assert tokenize("https://example.com/stats").format is None
+
+
+def test_highest_priority_wins_and_results_are_cached():
+    meta = tokenize("Pack 720p + 1080p FULL HD DVD-Rip")
+    assert meta.quality == "1080p"
+    assert meta.format == "DVDRip"
+    assert tokenize("Pack 720p + 1080p FULL HD DVD-Rip") is meta
+
+
+def test_multi_word_format_beats_the_quality_alias_inside_it():
+    # "hd" es calidad, pero "hd-rip"/"hd rip" es formato: gana el alias mas largo
+    meta = tokenize("HD-Rip")
+    assert (meta.quality, meta.format) == (None, "HDRip")
+
+    meta = tokenize("Pelicula HD Rip 1080p")
+    assert (meta.quality, meta.format) == ("1080p", "HDRip")
+
+    assert tokenize("Pelicula HD").quality == "720p"
+    assert tokenize("Full HD Web Rip").to_dict() == {
+        "quality": "1080p", "format": "WEBRip", "language": None, "provider": None,
+    }
+
+
+def test_hd_rip_label_is_scored_on_format_not_on_a_false_quality():
+    from src.config import SearchCriteria
+    from src.matcher import LinkMatcher
+
+    matcher = LinkMatcher(SearchCriteria(quality="1080p", format="HDRip"))
+    link = matcher.parse_link("https://mega.nz/file/abc", "MEGA HD-Rip")
+    assert (link.quality, link.format, link.provider) == ("", "HDRip", "mega")
+    assert matcher.score_link(link) >= 30  # +30 de formato, sin -10 de calidad
+
+
+def test_language_and_provider_tokens():
+    meta = tokenize("Dual Latino + Subs https://drive.google.com/file/d/1")
+    assert meta.language == "latino"  # primero en el orden de idiomas
+    assert meta.provider == "drive.google"
+    assert tokenize("castellano").language == "español"
+    assert tokenize("").to_dict() == {"quality": None, "format": None, "language": None, "provider": None}
+
+
+def test_url_title_strips_every_release_token():
+    from src.url_parser import extract_title_from_url
+
+    assert extract_title_from_url("https://hackstore.mx/peliculas/dune-2021-hd-rip-720p-latino") == "dune 2021"
+    assert extract_title_from_url("https://www.peliculasgd.net/la-empleada-2025-web-dl-1080p-latino/") == \
+        "la empleada 2025"
+    assert extract_title_from_url("https://hackstore.mx/") == ""
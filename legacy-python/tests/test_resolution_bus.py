@@ -0,0 +1,102 @@
+"""
+tests/test_resolution_bus.py - Bus de resultado: el primer link final corta el resto.
+"""
+
+import pytest
+
+from src.resolution_bus import ResolutionBus
+from src.network_analyzer import NetworkAnalyzer
+from src.completion_waiter import CompletionWaiter
+
+
+class _Request:
+    def __init__(self, url, navigation=True, resource_type="document"):
+        self.url = url
+        self.resource_type = resource_type
+        self.frame = None
+        self._navigation = navigation
+
+    def is_navigation_request(self):
+        return self._navigation
+
+
+class _Response:
+    def __init__(self, url, status=200, navigation=True, location=None):
+        self.url = url
+        self.status = status
+        self.headers = {"location": location} if location else {}
+        self.request = _Request(url, navigation)
+
+
+class _Route:
+    def __init__(self, request):
+        self.request = request
+        self.action = None
+
+    def abort(self, error_code=None):
+        self.action = "abort"
+
+    def fallback(self):
+        self.action = "fallback"
+
+
+class _Page:
+    """Pagina falsa: cada wait_for_timeout cuenta un tick y dispara `on_tick`."""
+
+    def __init__(self, on_tick=None):
+        self.ticks = 0
+        self.on_tick = on_tick
+
+    def wait_for_timeout(self, ms):
+        self.ticks += 1
+        if self.on_tick:
+            self.on_tick(self.ticks)
+
+    def is_closed(self):
+        return False
+
+
+def test_first_publication_wins_and_notifies_once():
+    bus = ResolutionBus()
+    seen = []
+    bus.subscribe(lambda url, source: seen.append((url, source)))
+
+    assert bus.publish("https://mega.nz/file/a", "network") is True
+    assert bus.publish("https://drive.google.com/file/d/b", "chain") is False
+
+    assert bus.done and bus.result == "https://mega.nz/file/a"
+    assert seen == [("https://mega.nz/file/a", "network")]
+
+
+def test_sleep_is_cut_short_by_a_publication():
+    bus = ResolutionBus()
+    page = _Page(on_tick=lambda n: n == 3 and bus.publish("https://mega.nz/file/a", "network"))
+
+    assert bus.sleep(page, 10000) is True
+    assert page.ticks == 3
+
+
+def test_network_analyzer_publishes_only_navigations_and_then_aborts_everything():
+    bus = ResolutionBus()
+    analyzer = NetworkAnalyzer(bus=bus)
+
+    # Un recurso servido desde mega.nz no es el link final
+    analyzer._handle_response(_Response("https://mega.nz/static/app.js", navigation=False))
+    assert not bus.done
+
+    analyzer._handle_response(_Response("https://acortame.site/x", status=302, location="https://mega.nz/file/abc"))
+    assert bus.result == "https://mega.nz/file/abc"
+
+    route = _Route(_Request("https://acortame.site/next"))
+    analyzer._handle_route(route)
+    assert route.action == "abort"
+
+
+def test_completion_waiter_adopts_result_published_elsewhere():
+    bus = ResolutionBus()
+    page = _Page(on_tick=lambda n: n == 2 and bus.publish("https://mega.nz/file/a", "chain navigation"))
+    waiter = CompletionWaiter(page, is_final_url=lambda u: False, bus=bus)
+
+    assert waiter.wait(timeout_s=30) == "https://mega.nz/file/a"
+    assert waiter.source == "chain navigation"
+    assert page.ticks == 2
@@ -0,0 +1,68 @@
+"""
+tests/test_screenshot_handler.py - Politica y escritura en segundo plano de screenshots.
+"""
+
+import os
+
+from src.screenshot_handler import ScreenshotHandler
+
+
+class _Page:
+    url = "https://hackstore.mx/peliculas/x"
+
+    def __init__(self, size=1000):
+        self.size = size
+        self.calls = []
+
+    def screenshot(self, **options):
+        self.calls.append(options)
+        return b"\xff" * self.size
+
+
+def test_off_policy_costs_nothing(tmp_path):
+    out = tmp_path / "shots"
+    handler = ScreenshotHandler(output_dir=str(out), policy="off")
+    page = _Page()
+
+    assert handler.capture(page, "step") is None
+    assert handler.capture_error(page, "boom") is None
+    assert page.calls == []
+    assert not out.exists()
+
+
+def test_on_error_policy_writes_jpeg_in_background(tmp_path):
+    received = []
+    handler = ScreenshotHandler(output_dir=str(tmp_path), policy="on-error", quality=55,
+                                callback=lambda **kw: received.append(kw))
+    page = _Page()
+
+    assert handler.capture(page, "movie_page") is None
+    path = handler.capture_error(page, "nav_error", "Error")
+    handler.flush()
+
+    assert path.endswith(".jpg") and os.path.exists(path)
+    assert page.calls[0]["type"] == "jpeg" and page.calls[0]["quality"] == 55
+    assert [r["filepath"] for r in received] == [path]
+    assert received[0]["data"] == b"\xff" * 1000 and received[0]["mime_type"] == "image/jpeg"
+
+
+def test_callback_runs_in_capture_before_the_write(tmp_path):
+    handler = ScreenshotHandler(output_dir=str(tmp_path), policy="per-step")
+    seen = []
+    handler._ensure_worker = lambda: None  # Sin hilo de escritura: nada llega a disco
+    handler.set_callback(lambda **kw: seen.append((kw["name"], kw["data"], os.path.exists(kw["filepath"]))))
+
+    handler.capture(_Page(size=10), "step1")
+
+    assert seen == [("step1", b"\xff" * 10, False)]
+
+
+def test_retention_caps_directory_size(tmp_path):
+    handler = ScreenshotHandler(output_dir=str(tmp_path), policy="per-step", max_dir_bytes=2500)
+    page = _Page(size=1000)
+    for i in range(5):
+        handler.capture(page, f"step{i}")
+    handler.flush()
+
+    total = sum(f.stat().st_size for f in tmp_path.iterdir())
+    assert total <= 2500
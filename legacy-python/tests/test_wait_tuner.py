@@ -0,0 +1,102 @@
+"""
+tests/test_wait_tuner.py - Pruebas de las esperas adaptativas por sitio.
+"""
+
+import threading
+
+from src.history_store import HistoryStore
+from src.wait_tuner import WaitTuner, prune_observations, site_key
+
+
+def _tuner(tmp_path):
+    return WaitTuner(db_file=tmp_path / "tuner.db")
+
+
+def test_site_key_strips_www():
+    assert site_key("https://www.hackstore.mx/peliculas/x") == "hackstore.mx"
+    assert site_key("https://acortame.site/abc") == "acortame.site"
+
+
+def test_budget_uses_default_until_enough_samples(tmp_path):
+    tuner = _tuner(tmp_path)
+    for _ in range(WaitTuner.MIN_SAMPLES - 1):
+        tuner.record("hackstore.mx", "expand_links", 800)
+
+    assert tuner.budget_ms("hackstore.mx", "expand_links", 5000) == 5000
+
+
+def test_budget_converges_to_p95_plus_margin(tmp_path):
+    tuner = _tuner(tmp_path)
+    for elapsed in [400, 500, 600, 700, 800, 900, 1000, 1100, 1200, 1300]:
+        tuner.record("hackstore.mx", "expand_links", elapsed)
+    tuner.flush()
+
+    budget = WaitTuner(db_file=tmp_path / "tuner.db").budget_ms("hackstore.mx", "expand_links", 5000)
+    assert budget == int(1300 * WaitTuner.MARGIN_FACTOR + WaitTuner.MARGIN_MS)
+    # Nunca por encima del default conservador
+    assert tuner.budget_ms("hackstore.mx", "expand_links", 1000) == 1000
+
+
+def test_short_budget_falls_back_to_default(tmp_path):
+    tuner = _tuner(tmp_path)
+    for _ in range(10):
+        tuner.record("acortame.site", "chain_buttons", 100)
+    tuner.flush()
+    learned = tuner.budget_ms("acortame.site", "chain_buttons", 2000)
+    assert learned < 2000
+
+    calls = []
+
+    def wait_fn(timeout_ms):
+        calls.append(timeout_ms)
+        if len(calls) == 1:
+            raise TimeoutError("not ready")
+
+    assert tuner.wait("acortame.site", "chain_buttons", 2000, wait_fn) is True
+    assert calls[0] == learned
+    assert calls[1] > 0
+    # Tras un fallback el paso vuelve al default, ya en esta ejecucion
+    assert tuner.budget_ms("acortame.site", "chain_buttons", 2000) == 2000
+    # ... y en la siguiente
+    tuner.flush()
+    assert WaitTuner(db_file=tmp_path / "tuner.db").budget_ms("acortame.site", "chain_buttons", 2000) == 2000
+
+
+def test_record_only_queues_the_write(tmp_path):
+    tuner = _tuner(tmp_path)
+    gate = threading.Event()
+    original = tuner.store.executemany
+
+    def slow_executemany(sql, rows):
+        gate.wait(10)
+        return original(sql, rows)
+
+    tuner.store.executemany = slow_executemany
+    try:
+        tuner.record("hackstore.mx", "expand_links", 800)  # No espera al writer
+        assert tuner.store.query_one("SELECT COUNT(*) FROM wait_observations")[0] == 0
+    finally:
+        gate.set()
+    assert tuner.flush(10)
+    del tuner.store.executemany
+    assert tuner.store.query_one("SELECT COUNT(*) FROM wait_observations")[0] == 1
+
+
+def test_prune_keeps_the_latest_window_per_step(tmp_path):
+    tuner = _tuner(tmp_path)
+    for elapsed in range(30):
+        tuner.record("hackstore.mx", "expand_links", elapsed)
+        tuner.record("acortame.site", "chain_buttons", elapsed)
+    tuner.record("hackstore.mx", "capture_ready", 5)
+    tuner.flush()
+
+    assert prune_observations(tuner.store, keep=10, batch_size=7) == 40
+    rows = tuner.store.query("SELECT site, step, MIN(elapsed_ms), COUNT(*) FROM wait_observations "
+                             "GROUP BY site, step ORDER BY site, step")
+    assert [tuple(r) for r in rows] == [("acortame.site", "chain_buttons", 20, 10),
+                                        ("hackstore.mx", "capture_ready", 5, 1),
+                                        ("hackstore.mx", "expand_links", 20, 10)]
+
+
+def test_prune_without_table(tmp_path):
+    assert prune_observations(HistoryStore.for_path(tmp_path / "empty.db")) == 0